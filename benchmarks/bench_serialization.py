@@ -0,0 +1,123 @@
+"""Micro-benchmark of the WebSocket frame serializers on realistic log and status payloads
+
+Run from the repository root:
+    python benchmarks/bench_serialization.py
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import serializer
+from server.serializer import LOG_ENVELOPE, Frame, ENCODING_JSON
+
+# Realistic payloads, as sent by stream_server_logs, send_server_status and on_components_get
+LOG_LINE = {
+    'type': 'server_log',
+    'log': '[12:34:56] [Server thread/INFO] [minecraft/DedicatedServer]: Done (23.456s)! For help, type "help"'
+}
+LOG_LINE_CN = {
+    'type': 'server_log',
+    'log': '[12:34:56] [Server thread/INFO] [minecraft/MinecraftServer]: <玩家> 服务器今天好卡啊，TPS 只有 15'
+}
+STATUS = {
+    'type': 'server_status',
+    'server_name': 'survival',
+    'seq': 1024,
+    'system_info': {
+        'cpu_usage': 37.5,
+        'memory_usage': 62.1,
+        'memory_total': 34359738368,
+        'memory_used': 21337397248,
+        'network_io': {'bytes_sent': 183422, 'bytes_recv': 90211},
+        'cpu_frequency': 4200.0,
+        'tps': '19.8',
+        'mspt': '32.4',
+        'players_online': '12',
+        'players_max': '50',
+        'spark_installed': True
+    },
+    'platform_type': 'Forge'
+}
+STATUS_DELTA = {
+    'type': 'server_status_delta',
+    'server_name': 'survival',
+    'seq': 1025,
+    'changes': {'cpu_usage': 41.2, 'memory_used': 21339494400, 'network_io': {'bytes_sent': 175002, 'bytes_recv': 88120}}
+}
+COMPONENTS = {
+    'type': 'components',
+    'mods': [
+        {'name': f'examplemod-{i}-1.20.1-forge.jar', 'size': 1048576 + i * 4096, 'enabled': i % 7 != 0}
+        for i in range(200)
+    ]
+}
+
+def stdlib_default(data):
+    """json.dumps as used before the serializer layer"""
+    return json.dumps(data)
+
+def stdlib_compact(data):
+    """json.dumps with compact separators, encoded to bytes"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def candidates():
+    """Get the (name, function) pairs to compare for dict payloads"""
+    yield 'json.dumps (baseline)', stdlib_default
+    yield 'json compact bytes', stdlib_compact
+    if serializer.orjson_available:
+        yield 'orjson', serializer.orjson.dumps
+    if serializer.msgpack_available:
+        yield 'msgpack', serializer.dumps_msgpack
+
+def bench(function, payload, number):
+    """Get the mean time per call in microseconds"""
+    return min(timeit.repeat(lambda: function(payload), number=number, repeat=5)) / number * 1e6
+
+def main():
+    number = 20000
+    payloads = [
+        ('log line', LOG_LINE, number),
+        ('log line (CJK)', LOG_LINE_CN, number),
+        ('status snapshot', STATUS, number),
+        ('status delta', STATUS_DELTA, number),
+        ('components (200 mods)', COMPONENTS, number // 50)
+    ]
+    
+    print(f"orjson: {'yes' if serializer.orjson_available else 'no'}, "
+          f"msgpack: {'yes' if serializer.msgpack_available else 'no'}")
+    for payload_name, payload, count in payloads:
+        print(f"\n{payload_name}")
+        for name, function in candidates():
+            size = len(function(payload))
+            print(f"  {name:<28}{bench(function, payload, count):>9.2f} us  {size:>7} bytes")
+        
+        if payload.get('type') == 'server_log':
+            # Pre-encoded envelope used by the stdlib fallback: only the log text is serialized
+            prefix = stdlib_compact({'type': 'server_log', 'log': None})[:-len(b'null}')]
+            function = lambda data: prefix + json.dumps(data['log'], ensure_ascii=False).encode('utf-8') + b'}'
+            size = len(function(payload))
+            print(f"  {'json envelope':<28}{bench(function, payload, count):>9.2f} us  {size:>7} bytes")
+            function = lambda data: LOG_ENVELOPE.encode(data['log'])
+            print(f"  {'LOG_ENVELOPE (active)':<28}{bench(function, payload, count):>9.2f} us")
+    
+    # A broadcast to 20 clients: the same serializer run once per client versus once per frame,
+    # so the saving of serializing once is not mixed up with the speed of the serializer
+    clients = 20
+    rounds = 2000
+    print(f"\nbroadcast of a status snapshot to {clients} clients")
+    for name, function in candidates():
+        per_client = min(timeit.repeat(lambda: [function(STATUS) for _ in range(clients)], number=rounds, repeat=5))
+        
+        def once():
+            frame = Frame(STATUS, encoder=lambda encoding: function(STATUS))
+            return [frame.encode(ENCODING_JSON) for _ in range(clients)]
+        
+        shared = min(timeit.repeat(once, number=rounds, repeat=5))
+        print(f"  {name:<28}{per_client / rounds * 1e6:>9.2f} us per client  "
+              f"{shared / rounds * 1e6:>9.2f} us once per frame")
+
+if __name__ == '__main__':
+    main()
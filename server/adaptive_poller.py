@@ -0,0 +1,140 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Metrics probed over RCON
+METRICS = ('tps', 'mspt', 'players')
+# Default (min, max) seconds between two probes of each metric; a server can override them with
+# a "polling" section in its version.json, e.g. {"mspt": {"min": 2, "max": 60}}
+DEFAULT_INTERVALS: Dict[str, Tuple[float, float]] = {
+    'tps': (2.0, 60.0),
+    'mspt': (1.0, 30.0),
+    'players': (3.0, 120.0)
+}
+# The status loop ticks once per second, probing faster than that is not possible
+MIN_INTERVAL = 1.0
+# While a client views a server its metrics are probed at most this many times their min interval apart
+WATCHED_MAX_FACTOR = 3.0
+# Interval multipliers after a volatile and after a stable reading
+SPEEDUP = 0.5
+SLOWDOWN = 1.5
+# Relative change of TPS/MSPT that counts as volatile
+VOLATILE_CHANGE = 0.2
+# MSPT above one tick budget and TPS below this are volatile whatever they changed by
+LAGGING_MSPT = 50.0
+LAGGING_TPS = 19.5
+
+def _number(value: Any) -> Optional[float]:
+    """Convert a metric value to a float, None for placeholders like '--'"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def is_volatile(metric: str, previous: Any, value: Any) -> bool:
+    """Check whether a new reading differs enough from the previous one to poll faster"""
+    current = _number(value)
+    if current is None:
+        return False
+    if metric == 'mspt' and current >= LAGGING_MSPT:
+        return True
+    if metric == 'tps' and current < LAGGING_TPS:
+        return True
+    last = _number(previous)
+    if last is None:
+        return False
+    if metric == 'players':
+        return current != last
+    return abs(current - last) > VOLATILE_CHANGE * max(abs(last), 1.0)
+
+class MetricCadence:
+    """Probe interval of one metric of one server, shrinking on volatile readings and growing on stable ones"""
+    
+    def __init__(self, metric: str, min_interval: float, max_interval: float):
+        self.metric = metric
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.next_due = 0.0
+        self.last_value: Any = None
+    
+    def record(self, value: Any, now: float, watched: bool, idle: bool, ok: bool = True) -> None:
+        """Adjust the interval after a probe and schedule the next one"""
+        if ok:
+            if is_volatile(self.metric, self.last_value, value):
+                self.interval = max(self.min_interval, self.interval * SPEEDUP)
+            else:
+                self.interval = min(self.max_interval, self.interval * SLOWDOWN)
+            self.last_value = value
+        
+        # Nobody watching an empty server: nothing is going to change that anyone sees
+        if idle and not watched:
+            self.interval = self.max_interval
+        if watched:
+            self.interval = min(self.interval, self.min_interval * WATCHED_MAX_FACTOR)
+        self.next_due = now + self.interval
+
+class AdaptivePoller:
+    """Decide which metrics of which servers are due for an RCON probe"""
+    
+    def __init__(self):
+        # Dictionary mapping server names to {metric: MetricCadence}
+        self._cadences: Dict[str, Dict[str, MetricCadence]] = {}
+    
+    @staticmethod
+    def _intervals(metric: str, config: Optional[Dict[str, Any]]) -> Tuple[float, float]:
+        """Get the (min, max) interval of a metric, applying a server's overrides"""
+        min_interval, max_interval = DEFAULT_INTERVALS[metric]
+        override = (config or {}).get(metric)
+        if isinstance(override, dict):
+            min_interval = _number(override.get('min')) or min_interval
+            max_interval = _number(override.get('max')) or max_interval
+        min_interval = max(MIN_INTERVAL, min_interval)
+        return min_interval, max(min_interval, max_interval)
+    
+    def _cadence(self, server_name: str, metric: str, config: Optional[Dict[str, Any]]) -> MetricCadence:
+        """Get the cadence of a metric, following changes of the configured intervals"""
+        cadences = self._cadences.setdefault(server_name, {})
+        min_interval, max_interval = self._intervals(metric, config)
+        cadence = cadences.get(metric)
+        if cadence is None:
+            cadence = cadences[metric] = MetricCadence(metric, min_interval, max_interval)
+        elif (cadence.min_interval, cadence.max_interval) != (min_interval, max_interval):
+            cadence.min_interval, cadence.max_interval = min_interval, max_interval
+            cadence.interval = min(max(cadence.interval, min_interval), max_interval)
+        return cadence
+    
+    def due(self, server_name: str, config: Optional[Dict[str, Any]] = None, watched: bool = False,
+            now: Optional[float] = None) -> List[str]:
+        """Get the metrics of a server to probe now"""
+        now = time.monotonic() if now is None else now
+        due = []
+        for metric in METRICS:
+            cadence = self._cadence(server_name, metric, config)
+            # A client starting to watch should not wait out an interval grown while nobody looked
+            limit = cadence.min_interval * WATCHED_MAX_FACTOR
+            if watched and cadence.next_due - now > limit:
+                cadence.next_due = now
+            if cadence.next_due <= now:
+                due.append(metric)
+        return due
+    
+    def record(self, server_name: str, readings: Dict[str, Any], watched: bool, idle: bool, ok: bool = True,
+               now: Optional[float] = None) -> None:
+        """Record the readings of the probed metrics and schedule their next probe"""
+        now = time.monotonic() if now is None else now
+        cadences = self._cadences.get(server_name, {})
+        for metric, value in readings.items():
+            cadence = cadences.get(metric)
+            if cadence is not None:
+                cadence.record(value, now, watched, idle, ok)
+    
+    def intervals(self, server_name: str) -> Dict[str, float]:
+        """Get the current probe interval of each metric of a server"""
+        return {metric: cadence.interval for metric, cadence in self._cadences.get(server_name, {}).items()}
+    
+    def forget(self, server_name: str) -> None:
+        """Drop the cadences of a server that stopped"""
+        self._cadences.pop(server_name, None)
+
+# Global adaptive poller instance
+adaptive_poller = AdaptivePoller()
@@ -0,0 +1,205 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from .serializer import to_frame, msgpack_available, ENCODING_JSON, ENCODING_MSGPACK
+
+# Maximum number of frames waiting in one client's send queue
+CLIENT_QUEUE_SIZE = 256
+# Seconds a client may keep its send queue full before it is disconnected
+SLOW_CLIENT_TIMEOUT = 10.0
+
+# WebSocket subprotocols selecting the frame encoding at handshake time
+SUBPROTOCOL_MSGPACK = 'fallenmoon.msgpack'
+SUBPROTOCOL_JSON = 'fallenmoon.json'
+
+def select_subprotocol(connection, subprotocols):
+    """Prefer MessagePack when both sides support it, fall back to JSON (also for clients offering none)"""
+    if msgpack_available and SUBPROTOCOL_MSGPACK in subprotocols:
+        return SUBPROTOCOL_MSGPACK
+    if SUBPROTOCOL_JSON in subprotocols:
+        return SUBPROTOCOL_JSON
+    return None
+
+class ClientSession:
+    """Send queue and writer task of one connected WebSocket client"""
+    
+    def __init__(self, websocket, queue_size: int):
+        self.websocket = websocket
+        self.queue_size = queue_size
+        # Frames waiting to be sent as (message, droppable), oldest first
+        self.queue: Deque[Tuple[Any, bool]] = deque()
+        # Set while the queue holds frames
+        self.ready = asyncio.Event()
+        # Number of status and log frames dropped because the queue was full
+        self.dropped = 0
+        # Time the queue first overflowed, None while the client keeps up
+        self.full_since: Optional[float] = None
+        self.writer: Optional[asyncio.Task] = None
+        # Frame encoding negotiated through the WebSocket subprotocol
+        self.encoding = ENCODING_MSGPACK if getattr(websocket, 'subprotocol', None) == SUBPROTOCOL_MSGPACK else ENCODING_JSON
+
+class BroadcastHub:
+    """Registry of connected clients that fans out each frame, serialized once, to per-client send queues"""
+    
+    def __init__(self, queue_size: int = CLIENT_QUEUE_SIZE):
+        self._queue_size = queue_size
+        # Dictionary mapping websockets to their sessions
+        self._sessions: Dict[Any, ClientSession] = {}
+        # Dictionary mapping topics (e.g. 'status:<server>') to their subscribed websockets
+        self._topics: Dict[str, Set[Any]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def __contains__(self, websocket) -> bool:
+        return websocket in self._sessions
+    
+    def clients(self) -> List[Any]:
+        """Get all registered websockets"""
+        return list(self._sessions.keys())
+    
+    def register(self, websocket) -> ClientSession:
+        """Register a client and start its writer task"""
+        session = ClientSession(websocket, self._queue_size)
+        session.writer = asyncio.create_task(self._writer(session))
+        self._sessions[websocket] = session
+        return session
+    
+    def unregister(self, websocket) -> None:
+        """Unregister a client and stop its writer task"""
+        session = self._sessions.pop(websocket, None)
+        if session and session.writer:
+            session.writer.cancel()
+        self.unsubscribe_all(websocket)
+    
+    def subscribe(self, websocket, topic: str) -> bool:
+        """Subscribe a client to a topic; return False if it was already subscribed"""
+        subscribers = self._topics.setdefault(topic, set())
+        if websocket in subscribers:
+            return False
+        subscribers.add(websocket)
+        return True
+    
+    def unsubscribe(self, websocket, topic: str) -> bool:
+        """Unsubscribe a client from a topic; return False if it was not subscribed"""
+        subscribers = self._topics.get(topic)
+        if not subscribers or websocket not in subscribers:
+            return False
+        subscribers.discard(websocket)
+        # Clean up empty topics
+        if not subscribers:
+            del self._topics[topic]
+        return True
+    
+    def unsubscribe_all(self, websocket, prefix: str = '') -> List[str]:
+        """Unsubscribe a client from every topic starting with prefix and return those topics"""
+        removed = [topic for topic in self.topics(websocket) if topic.startswith(prefix)]
+        for topic in removed:
+            self.unsubscribe(websocket, topic)
+        return removed
+    
+    def topics(self, websocket) -> List[str]:
+        """Get the topics a client is subscribed to"""
+        return [topic for topic, subscribers in self._topics.items() if websocket in subscribers]
+    
+    def subscribers(self, topic: str) -> List[Any]:
+        """Get the websockets subscribed to a topic"""
+        return list(self._topics.get(topic, ()))
+    
+    def has_subscribers(self, topic: str) -> bool:
+        """Check whether anyone is subscribed to a topic, so producers can skip unwatched work"""
+        return bool(self._topics.get(topic))
+    
+    def encoding_of(self, websocket) -> str:
+        """Get the frame encoding negotiated by a client"""
+        session = self._sessions.get(websocket)
+        return session.encoding if session else ENCODING_JSON
+    
+    def send(self, websocket, data, droppable: bool = False) -> bool:
+        """Queue a frame (message dict or Frame) for a single client"""
+        session = self._sessions.get(websocket)
+        if session is None:
+            return False
+        return self._offer(session, to_frame(data).encode(session.encoding), droppable)
+    
+    def broadcast(self, data, clients: Optional[Iterable[Any]] = None, droppable: bool = True) -> int:
+        """Serialize a frame once per encoding and queue it for every (or the given) client; return the number queued"""
+        if clients is None:
+            sessions = list(self._sessions.values())
+        else:
+            sessions = [self._sessions[ws] for ws in clients if ws in self._sessions]
+        if not sessions:
+            return 0
+        
+        # The frame caches its encodings, so each one is built only once for all clients
+        frame = to_frame(data)
+        queued = 0
+        for session in sessions:
+            if self._offer(session, frame.encode(session.encoding), droppable):
+                queued += 1
+        return queued
+    
+    def publish(self, topic: str, data, droppable: bool = True) -> int:
+        """Queue a frame for the subscribers of a topic; nothing is serialized when there are none"""
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return 0
+        return self.broadcast(data, clients=list(subscribers), droppable=droppable)
+    
+    def _offer(self, session: ClientSession, message, droppable: bool) -> bool:
+        """Put a frame on a client queue, degrading slow clients instead of blocking others"""
+        if len(session.queue) < session.queue_size:
+            session.queue.append((message, droppable))
+            session.ready.set()
+            return True
+        
+        now = time.monotonic()
+        if session.full_since is None:
+            session.full_since = now
+        elif now - session.full_since > SLOW_CLIENT_TIMEOUT:
+            # The client has not kept up for too long, disconnect it
+            print(f"Client {session.websocket.remote_address} is too slow, disconnecting")
+            self.unregister(session.websocket)
+            asyncio.create_task(session.websocket.close(code=1013, reason="Client too slow"))
+            return False
+        
+        if droppable:
+            # Status and log frames can be skipped, the next one supersedes them
+            session.dropped += 1
+            return False
+        
+        # Control frames must be delivered: make room by dropping the oldest status or log frame, and
+        # when only control frames are queued let the queue grow until the slow client is disconnected
+        for index, (_, queued_droppable) in enumerate(session.queue):
+            if queued_droppable:
+                del session.queue[index]
+                session.dropped += 1
+                break
+        session.queue.append((message, False))
+        return True
+    
+    async def _writer(self, session: ClientSession) -> None:
+        """Send queued frames to one client"""
+        try:
+            while True:
+                await session.ready.wait()
+                message, _ = session.queue.popleft()
+                if not session.queue:
+                    session.ready.clear()
+                # JSON goes out as text frames, MessagePack as binary frames
+                await session.websocket.send(
+                    message, text=isinstance(message, str) or session.encoding == ENCODING_JSON)
+                if not session.queue:
+                    session.full_since = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Check if it's a normal close (1000, 1001) to avoid spamming logs
+            error_str = str(e)
+            if "1000" not in error_str and "1001" not in error_str:
+                print(f"Error sending message: {e}")
+
+# Create a global broadcast hub instance
+broadcast_hub = BroadcastHub()
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .rcon_client import RCONClient
+
+# Seconds a single command may take before it is reported as timed out
+DEFAULT_COMMAND_TIMEOUT = 10.0
+# Upper bound for client-supplied timeouts
+MAX_COMMAND_TIMEOUT = 120.0
+# Maximum number of queued requests per server
+COMMAND_QUEUE_SIZE = 32
+# Maximum number of commands in one batch
+MAX_BATCH_SIZE = 100
+# Seconds an idle pooled RCON session is kept open
+IDLE_SESSION_TIMEOUT = 60.0
+
+class CommandRequest:
+    """One queued request: a single command or a batch run over the same RCON session"""
+    
+    def __init__(self, commands: List[str], timeout: float,
+                 on_result: Callable[[int, str, str, bool], Awaitable[None]]):
+        self.commands = commands
+        self.timeout = timeout
+        # on_result(index, command, result, ok) is awaited as each command completes
+        self.on_result = on_result
+
+class CommandQueue:
+    """Run user commands of each server in submission order over a pooled RCON session"""
+    
+    def __init__(self, get_credentials: Callable[[str], Optional[Tuple[int, str]]]):
+        # get_credentials(server_name) returns (rcon_port, rcon_password), or None if unknown
+        self._get_credentials = get_credentials
+        # Dictionary mapping server names to their request queues
+        self._queues: Dict[str, asyncio.Queue] = {}
+        # Dictionary mapping server names to the worker draining their queue
+        self._workers: Dict[str, asyncio.Task] = {}
+        # Dictionary mapping server names to their pooled RCON sessions
+        self._sessions: Dict[str, RCONClient] = {}
+    
+    def submit(self, server_name: str, commands: List[str], on_result, timeout: Optional[float] = None) -> bool:
+        """Queue commands for a server; return False if its queue is full
+
+        Raises ValueError for a batch over MAX_BATCH_SIZE, which is rejected rather than cut short.
+        """
+        if len(commands) > MAX_BATCH_SIZE:
+            raise ValueError(f'A batch holds at most {MAX_BATCH_SIZE} commands, got {len(commands)}')
+        timeout = min(float(timeout or DEFAULT_COMMAND_TIMEOUT), MAX_COMMAND_TIMEOUT)
+        queue = self._queues.get(server_name)
+        if queue is None:
+            queue = self._queues[server_name] = asyncio.Queue(maxsize=COMMAND_QUEUE_SIZE)
+        worker = self._workers.get(server_name)
+        if worker is None or worker.done():
+            self._workers[server_name] = asyncio.create_task(self._worker(server_name, queue))
+        try:
+            queue.put_nowait(CommandRequest(commands, timeout, on_result))
+            return True
+        except asyncio.QueueFull:
+            return False
+    
+    def pending(self, server_name: str) -> int:
+        """Get the number of requests waiting for a server"""
+        queue = self._queues.get(server_name)
+        return queue.qsize() if queue else 0
+    
+    def close(self, server_name: str) -> None:
+        """Stop the worker of a server and close its pooled session"""
+        worker = self._workers.pop(server_name, None)
+        # A result callback may close its own server's queue, the worker then ends on its next idle timeout
+        if worker and not worker.done() and worker is not asyncio.current_task():
+            worker.cancel()
+        self._queues.pop(server_name, None)
+        self._close_session(server_name)
+    
+    def _close_session(self, server_name: str) -> None:
+        """Close the pooled RCON session of a server"""
+        session = self._sessions.pop(server_name, None)
+        if session:
+            session.close()
+    
+    async def _worker(self, server_name: str, queue: asyncio.Queue) -> None:
+        """Run queued requests of one server one after another"""
+        while True:
+            try:
+                request = await asyncio.wait_for(queue.get(), IDLE_SESSION_TIMEOUT)
+            except asyncio.TimeoutError:
+                # Nothing to do for a while, give the RCON connection back
+                self._close_session(server_name)
+                # The queue was closed while this worker was busy
+                if self._queues.get(server_name) is not queue:
+                    return
+                continue
+            
+            try:
+                for index, command in enumerate(request.commands):
+                    result, ok = await self._run(server_name, command, request.timeout)
+                    await request.on_result(index, command, result, ok)
+            except Exception as e:
+                print(f"Error running commands on server {server_name}: {e}")
+            finally:
+                queue.task_done()
+    
+    async def _run(self, server_name: str, command: str, timeout: float) -> Tuple[str, bool]:
+        """Run one command and return (result, ok)"""
+        session = self._sessions.get(server_name)
+        if session is None:
+            credentials = self._get_credentials(server_name)
+            if not credentials or not credentials[1]:
+                return 'RCON password not found', False
+            session = RCONClient(host='localhost', port=credentials[0], password=credentials[1])
+            self._sessions[server_name] = session
+        
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(None, self._execute, session, command, timeout), timeout)
+        except asyncio.TimeoutError:
+            # The session is in an unknown state now, reconnect for the next command
+            self._close_session(server_name)
+            return f'Command timed out after {timeout:.0f} seconds', False
+        except ConnectionError as e:
+            self._close_session(server_name)
+            return str(e), False
+        
+        if result is None:
+            self._close_session(server_name)
+            return 'Failed to execute command', False
+        print(f"Command '{command}' on server {server_name} took {(time.monotonic() - started) * 1000:.0f}ms")
+        return result, True
+    
+    @staticmethod
+    def _execute(session: RCONClient, command: str, timeout: float) -> Optional[str]:
+        """Send a command over a session, connecting first if needed (blocking, run in an executor)"""
+        if session.socket is None:
+            if not (session.connect() and session.authenticate()):
+                session.close()
+                raise ConnectionError('Failed to connect to RCON server')
+        # Slightly longer than the asyncio timeout, so a slow command is reported as timed out
+        session.socket.settimeout(timeout + 1)
+        return session.send_command(command)
@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+# File under <server>/Fallenmoon/ holding the signatures of past crashes
+INDEX_FILE = 'crash_index.json'
+# Bytes read from the end of latest.log, the crash is always at the end
+LOG_TAIL_BYTES = 256 * 1024
+# Bytes read from the start of a crash report, the exception comes before the system details
+REPORT_HEAD_BYTES = 256 * 1024
+# Frames of each exception that make up its signature
+SIGNATURE_FRAMES = 8
+# Frames of each exception kept in the analysis shown to users
+DISPLAY_FRAMES = 12
+# Crash reports remembered per signature
+MAX_REPORTS_PER_SIGNATURE = 20
+
+# "java.lang.NullPointerException: message" or "Caused by: ...", also the Exception in thread "x" prefix
+EXCEPTION_LINE = re.compile(
+    r'^(?:Exception in thread "[^"]*" )?(?P<caused>Caused by: )?'
+    r'(?P<class>(?:[a-zA-Z_$][\w$]*\.)+[\w$]*(?:Exception|Error|Throwable)[\w$]*)(?::\s?(?P<message>.*))?$'
+)
+FRAME_LINE = re.compile(r'^\s+at (?P<frame>\S.*)$')
+# Module prefix of a frame on Forge/NeoForge 1.17+: TRANSFORMER/create@0.5.1/com.simibubi...
+FRAME_MODULE = re.compile(r'^(?:[A-Z_-]+/)?(?P<mod>[a-z][\w.-]*)@(?P<version>[^/]+)/')
+# Mixin handlers injected into a frame name: handler$zza000$modid$method or md1a2b3c$mixin$
+FRAME_MIXIN = re.compile(r'\$(?:[a-z]{3}\d{3}|md[0-9a-f]+)\$(?P<mod>[a-z][\w]*)\$')
+# Suspected mods of Forge crash reports: "Create (create), Version: 0.5.1"
+SUSPECTED_MOD = re.compile(r'^\s+.+\((?P<mod>[a-z][\w.-]*)\), Version:')
+# Ids of the game and platforms, never the culprit by themselves
+PLATFORM_IDS = {
+    'minecraft', 'forge', 'neoforge', 'fml', 'fmlcore', 'fmlloader', 'javafmllanguage', 'lowcodelanguage',
+    'mclanguage', 'java.base', 'mixin', 'modlauncher', 'securejarhandler', 'eventbus'
+}
+
+def _read_head(path: str, size: int) -> str:
+    """Read the start of a file"""
+    with open(path, 'rb') as f:
+        return f.read(size).decode('utf-8', errors='ignore')
+
+def _read_tail(path: str, size: int) -> str:
+    """Read the end of a file without reading the rest of it, dropping the first partial line"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        f.seek(max(0, end - size))
+        data = f.read()
+    text = data.decode('utf-8', errors='ignore')
+    if end > size:
+        text = text.split('\n', 1)[-1]
+    return text
+
+def newest_crash_report(server_path: str) -> Optional[str]:
+    """Get the path of the newest file in crash-reports/"""
+    newest = None
+    newest_mtime = 0.0
+    try:
+        with os.scandir(os.path.join(server_path, 'crash-reports')) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith('.txt'):
+                    mtime = entry.stat().st_mtime
+                    if mtime > newest_mtime:
+                        newest, newest_mtime = entry.path, mtime
+    except FileNotFoundError:
+        return None
+    return newest
+
+def parse_exception_chains(text: str) -> List[List[Dict[str, Any]]]:
+    """Find every exception chain (exception plus its "Caused by" causes) in a text"""
+    chains = []
+    current = None
+    for line in text.splitlines():
+        line = line.rstrip()
+        frame = FRAME_LINE.match(line)
+        if frame and current is not None:
+            current['frames'].append(frame.group('frame'))
+            continue
+        # "... 12 more" and suppressed exceptions belong to the current chain
+        if current is not None and re.match(r'^\s+(?:\.\.\. \d+ more|Suppressed: )', line):
+            continue
+        
+        exception = EXCEPTION_LINE.match(line.strip())
+        if exception:
+            current = {
+                'class': exception.group('class'),
+                'message': (exception.group('message') or '').strip(),
+                'frames': []
+            }
+            if exception.group('caused') and chains:
+                chains[-1].append(current)
+            else:
+                chains.append([current])
+        else:
+            current = None
+    
+    # Lines that merely look like exception names are not traces
+    return [chain for chain in chains if any(exception['frames'] for exception in chain)]
+
+def normalize_frame(frame: str) -> str:
+    """Strip the parts of a frame that change between builds and runs
+
+    Frames that only differ in their jar location, jar number and transformer list normalize the same:
+
+    >>> normalize_frame('net.minecraft.world.level.Level.tick(Level.java:512) ~[server-1.20.1-srg.jar%23217!/:?] '
+    ...                 '{re:mixin,pl:accesstransformer:B}') == normalize_frame(
+    ...     'net.minecraft.world.level.Level.tick(Level.java:498) ~[server-1.20.1-srg.jar%23190!/:?] {re:classloading}')
+    True
+    """
+    # Module versions, jar locations with their %23NNN jar numbers, transformer lists and source line numbers
+    frame = FRAME_MODULE.sub(lambda match: f"{match.group('mod')}/", frame)
+    frame = re.sub(r'\s+\{[^{}]*\}', '', frame)
+    frame = re.sub(r'\s+~?\[[^\]]*\]', '', frame)
+    frame = re.sub(r'\(.*?\)', '', frame)
+    # Synthetic lambda and proxy class numbering
+    frame = re.sub(r'\$\$Lambda\$?[\d/x.a-f]*', '$$Lambda', frame)
+    frame = re.sub(r'lambda\$(\w+?)\$\d+', r'lambda$\1', frame)
+    frame = re.sub(r'\$\d+\b', '$N', frame)
+    # Mixin handler prefixes carry a random-looking id
+    frame = re.sub(r'\$(?:[a-z]{3}\d{3}|md[0-9a-f]+)\$', '$mixin$', frame)
+    return frame.strip()
+
+def signature_of(chain: List[Dict[str, Any]]) -> str:
+    """Hash the normalized exception classes and top frames of a chain"""
+    parts = []
+    for exception in chain:
+        parts.append(exception['class'])
+        parts.extend(normalize_frame(frame) for frame in exception['frames'][:SIGNATURE_FRAMES])
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+def mods_in_chain(chain: List[Dict[str, Any]]) -> List[str]:
+    """Get the mod ids found in the frames of a chain, most involved first"""
+    counts: Dict[str, int] = {}
+    for exception in chain:
+        for frame in exception['frames']:
+            for match in (FRAME_MODULE.match(frame.strip()), FRAME_MIXIN.search(frame)):
+                if match and match.group('mod') not in PLATFORM_IDS:
+                    counts[match.group('mod')] = counts.get(match.group('mod'), 0) + 1
+    return sorted(counts, key=lambda mod_id: -counts[mod_id])
+
+class CrashAnalyzer:
+    """Extract the exception chain and mod ids of a crash and match it against past crashes"""
+    
+    def __init__(self, servers_dir: str = 'cached_minecraft_servers'):
+        self._servers_dir = servers_dir
+    
+    def _index_path(self, server_name: str) -> str:
+        """Get the path of the crash index of a server"""
+        return os.path.join(self._servers_dir, server_name, 'Fallenmoon', INDEX_FILE)
+    
+    def load_index(self, server_name: str) -> Dict[str, Dict[str, Any]]:
+        """Read the crash index of a server"""
+        try:
+            with open(self._index_path(server_name), 'r', encoding='utf-8') as f:
+                return json.load(f).get('signatures', {})
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_index(self, server_name: str, signatures: Dict[str, Dict[str, Any]]) -> None:
+        """Write the crash index of a server atomically"""
+        path = self._index_path(server_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'signatures': signatures}, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, path)
+    
+    def analyze(self, server_name: str, record: bool = False, since: Optional[float] = None) -> Dict[str, Any]:
+        """Analyze the latest crash of a server (blocking); record=True counts it in the crash index"""
+        started = time.perf_counter()
+        server_path = os.path.join(self._servers_dir, server_name)
+        analysis = {
+            'server_name': server_name,
+            'report': None,
+            'description': None,
+            'exceptions': [],
+            'mods': [],
+            'signature': None,
+            'source': None
+        }
+        
+        # A crash report written since the server started describes this crash best
+        chain = None
+        report = newest_crash_report(server_path)
+        if report and (since is None or os.path.getmtime(report) >= since):
+            text = _read_head(report, REPORT_HEAD_BYTES)
+            # Only the part before the system details holds the crash itself
+            head = text.split('A detailed walkthrough of the error', 1)[0]
+            chains = parse_exception_chains(head)
+            if chains:
+                chain = chains[0]
+                analysis['report'] = os.path.basename(report)
+                analysis['source'] = 'crash-report'
+            description = re.search(r'^Description: (.*)$', text, re.MULTILINE)
+            if description:
+                analysis['description'] = description.group(1).strip()
+            suspected = [match.group('mod') for match in map(SUSPECTED_MOD.match, text.splitlines()) if match]
+            analysis['mods'].extend(mod_id for mod_id in suspected if mod_id not in PLATFORM_IDS)
+        
+        # Otherwise the last exception logged before the process died
+        latest_log = os.path.join(server_path, 'logs', 'latest.log')
+        if chain is None and os.path.exists(latest_log):
+            chains = parse_exception_chains(_read_tail(latest_log, LOG_TAIL_BYTES))
+            if chains:
+                chain = chains[-1]
+                analysis['source'] = 'latest.log'
+        
+        if chain is not None:
+            analysis['exceptions'] = [
+                {'class': exception['class'], 'message': exception['message'],
+                 'frames': exception['frames'][:DISPLAY_FRAMES]}
+                for exception in chain
+            ]
+            for mod_id in mods_in_chain(chain):
+                if mod_id not in analysis['mods']:
+                    analysis['mods'].append(mod_id)
+            analysis['signature'] = signature_of(chain)
+        
+        signatures = self.load_index(server_name)
+        entry = signatures.get(analysis['signature']) if analysis['signature'] else None
+        if record and analysis['signature']:
+            now = time.time()
+            # The same crash report is never counted twice
+            if entry is None or analysis['report'] is None or analysis['report'] not in entry.get('reports', []):
+                if entry is None:
+                    entry = signatures[analysis['signature']] = {
+                        'count': 0,
+                        'first_seen': now,
+                        'exception': chain[-1]['class'],
+                        'message': chain[-1]['message'],
+                        'mods': analysis['mods'],
+                        'reports': []
+                    }
+                entry['count'] += 1
+                entry['last_seen'] = now
+                entry['mods'] = analysis['mods']
+                if analysis['report']:
+                    entry['reports'] = (entry['reports'] + [analysis['report']])[-MAX_REPORTS_PER_SIGNATURE:]
+                try:
+                    self._save_index(server_name, signatures)
+                except OSError as e:
+                    print(f"Error saving crash index of server {server_name}: {e}")
+        
+        # Seen before means more than this crash in the index
+        analysis['occurrences'] = entry['count'] if entry else 0
+        analysis['first_seen'] = entry['first_seen'] if entry else None
+        analysis['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return analysis
+    
+    def history(self, server_name: str) -> List[Dict[str, Any]]:
+        """Get the past crash signatures of a server, most recent first"""
+        return sorted(
+            ({'signature': signature, **entry} for signature, entry in self.load_index(server_name).items()),
+            key=lambda entry: entry.get('last_seen', 0),
+            reverse=True
+        )
+
+# Global crash analyzer instance
+crash_analyzer = CrashAnalyzer()
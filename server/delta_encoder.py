@@ -0,0 +1,52 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+class DeltaEncoder:
+    """Track the last snapshot of each topic so subscribers get one full snapshot and then only changed fields"""
+    
+    def __init__(self):
+        # Dictionary mapping topics to the last snapshot sent
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        # Dictionary mapping topics to the sequence number of the last frame sent
+        self._seq: Dict[str, int] = {}
+        # Dictionary mapping topics to the websockets holding the last snapshot
+        self._synced: Dict[str, Set[Any]] = {}
+    
+    @staticmethod
+    def diff(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the fields of new that are missing from or differ in old"""
+        if old is None:
+            return dict(new)
+        return {key: value for key, value in new.items() if key not in old or old[key] != value}
+    
+    def encode(self, topic: str, snapshot: Dict[str, Any],
+               subscribers: Iterable[Any]) -> Tuple[int, List[Any], Dict[str, Any], List[Any]]:
+        """Record a snapshot and return (seq, clients needing the full snapshot, changed fields, clients getting the delta)"""
+        subscribers = list(subscribers)
+        changes = self.diff(self._snapshots.get(topic), snapshot)
+        # Clients that left the topic lose their baseline
+        synced = self._synced.setdefault(topic, set())
+        synced.intersection_update(subscribers)
+        
+        full_clients = [websocket for websocket in subscribers if websocket not in synced]
+        delta_clients = [websocket for websocket in subscribers if websocket in synced] if changes else []
+        
+        # The sequence number only moves when the snapshot changes, so clients can spot a lost delta
+        if changes:
+            self._seq[topic] = self._seq.get(topic, 0) + 1
+        self._snapshots[topic] = dict(snapshot)
+        synced.update(full_clients)
+        return self._seq.get(topic, 0), full_clients, changes, delta_clients
+    
+    def resync(self, websocket, topic: Optional[str] = None) -> None:
+        """Make a client receive a full snapshot of a topic (or of every topic) on the next frame"""
+        topics = [topic] if topic is not None else list(self._synced.keys())
+        for name in topics:
+            synced = self._synced.get(name)
+            if synced:
+                synced.discard(websocket)
+    
+    def forget(self, topic: str) -> None:
+        """Drop the state of a topic whose producer has gone away"""
+        self._snapshots.pop(topic, None)
+        self._seq.pop(topic, None)
+        self._synced.pop(topic, None)
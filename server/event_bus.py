@@ -1,31 +1,104 @@
 import asyncio
-from typing import Any, Callable, Dict, Set
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# Upper bounds (in milliseconds) of the handler latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 30000, float('inf'))
+
+class HandlerStats:
+    """Call count, error count and latency histogram of one event handler"""
+    
+    def __init__(self, event: str, handler_name: str):
+        self.event = event
+        self.handler_name = handler_name
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+    
+    def record(self, elapsed_ms: float, failed: bool = False) -> None:
+        """Record one handler call"""
+        self.calls += 1
+        if failed:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                break
+    
+    def percentile(self, fraction: float) -> float:
+        """Estimate a latency percentile from the histogram (upper bucket bound)"""
+        if not self.calls:
+            return 0.0
+        threshold = self.calls * fraction
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            cumulative += count
+            if cumulative >= threshold:
+                return self.max_ms if bound == float('inf') else min(bound, self.max_ms)
+        return self.max_ms
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the stats to a JSON-serializable dict"""
+        return {
+            'event': self.event,
+            'handler': self.handler_name,
+            'calls': self.calls,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'p95_ms': round(self.percentile(0.95), 3),
+            'max_ms': round(self.max_ms, 3),
+            'last_ms': round(self.last_ms, 3),
+            'histogram': {
+                ('inf' if bound == float('inf') else str(bound)): count
+                for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)
+            }
+        }
 
 class EventBus:
     """Lightweight async event bus for internal server communication"""
     
     def __init__(self):
-        # Dictionary mapping event names to sets of async handlers
-        self._handlers: Dict[str, Set[Callable]] = {}
-        # Dictionary mapping event names to sets of sync handlers
-        self._sync_handlers: Dict[str, Set[Callable]] = {}
+        # Dictionary mapping event names to ordered lists of async handlers
+        self._handlers: Dict[str, List[Callable]] = {}
+        # Dictionary mapping event names to ordered lists of sync handlers
+        self._sync_handlers: Dict[str, List[Callable]] = {}
+        # Dictionary mapping (event, handler) to handler call statistics
+        self._stats: Dict[Tuple[str, Callable], HandlerStats] = {}
+        # Tasks started by publish_nowait, kept so they are not garbage collected
+        self._pending_tasks: Set[asyncio.Task] = set()
+        # Dictionary mapping event names to (workers, maxsize) of their work queue
+        self._queue_config: Dict[str, Tuple[int, int]] = {}
+        # Dictionary mapping event names to bounded work queues
+        self._queues: Dict[str, asyncio.Queue] = {}
+        # Dictionary mapping event names to the worker tasks draining their queue
+        self._workers: Dict[str, List[asyncio.Task]] = {}
     
     def subscribe(self, event: str, handler: Callable) -> None:
         """Subscribe to an event with an async handler"""
-        if event not in self._handlers:
-            self._handlers[event] = set()
-        self._handlers[event].add(handler)
+        handlers = self._handlers.setdefault(event, [])
+        # Handlers are dispatched in subscription order
+        if handler not in handlers:
+            handlers.append(handler)
     
     def subscribe_sync(self, event: str, handler: Callable) -> None:
         """Subscribe to an event with a sync handler"""
-        if event not in self._sync_handlers:
-            self._sync_handlers[event] = set()
-        self._sync_handlers[event].add(handler)
+        handlers = self._sync_handlers.setdefault(event, [])
+        # Handlers are dispatched in subscription order
+        if handler not in handlers:
+            handlers.append(handler)
     
     def unsubscribe(self, event: str, handler: Callable) -> None:
         """Unsubscribe an async handler from an event"""
         if event in self._handlers:
-            self._handlers[event].discard(handler)
+            if handler in self._handlers[event]:
+                self._handlers[event].remove(handler)
             # Clean up empty event handlers
             if not self._handlers[event]:
                 del self._handlers[event]
@@ -33,49 +106,168 @@ class EventBus:
     def unsubscribe_sync(self, event: str, handler: Callable) -> None:
         """Unsubscribe a sync handler from an event"""
         if event in self._sync_handlers:
-            self._sync_handlers[event].discard(handler)
+            if handler in self._sync_handlers[event]:
+                self._sync_handlers[event].remove(handler)
             # Clean up empty event handlers
             if not self._sync_handlers[event]:
                 del self._sync_handlers[event]
     
+    def _get_stats(self, event: str, handler: Callable) -> HandlerStats:
+        """Get or create the statistics entry of a handler"""
+        key = (event, handler)
+        stats = self._stats.get(key)
+        if stats is None:
+            handler_name = getattr(handler, '__qualname__', None) or repr(handler)
+            stats = self._stats[key] = HandlerStats(event, handler_name)
+        return stats
+    
+    async def _call_async(self, event: str, handler: Callable, kwargs: dict) -> None:
+        """Run an async handler and record its latency"""
+        started = time.perf_counter()
+        failed = False
+        try:
+            await handler(**kwargs)
+        except Exception as e:
+            failed = True
+            print(f"Error in async handler {getattr(handler, '__qualname__', handler)} for event {event}: {e}")
+            traceback.print_exc()
+        finally:
+            self._get_stats(event, handler).record((time.perf_counter() - started) * 1000, failed)
+    
+    def _call_sync(self, event: str, handler: Callable, kwargs: dict) -> None:
+        """Run a sync handler and record its latency"""
+        started = time.perf_counter()
+        failed = False
+        try:
+            handler(**kwargs)
+        except Exception as e:
+            failed = True
+            print(f"Error in sync handler {getattr(handler, '__qualname__', handler)} for event {event}: {e}")
+            traceback.print_exc()
+        finally:
+            self._get_stats(event, handler).record((time.perf_counter() - started) * 1000, failed)
+    
     async def publish(self, event: str, **kwargs) -> None:
         """Publish an event to all subscribed handlers"""
         # Handle async handlers
         if event in self._handlers:
-            # Create tasks for all async handlers
-            tasks = []
-            for handler in self._handlers[event]:
-                try:
-                    tasks.append(handler(**kwargs))
-                except Exception as e:
-                    print(f"Error in async handler for event {event}: {e}")
-            
-            # Run all tasks concurrently
+            # Run all handlers concurrently, started in subscription order
+            tasks = [self._call_async(event, handler, kwargs) for handler in list(self._handlers[event])]
             if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+                await asyncio.gather(*tasks)
         
         # Handle sync handlers
         if event in self._sync_handlers:
-            for handler in self._sync_handlers[event]:
-                try:
-                    handler(**kwargs)
-                except Exception as e:
-                    print(f"Error in sync handler for event {event}: {e}")
+            for handler in list(self._sync_handlers[event]):
+                self._call_sync(event, handler, kwargs)
     
     def publish_sync(self, event: str, **kwargs) -> None:
         """Publish an event synchronously to all handlers"""
         # Handle sync handlers first
         if event in self._sync_handlers:
-            for handler in self._sync_handlers[event]:
-                try:
-                    handler(**kwargs)
-                except Exception as e:
-                    print(f"Error in sync handler for event {event}: {e}")
+            for handler in list(self._sync_handlers[event]):
+                self._call_sync(event, handler, kwargs)
+    
+    def publish_nowait(self, event: str, **kwargs) -> asyncio.Task:
+        """Schedule an event to be published in the background and return the tracked task"""
+        task = asyncio.create_task(self.publish(event, **kwargs))
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+        return task
+    
+    def configure_queue(self, event: str, workers: int = 1, maxsize: int = 16) -> None:
+        """Route an event through a bounded work queue drained by a fixed number of workers"""
+        self._queue_config[event] = (max(1, workers), max(1, maxsize))
+    
+    def has_queue(self, event: str) -> bool:
+        """Check whether an event has a work queue configured"""
+        return event in self._queue_config
+    
+    def _ensure_queue(self, event: str) -> asyncio.Queue:
+        """Create the work queue and its workers on first use (needs a running loop)"""
+        queue = self._queues.get(event)
+        if queue is None:
+            workers, maxsize = self._queue_config[event]
+            queue = self._queues[event] = asyncio.Queue(maxsize=maxsize)
+            self._workers[event] = [
+                asyncio.create_task(self._queue_worker(event, queue)) for _ in range(workers)
+            ]
+        return queue
+    
+    async def _queue_worker(self, event: str, queue: asyncio.Queue) -> None:
+        """Publish queued events one at a time"""
+        while True:
+            kwargs = await queue.get()
+            try:
+                await self.publish(event, **kwargs)
+            except Exception as e:
+                print(f"Error in queue worker for event {event}: {e}")
+            finally:
+                queue.task_done()
+    
+    async def enqueue(self, event: str, timeout: Optional[float] = None, **kwargs) -> bool:
+        """Put an event on its work queue, waiting up to timeout seconds while it is full"""
+        queue = self._ensure_queue(event)
+        try:
+            await asyncio.wait_for(queue.put(kwargs), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def enqueue_nowait(self, event: str, **kwargs) -> bool:
+        """Put an event on its work queue; return False if the queue is full"""
+        queue = self._ensure_queue(event)
+        try:
+            queue.put_nowait(kwargs)
+            return True
+        except asyncio.QueueFull:
+            return False
+    
+    def get_queue_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get the size, capacity and worker count of every work queue"""
+        stats = {}
+        for event, (workers, maxsize) in self._queue_config.items():
+            queue = self._queues.get(event)
+            stats[event] = {
+                'queued': queue.qsize() if queue else 0,
+                'maxsize': maxsize,
+                'workers': workers
+            }
+        return stats
+    
+    def pending_task_count(self) -> int:
+        """Get the number of background publishes still running"""
+        return len(self._pending_tasks)
+    
+    def get_handler_stats(self) -> List[Dict[str, Any]]:
+        """Get call statistics of every handler that has been called"""
+        return [stats.to_dict() for stats in self._stats.values()]
+    
+    def slowest_handlers(self, limit: int = 10, sort_by: str = 'p95_ms') -> List[Dict[str, Any]]:
+        """Get the slowest handlers sorted by p95_ms, avg_ms, max_ms or last_ms"""
+        if sort_by not in ('p95_ms', 'avg_ms', 'max_ms', 'last_ms'):
+            sort_by = 'p95_ms'
+        stats = self.get_handler_stats()
+        stats.sort(key=lambda item: item[sort_by], reverse=True)
+        return stats[:limit]
+    
+    def reset_stats(self) -> None:
+        """Clear all handler statistics"""
+        self._stats.clear()
     
     def clear(self) -> None:
-        """Clear all event handlers"""
+        """Clear all event handlers, work queues and background tasks"""
         self._handlers.clear()
         self._sync_handlers.clear()
+        self._stats.clear()
+        for workers in self._workers.values():
+            for worker in workers:
+                worker.cancel()
+        for task in list(self._pending_tasks):
+            task.cancel()
+        self._workers.clear()
+        self._queues.clear()
+        self._queue_config.clear()
 
 # Create a global event bus instance
 event_bus = EventBus()
@@ -3,6 +3,8 @@
 # WebSocket events
 CLIENT_CONNECTED = "client.connected"
 CLIENT_DISCONNECTED = "client.disconnected"
+CLIENT_SUBSCRIBE = "client.subscribe"
+CLIENT_UNSUBSCRIBE = "client.unsubscribe"
 
 # Server events
 SERVER_STARTED = "server.started"
@@ -10,6 +12,13 @@ SERVER_STOPPED = "server.stopped"
 SERVER_CRASHED = "server.crashed"
 SERVER_CONNECTED = "server.connected"
 SERVER_STARTUP_COMPLETED = "server.startup.completed"
+SERVER_STOP_PROGRESS = "server.stop.progress"
+
+# Bulk lifecycle events
+BULK_START = "bulk.start"
+BULK_STOP = "bulk.stop"
+BULK_RESTART = "bulk.restart"
+BULK_PROGRESS = "bulk.progress"
 
 # Command events
 COMMAND_EXECUTED = "command.executed"
@@ -17,6 +26,33 @@ COMMAND_EXECUTED = "command.executed"
 # Status events
 STATUS_UPDATED = "status.updated"
 LOG_LINE_RECEIVED = "log.line.received"
+STATUS_RESYNC = "status.resync"
+
+# Scheduler events
+SCHEDULE_GET = "schedule.get"
+SCHEDULE_SAVE = "schedule.save"
+SCHEDULE_RUN = "schedule.run"
+
+# Crash analysis events
+CRASH_ANALYZE = "crash.analyze"
+
+# Log search events
+LOG_SEARCH = "log.search"
+LOG_ARCHIVE_SCAN = "log.archive_scan"
+LOG_FILTER_SET = "log.filter_set"
+
+# Lag incident events
+INCIDENT_LIST = "incident.list"
+INCIDENT_GET = "incident.get"
+
+# Player events
+PLAYER_STATS = "player.stats"
+
+# World events
+WORLD_STATS = "world.stats"
 
 # Refresh events
 REFRESH_SERVERS = "refresh.servers"
+
+# Introspection events
+BUS_STATS = "bus.stats"
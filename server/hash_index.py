@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from .jar_index import JAR_DIRS
+from . import worker_pool
+from .worker_pool import hash_file
+
+# File under <server>/Fallenmoon/ caching the content hash of every jar
+INDEX_FILE = 'hash_index.json'
+# Below this many changed jars hashing in-process beats handing them to worker processes
+POOL_THRESHOLD = 8
+
+class HashIndex:
+    """Content hashes of the jars in mods/ and plugins/ of every server, cached by (path, size, mtime)"""
+    
+    def __init__(self, servers_dir: str = 'cached_minecraft_servers'):
+        self._servers_dir = servers_dir
+        # Dictionary mapping server names to {relative jar path: {'size', 'mtime', 'sha256'}}
+        self._indexes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # In-flight fleet-wide refresh, shared by concurrent callers
+        self._task: Optional[asyncio.Future] = None
+    
+    def _index_path(self, server_name: str) -> str:
+        """Get the path of the index file of a server"""
+        return os.path.join(self._servers_dir, server_name, 'Fallenmoon', INDEX_FILE)
+    
+    def _load(self, server_name: str) -> Dict[str, Dict[str, Any]]:
+        """Read the index file of a server"""
+        try:
+            with open(self._index_path(server_name), 'r', encoding='utf-8') as f:
+                return json.load(f).get('jars', {})
+        except (OSError, ValueError):
+            return {}
+    
+    def _save(self, server_name: str, jars: Dict[str, Dict[str, Any]]) -> None:
+        """Write the index file of a server atomically"""
+        path = self._index_path(server_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'jars': jars}, f)
+        os.replace(temp_path, path)
+    
+    def _scan(self, server_name: str) -> Tuple[Dict[str, Dict[str, Any]], List[Tuple[str, str, os.stat_result]]]:
+        """Split the jars of a server into unchanged cached entries and (relative path, path, stat) to hash"""
+        cached = self._indexes.get(server_name)
+        if cached is None:
+            cached = self._load(server_name)
+        
+        jars = {}
+        changed = []
+        for directory in JAR_DIRS:
+            try:
+                with os.scandir(os.path.join(self._servers_dir, server_name, directory)) as entries:
+                    for entry in entries:
+                        if not entry.name.endswith('.jar') or not entry.is_file():
+                            continue
+                        file_stats = entry.stat()
+                        relative_path = f'{directory}/{entry.name}'
+                        entry_data = cached.get(relative_path)
+                        if (entry_data and entry_data.get('sha256') and entry_data.get('size') == file_stats.st_size
+                                and entry_data.get('mtime') == file_stats.st_mtime):
+                            jars[relative_path] = entry_data
+                        else:
+                            changed.append((relative_path, entry.path, file_stats))
+            except FileNotFoundError:
+                continue
+        return jars, changed
+    
+    def build(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Bring the index of every server up to date, hashing only new or changed jars (blocking)"""
+        if not os.path.isdir(self._servers_dir):
+            return {}
+        
+        scans = {}
+        for entry in os.scandir(self._servers_dir):
+            if entry.is_dir():
+                scans[entry.name] = self._scan(entry.name)
+        
+        # Hash the changed jars of the whole fleet in one go
+        to_hash = [path for _, changed in scans.values() for _, path, _ in changed]
+        digests = None
+        if len(to_hash) >= POOL_THRESHOLD:
+            # hashlib releases the GIL on large buffers, but reading and hashing hundreds of jars
+            # still goes faster spread over processes, and keeps the dashboard process responsive
+            chunksize = max(1, len(to_hash) // (worker_pool.POOL_WORKERS[worker_pool.HASH_POOL] * 4))
+            try:
+                digests = list(worker_pool.get_pool(worker_pool.HASH_POOL).map(hash_file, to_hash, chunksize=chunksize))
+            except (BrokenProcessPool, CancelledError):
+                # The workers were stopped meanwhile, on exit
+                print("Worker processes stopped while hashing jars, hashing in-process")
+        if digests is None:
+            digests = [hash_file(path) for path in to_hash]
+        digests = dict(zip(to_hash, digests))
+        if to_hash:
+            print(f"Hashed {len(to_hash)} changed jar(s) across {len(scans)} server(s)")
+        
+        indexes = {}
+        for server_name, (jars, changed) in scans.items():
+            for relative_path, path, file_stats in changed:
+                if digests.get(path):
+                    jars[relative_path] = {'size': file_stats.st_size, 'mtime': file_stats.st_mtime,
+                                           'sha256': digests[path]}
+            previous = self._indexes.get(server_name)
+            if changed or previous is None or len(jars) != len(previous):
+                try:
+                    self._save(server_name, jars)
+                except OSError as e:
+                    print(f"Error saving hash index of server {server_name}: {e}")
+            indexes[server_name] = jars
+        
+        self._indexes = indexes
+        return indexes
+    
+    async def refresh(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Update the index of every server in the executor; concurrent calls share one run"""
+        if self._task is None or self._task.done():
+            loop = asyncio.get_running_loop()
+            self._task = asyncio.ensure_future(loop.run_in_executor(None, self.build))
+        return await asyncio.shield(self._task)
+    
+    def duplicates(self, server_name: str) -> List[Dict[str, Any]]:
+        """Get groups of identical jars inside a server"""
+        by_hash: Dict[str, List[str]] = {}
+        for relative_path, entry in self._indexes.get(server_name, {}).items():
+            by_hash.setdefault(entry['sha256'], []).append(relative_path)
+        return [
+            {'sha256': sha256, 'files': sorted(files)}
+            for sha256, files in by_hash.items() if len(files) > 1
+        ]
+    
+    def shared(self, server_name: str) -> List[Dict[str, Any]]:
+        """Get the jars of a server that other servers hold an identical copy of"""
+        jars = self._indexes.get(server_name, {})
+        hashes = {entry['sha256'] for entry in jars.values()}
+        elsewhere: Dict[str, List[Dict[str, str]]] = {}
+        for other_name, other_jars in self._indexes.items():
+            if other_name == server_name:
+                continue
+            for relative_path, entry in other_jars.items():
+                if entry['sha256'] in hashes:
+                    elsewhere.setdefault(entry['sha256'], []).append({'server_name': other_name, 'file': relative_path})
+        return [
+            {'file': relative_path, 'sha256': entry['sha256'], 'servers': elsewhere[entry['sha256']]}
+            for relative_path, entry in sorted(jars.items()) if entry['sha256'] in elsewhere
+        ]
+
+# Global hash index instance
+hash_index = HashIndex()
@@ -0,0 +1,311 @@
+import asyncio
+import json
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# Try to import tomllib (Python 3.11+) for mods.toml
+try:
+    import tomllib
+    tomllib_available = True
+except ImportError:
+    tomllib_available = False
+
+# Try to import PyYAML for plugin.yml
+try:
+    import yaml
+    yaml_available = True
+except ImportError:
+    yaml_available = False
+
+# File under <server>/Fallenmoon/ caching the metadata of every jar
+INDEX_FILE = 'jar_index.json'
+# Bumped when the cached entry format changes, which makes every jar be read again
+INDEX_VERSION = 1
+# Component directories holding jars
+JAR_DIRS = ('mods', 'plugins')
+# Threads reading jars of one server at the same time
+INDEX_WORKERS = 8
+
+# Metadata files in the order they are looked up, with the loader they belong to
+FORGE_METADATA = (('META-INF/neoforge.mods.toml', 'neoforge'), ('META-INF/mods.toml', 'forge'))
+FABRIC_METADATA = (('fabric.mod.json', 'fabric'), ('quilt.mod.json', 'quilt'))
+PLUGIN_METADATA = (('paper-plugin.yml', 'paper'), ('plugin.yml', 'bukkit'))
+
+def _mod(mod_id, name=None, version=None, dependencies=None) -> Dict[str, Any]:
+    """Build one mod entry of a jar"""
+    return {
+        'id': str(mod_id).lower(),
+        'name': str(name) if name else str(mod_id),
+        'version': str(version) if version is not None else None,
+        'dependencies': dependencies or []
+    }
+
+def _manifest_version(jar: zipfile.ZipFile) -> Optional[str]:
+    """Get Implementation-Version from the jar manifest, which ${file.jarVersion} refers to"""
+    try:
+        manifest = jar.read('META-INF/MANIFEST.MF').decode('utf-8', errors='ignore')
+    except KeyError:
+        return None
+    match = re.search(r'^Implementation-Version:\s*(\S+)', manifest, re.MULTILINE)
+    return match.group(1) if match else None
+
+def _parse_toml(text: str) -> Dict[str, Any]:
+    """Parse a mods.toml, falling back to picking out [[mods]] keys when tomllib fails or is missing"""
+    if tomllib_available:
+        try:
+            return tomllib.loads(text)
+        except tomllib.TOMLDecodeError:
+            pass
+    
+    # Fallback: only top-level [[mods]] tables with their plain key = "value" lines
+    data = {'mods': []}
+    current = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('['):
+            current = {} if line == '[[mods]]' else None
+            if current is not None:
+                data['mods'].append(current)
+            continue
+        match = re.match(r'(\w+)\s*=\s*["\']([^"\']*)["\']', line)
+        if current is not None and match:
+            current[match.group(1)] = match.group(2)
+    return data
+
+def _parse_yaml(text: str) -> Dict[str, Any]:
+    """Parse a plugin.yml, falling back to top-level scalar and list keys without PyYAML"""
+    if yaml_available:
+        try:
+            # BaseLoader keeps every scalar a string, so version 2.20 does not turn into 2.2
+            data = yaml.load(text, Loader=yaml.BaseLoader)
+            return data if isinstance(data, dict) else {}
+        except yaml.YAMLError:
+            pass
+    
+    data = {}
+    # Top-level key without a value, whose block list ("- item" lines) may follow
+    list_key = None
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        item = re.match(r'\s*-\s*(.*?)\s*$', line)
+        if item and list_key is not None:
+            data.setdefault(list_key, []).append(item.group(1).strip('\'"'))
+            continue
+        list_key = None
+        match = re.match(r'([\w-]+):\s*(.*?)\s*$', line)
+        if not match:
+            continue
+        key, value = match.groups()
+        if value.startswith('['):
+            data[key] = [item.strip().strip('\'"') for item in value.strip('[]').split(',') if item.strip()]
+        elif value:
+            data[key] = value.strip('\'"')
+        else:
+            list_key = key
+    return data
+
+def _read_forge(jar: zipfile.ZipFile, path: str) -> List[Dict[str, Any]]:
+    """Read the mods of a Forge or NeoForge mods.toml"""
+    data = _parse_toml(jar.read(path).decode('utf-8', errors='ignore'))
+    dependencies = data.get('dependencies') or {}
+    mods = []
+    for mod in data.get('mods') or []:
+        if not isinstance(mod, dict) or not mod.get('modId'):
+            continue
+        version = mod.get('version')
+        if isinstance(version, str) and '${' in version:
+            version = _manifest_version(jar) or version
+        requires = []
+        for dependency in dependencies.get(mod['modId'], []) if isinstance(dependencies, dict) else []:
+            if isinstance(dependency, dict) and dependency.get('modId'):
+                # Forge uses mandatory = true/false, NeoForge type = "required"/"optional"
+                required = dependency.get('mandatory', dependency.get('type', 'required') == 'required')
+                requires.append({'id': str(dependency['modId']).lower(), 'required': bool(required)})
+        mods.append(_mod(mod['modId'], mod.get('displayName'), version, requires))
+    return mods
+
+def _read_fabric(jar: zipfile.ZipFile, path: str) -> List[Dict[str, Any]]:
+    """Read the mod of a fabric.mod.json or quilt.mod.json"""
+    data = json.loads(jar.read(path).decode('utf-8', errors='ignore'), strict=False)
+    if 'quilt_loader' in data:
+        loader = data['quilt_loader']
+        requires = [
+            {'id': str(dependency.get('id') if isinstance(dependency, dict) else dependency).lower(), 'required': True}
+            for dependency in loader.get('depends', [])
+        ]
+        return [_mod(loader.get('id'), (loader.get('metadata') or {}).get('name'), loader.get('version'), requires)]
+    requires = [{'id': mod_id.lower(), 'required': True} for mod_id in (data.get('depends') or {})]
+    requires += [{'id': mod_id.lower(), 'required': False} for mod_id in (data.get('recommends') or {})]
+    return [_mod(data['id'], data.get('name'), data.get('version'), requires)] if data.get('id') else []
+
+def _as_list(value) -> List[Any]:
+    """Get a plugin.yml list that may also be written as a single value"""
+    if not value:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def _flag(value, default=True) -> bool:
+    """Read a plugin.yml boolean, which is a string when parsed without type conversion"""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() not in ('false', 'no', 'off')
+    return bool(value)
+
+def _read_plugin(jar: zipfile.ZipFile, path: str) -> List[Dict[str, Any]]:
+    """Read the plugin of a plugin.yml or paper-plugin.yml"""
+    data = _parse_yaml(jar.read(path).decode('utf-8', errors='ignore'))
+    if not data.get('name'):
+        return []
+    requires = [{'id': str(name).lower(), 'required': True} for name in _as_list(data.get('depend'))]
+    requires += [{'id': str(name).lower(), 'required': False} for name in _as_list(data.get('softdepend'))]
+    # paper-plugin.yml: dependencies: {server: {name: {required: bool}}}
+    dependencies = data.get('dependencies')
+    if isinstance(dependencies, dict):
+        for name, options in (dependencies.get('server') or {}).items():
+            required = _flag(options.get('required')) if isinstance(options, dict) else True
+            requires.append({'id': str(name).lower(), 'required': required})
+    # Early paper-plugin.yml: dependencies: [{name: ..., required: bool}]
+    elif isinstance(dependencies, list):
+        for dependency in dependencies:
+            if isinstance(dependency, dict) and dependency.get('name'):
+                requires.append({'id': str(dependency['name']).lower(), 'required': _flag(dependency.get('required'))})
+    return [_mod(data['name'], data.get('name'), data.get('version'), requires)]
+
+def read_jar_metadata(path: str) -> Dict[str, Any]:
+    """Open a jar once and read the mods or plugins it declares (blocking)"""
+    try:
+        with zipfile.ZipFile(path) as jar:
+            names = set(jar.namelist())
+            for readers, reader in ((FORGE_METADATA, _read_forge), (FABRIC_METADATA, _read_fabric),
+                                    (PLUGIN_METADATA, _read_plugin)):
+                for metadata_path, loader in readers:
+                    if metadata_path in names:
+                        return {'loader': loader, 'mods': reader(jar, metadata_path)}
+        return {'loader': None, 'mods': []}
+    except (zipfile.BadZipFile, OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        return {'loader': None, 'mods': [], 'error': str(e)}
+
+class JarIndex:
+    """Metadata of the jars in mods/ and plugins/ of each server, cached by (path, size, mtime)"""
+    
+    def __init__(self, servers_dir: str = 'cached_minecraft_servers'):
+        self._servers_dir = servers_dir
+        # Dictionary mapping server names to {relative jar path: entry}
+        self._indexes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # Dictionary mapping server names to in-flight indexing tasks
+        self._tasks: Dict[str, asyncio.Task] = {}
+    
+    def _index_path(self, server_name: str) -> str:
+        """Get the path of the index file of a server"""
+        return os.path.join(self._servers_dir, server_name, 'Fallenmoon', INDEX_FILE)
+    
+    def _load(self, server_name: str) -> Dict[str, Dict[str, Any]]:
+        """Read the index file of a server"""
+        try:
+            with open(self._index_path(server_name), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != INDEX_VERSION:
+            return {}
+        return data.get('jars', {})
+    
+    def _save(self, server_name: str, jars: Dict[str, Dict[str, Any]]) -> None:
+        """Write the index file of a server atomically"""
+        path = self._index_path(server_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'jars': jars}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+    
+    def build(self, server_name: str) -> Dict[str, Dict[str, Any]]:
+        """Bring the index of a server up to date, reading only new or changed jars (blocking)"""
+        server_path = os.path.join(self._servers_dir, server_name)
+        cached = self._indexes.get(server_name)
+        if cached is None:
+            cached = self._load(server_name)
+        
+        jars = {}
+        changed = []
+        for directory in JAR_DIRS:
+            try:
+                with os.scandir(os.path.join(server_path, directory)) as entries:
+                    for entry in entries:
+                        if not entry.name.endswith('.jar') or not entry.is_file():
+                            continue
+                        file_stats = entry.stat()
+                        relative_path = f'{directory}/{entry.name}'
+                        entry_data = cached.get(relative_path)
+                        if (entry_data and entry_data.get('size') == file_stats.st_size
+                                and entry_data.get('mtime') == file_stats.st_mtime):
+                            jars[relative_path] = entry_data
+                        else:
+                            changed.append((relative_path, entry.path, file_stats))
+            except FileNotFoundError:
+                continue
+        
+        if changed:
+            # zipfile releases the GIL while reading, so a few threads overlap the disk reads
+            with ThreadPoolExecutor(max_workers=INDEX_WORKERS) as executor:
+                results = executor.map(lambda item: read_jar_metadata(item[1]), changed)
+                for (relative_path, _, file_stats), metadata in zip(changed, results):
+                    jars[relative_path] = {'size': file_stats.st_size, 'mtime': file_stats.st_mtime, **metadata}
+            print(f"Indexed {len(changed)} changed jar(s) of server {server_name}")
+        
+        # Removed jars also change the index
+        if changed or len(jars) != len(cached):
+            try:
+                self._save(server_name, jars)
+            except OSError as e:
+                print(f"Error saving jar index of server {server_name}: {e}")
+        self._indexes[server_name] = jars
+        return jars
+    
+    async def refresh(self, server_name: str) -> Dict[str, Dict[str, Any]]:
+        """Update the index of a server in the executor; concurrent calls share one run"""
+        task = self._tasks.get(server_name)
+        if task is None or task.done():
+            loop = asyncio.get_running_loop()
+            task = asyncio.ensure_future(loop.run_in_executor(None, self.build, server_name))
+            self._tasks[server_name] = task
+        return await asyncio.shield(task)
+    
+    def jars(self, server_name: str, directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Get the indexed jars of a server, keyed by file name when a directory is given"""
+        jars = self._indexes.get(server_name, {})
+        if directory is None:
+            return dict(jars)
+        prefix = f'{directory}/'
+        return {path[len(prefix):]: entry for path, entry in jars.items() if path.startswith(prefix)}
+    
+    def mod_ids(self, server_name: str) -> set:
+        """Get the ids of every mod and plugin of a server"""
+        return {mod['id'] for entry in self._indexes.get(server_name, {}).values() for mod in entry.get('mods', [])}
+    
+    def conflicts(self, server_name: str) -> List[Dict[str, Any]]:
+        """Get the mod ids declared by more than one jar of a server, such as two versions of a mod"""
+        by_id: Dict[str, List[str]] = {}
+        for relative_path, entry in self._indexes.get(server_name, {}).items():
+            for mod_id in {mod['id'] for mod in entry.get('mods', [])}:
+                by_id.setdefault(mod_id, []).append(relative_path)
+        return [
+            {'id': mod_id, 'files': sorted(files)}
+            for mod_id, files in sorted(by_id.items()) if len(files) > 1
+        ]
+    
+    def indexed(self, server_name: str) -> bool:
+        """Check whether the jars of a server were indexed since startup"""
+        return server_name in self._indexes
+    
+    def has_mod(self, server_name: str, mod_id: str) -> bool:
+        """Check whether a server has a mod or plugin with the given id"""
+        return mod_id.lower() in self.mod_ids(server_name)
+
+# Global jar index instance
+jar_index = JarIndex()
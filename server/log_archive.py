@@ -0,0 +1,104 @@
+import asyncio
+import os
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .log_parser import level_rank
+from . import worker_pool
+from .worker_pool import compile_pattern, scan_archive
+
+# Rotated logs are named like 2026-10-18-1.log.gz
+ARCHIVE_LOG = re.compile(r'^(\d{4}-\d{2}-\d{2})-(\d+)\.log\.gz$')
+# Matching lines kept per archive and per scan, a pattern like "." must not flood the browser
+MAX_MATCHES_PER_ARCHIVE = 5000
+MAX_MATCHES = 20000
+# Lines per log_archive_lines message
+LINES_PER_MESSAGE = 500
+# Seconds an archive may take once its result is awaited; Python regexes can't be interrupted, so a
+# pattern that backtracks catastrophically is only stopped by killing the worker processes
+ARCHIVE_SCAN_TIMEOUT = 120
+
+class LogArchiveReader:
+    """Scan the rotated .log.gz archives of a server in parallel on their own process pool"""
+    
+    def __init__(self, servers_dir: str = 'cached_minecraft_servers'):
+        self._servers_dir = servers_dir
+    
+    def archives(self, server_name: str, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List the archives of a server in chronological order, optionally limited to a YYYY-MM-DD range"""
+        logs_dir = os.path.join(self._servers_dir, server_name, 'logs')
+        archives = []
+        try:
+            with os.scandir(logs_dir) as entries:
+                for entry in entries:
+                    match = ARCHIVE_LOG.match(entry.name)
+                    if not match or not entry.is_file():
+                        continue
+                    date = match.group(1)
+                    if (start_date and date < start_date) or (end_date and date > end_date):
+                        continue
+                    archives.append({
+                        'file': entry.name,
+                        'path': entry.path,
+                        'date': date,
+                        'number': int(match.group(2)),
+                        'size': entry.stat().st_size
+                    })
+        except FileNotFoundError:
+            return []
+        archives.sort(key=lambda archive: (archive['date'], archive['number']))
+        return archives
+    
+    async def scan(self, archives: List[Dict[str, Any]], pattern: str = '', ignore_case: bool = True,
+                   min_level: str = '') -> AsyncIterator[Dict[str, Any]]:
+        """Scan archives in parallel and yield their results in archive order
+
+        At most twice as many archives as there are workers are in flight, so a year of logs does not
+        pile up finished results in memory while an early archive is still being read. An archive that
+        takes longer than ARCHIVE_SCAN_TIMEOUT ends the scan with a result marked timed_out.
+        """
+        # Fail on a bad pattern here rather than once per worker
+        compile_pattern(pattern, ignore_case)
+        rank = level_rank(min_level)
+        loop = asyncio.get_running_loop()
+        pool = worker_pool.get_pool(worker_pool.ARCHIVE_POOL)
+        window = worker_pool.POOL_WORKERS[worker_pool.ARCHIVE_POOL] * 2
+        pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        remaining = MAX_MATCHES
+        queued = iter(archives)
+        
+        def submit():
+            archive = next(queued, None)
+            if archive is not None:
+                pending.append((archive, loop.run_in_executor(
+                    pool, scan_archive, archive['path'], pattern, ignore_case, rank, MAX_MATCHES_PER_ARCHIVE)))
+        
+        for _ in range(window):
+            submit()
+        try:
+            while pending:
+                archive, future = pending.pop(0)
+                try:
+                    matches, scanned, truncated = await asyncio.wait_for(future, ARCHIVE_SCAN_TIMEOUT)
+                except asyncio.TimeoutError:
+                    print(f"Scanning log archive {archive['path']} took over {ARCHIVE_SCAN_TIMEOUT}s, "
+                          f"stopping the archive worker processes")
+                    worker_pool.shutdown(worker_pool.ARCHIVE_POOL)
+                    yield {'archive': archive, 'matches': [], 'scanned': 0, 'truncated': True, 'timed_out': True}
+                    break
+                submit()
+                if len(matches) > remaining:
+                    matches, truncated = matches[:remaining], True
+                remaining -= len(matches)
+                yield {'archive': archive, 'matches': matches, 'scanned': scanned, 'truncated': truncated,
+                       'timed_out': False}
+                if remaining <= 0:
+                    break
+        finally:
+            # The client went away or the match limit was hit: drop the archives not started yet
+            for _, future in pending:
+                future.cancel()
+
+# Global log archive reader instance
+log_archive_reader = LogArchiveReader()
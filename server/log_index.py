@@ -0,0 +1,317 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Database under <server>/Fallenmoon/ holding the indexed log lines
+INDEX_FILE = 'log_index.sqlite'
+# Lines inserted per executemany call
+INSERT_BATCH = 5000
+# Seconds between two updates triggered by the log tailer
+NOTIFY_DELAY = 5.0
+# Default and maximum number of search results per page
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Bytes at the start of latest.log used to notice that it was replaced by a new run
+FINGERPRINT_BYTES = 256
+
+# Rotated logs are named like 2026-10-18-1.log.gz
+ROTATED_LOG = re.compile(r'^(\d{4}-\d{2}-\d{2})-\d+\.log\.gz$')
+# [12:34:56] of vanilla/Paper logs, [18Oct2026 12:34:56.789] of Forge debug logs
+LINE_TIME = re.compile(r'^\[(?:(\d{2}[A-Za-z]{3}\d{4}) )?(\d{2}):(\d{2}):(\d{2})')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    offset INTEGER,
+    fingerprint TEXT,
+    day TEXT,
+    last_seconds INTEGER
+);
+CREATE TABLE IF NOT EXISTS log_lines (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    file TEXT NOT NULL,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS log_lines_ts ON log_lines (ts);
+CREATE INDEX IF NOT EXISTS log_lines_file ON log_lines (file);
+CREATE VIRTUAL TABLE IF NOT EXISTS log_fts USING fts5(line, content='log_lines', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS log_lines_ai AFTER INSERT ON log_lines BEGIN
+    INSERT INTO log_fts (rowid, line) VALUES (new.id, new.line);
+END;
+CREATE TRIGGER IF NOT EXISTS log_lines_ad AFTER DELETE ON log_lines BEGIN
+    INSERT INTO log_fts (log_fts, rowid, line) VALUES ('delete', old.id, old.line);
+END;
+"""
+
+def fts_query(text: str) -> str:
+    """Turn user input into an FTS5 query: every word must match, a trailing * matches a prefix"""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ('*' if prefix else ''))
+    return ' AND '.join(terms)
+
+def log_fingerprint(path: str) -> str:
+    """Hash the first bytes of a log, which change when a new run replaces it"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read(FINGERPRINT_BYTES)).hexdigest()
+
+def log_start_day(file_stats: os.stat_result) -> str:
+    """Get the YYYY-MM-DD a log was started on from its stat result"""
+    # The file was created when the run started, which dates its first line
+    created = getattr(file_stats, 'st_birthtime', None)
+    if created is None:
+        created = file_stats.st_ctime if os.name == 'nt' else file_stats.st_mtime
+    return datetime.fromtimestamp(min(created, file_stats.st_mtime)).strftime('%Y-%m-%d')
+
+class LineClock:
+    """Give each log line a timestamp from its time of day, rolling over to the next day at midnight"""
+    
+    def __init__(self, day: str, last_seconds: Optional[int] = None):
+        self.day = datetime.strptime(day, '%Y-%m-%d')
+        self.last_seconds = last_seconds
+        self.ts = self.day.timestamp() + (last_seconds or 0)
+    
+    def stamp(self, line: str) -> float:
+        """Get the timestamp of a line; lines without a time (stack traces) keep the previous one"""
+        match = LINE_TIME.match(line)
+        if match:
+            date, hours, minutes, seconds = match.groups()
+            day_seconds = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+            if date:
+                try:
+                    self.day = datetime.strptime(date, '%d%b%Y')
+                except ValueError:
+                    pass
+            elif self.last_seconds is not None and day_seconds < self.last_seconds - 3600:
+                # The clock went back by more than an hour: the log crossed midnight
+                self.day += timedelta(days=1)
+            self.last_seconds = day_seconds
+            self.ts = self.day.timestamp() + day_seconds
+        return self.ts
+    
+    @property
+    def day_text(self) -> str:
+        return self.day.strftime('%Y-%m-%d')
+
+class LogIndex:
+    """Full-text index of the rotated and current logs of each server, in one SQLite FTS5 database per server"""
+    
+    def __init__(self, servers_dir: str = 'cached_minecraft_servers'):
+        self._servers_dir = servers_dir
+        # All writes go through one thread, so a database never has two writers
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='log-index')
+        # Dictionary mapping server names to the writer's open connections
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        # Dictionary mapping server names to in-flight updates
+        self._updates: Dict[str, asyncio.Future] = {}
+        # Dictionary mapping server names to updates scheduled by notify()
+        self._notified: Dict[str, asyncio.TimerHandle] = {}
+    
+    def _db_path(self, server_name: str) -> str:
+        """Get the path of the index database of a server"""
+        return os.path.join(self._servers_dir, server_name, 'Fallenmoon', INDEX_FILE)
+    
+    def _connect(self, server_name: str) -> sqlite3.Connection:
+        """Get the writer connection of a server (writer thread only)"""
+        connection = self._connections.get(server_name)
+        if connection is None:
+            path = self._db_path(server_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            connection = sqlite3.connect(path)
+            # WAL lets searches read while the writer appends
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._connections[server_name] = connection
+        return connection
+    
+    def close(self, server_name: str) -> None:
+        """Close the writer connection of a server"""
+        def close():
+            connection = self._connections.pop(server_name, None)
+            if connection:
+                connection.close()
+        self._writer.submit(close)
+    
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, file_name: str, lines: Iterable[str], clock: LineClock) -> int:
+        """Insert lines in batches and return how many were inserted"""
+        count = 0
+        batch: List[Tuple[float, str, str]] = []
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if not line:
+                continue
+            batch.append((clock.stamp(line), file_name, line))
+            if len(batch) >= INSERT_BATCH:
+                connection.executemany('INSERT INTO log_lines (ts, file, line) VALUES (?, ?, ?)', batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            connection.executemany('INSERT INTO log_lines (ts, file, line) VALUES (?, ?, ?)', batch)
+            count += len(batch)
+        return count
+    
+    @staticmethod
+    def _read_lines(path: str, offset: int) -> Iterator[Tuple[str, int]]:
+        """Yield complete lines after an offset with the offset following each of them"""
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                # A line still being written is picked up on the next update
+                if not raw.endswith(b'\n'):
+                    break
+                offset += len(raw)
+                yield raw.decode('utf-8', errors='ignore'), offset
+    
+    def update(self, server_name: str) -> int:
+        """Index new rotated logs and the new part of latest.log (blocking, writer thread)"""
+        logs_dir = os.path.join(self._servers_dir, server_name, 'logs')
+        if not os.path.isdir(logs_dir):
+            return 0
+        connection = self._connect(server_name)
+        known = {row[0]: row for row in connection.execute(
+            'SELECT name, size, mtime, offset, fingerprint, day, last_seconds FROM files')}
+        added = 0
+        
+        with os.scandir(logs_dir) as entries:
+            rotated = sorted(
+                (entry for entry in entries if entry.is_file() and ROTATED_LOG.match(entry.name)),
+                key=lambda entry: entry.name
+            )
+        for entry in rotated:
+            file_stats = entry.stat()
+            row = known.get(entry.name)
+            if row and row[1] == file_stats.st_size and row[2] == file_stats.st_mtime:
+                continue
+            clock = LineClock(ROTATED_LOG.match(entry.name).group(1))
+            with connection:
+                connection.execute('DELETE FROM log_lines WHERE file = ?', (entry.name,))
+                try:
+                    with gzip.open(entry.path, 'rt', encoding='utf-8', errors='ignore') as f:
+                        added += self._insert(connection, entry.name, f, clock)
+                except (OSError, EOFError) as e:
+                    # A truncated archive is indexed as far as it could be read
+                    print(f"Error reading log archive {entry.path}: {e}")
+                connection.execute(
+                    'INSERT OR REPLACE INTO files (name, size, mtime, offset) VALUES (?, ?, ?, ?)',
+                    (entry.name, file_stats.st_size, file_stats.st_mtime, file_stats.st_size))
+        
+        latest_log = os.path.join(logs_dir, 'latest.log')
+        if os.path.exists(latest_log):
+            added += self._update_latest(connection, latest_log, known.get('latest.log'))
+        return added
+    
+    def _update_latest(self, connection: sqlite3.Connection, latest_log: str, row) -> int:
+        """Append the lines written to latest.log since the last update"""
+        file_stats = os.stat(latest_log)
+        fingerprint = log_fingerprint(latest_log)
+        
+        offset, day, last_seconds = 0, None, None
+        if row and row[4] == fingerprint and row[3] <= file_stats.st_size:
+            offset, day, last_seconds = row[3], row[5], row[6]
+        if offset == file_stats.st_size and row:
+            return 0
+        
+        with connection:
+            if offset == 0:
+                # A new run replaced latest.log; the old lines come back through its rotated archive
+                connection.execute('DELETE FROM log_lines WHERE file = ?', ('latest.log',))
+                day = log_start_day(file_stats)
+            
+            clock = LineClock(day, last_seconds)
+            new_offset = offset
+            
+            def lines():
+                nonlocal new_offset
+                for line, end in self._read_lines(latest_log, offset):
+                    new_offset = end
+                    yield line
+            
+            added = self._insert(connection, 'latest.log', lines(), clock)
+            connection.execute(
+                'INSERT OR REPLACE INTO files (name, size, mtime, offset, fingerprint, day, last_seconds) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ('latest.log', file_stats.st_size, file_stats.st_mtime, new_offset, fingerprint,
+                 clock.day_text, clock.last_seconds))
+        return added
+    
+    async def refresh(self, server_name: str) -> int:
+        """Bring the index of a server up to date on the writer thread; concurrent calls share one run"""
+        future = self._updates.get(server_name)
+        if future is None or future.done():
+            loop = asyncio.get_running_loop()
+            future = asyncio.ensure_future(loop.run_in_executor(self._writer, self.update, server_name))
+            self._updates[server_name] = future
+        return await asyncio.shield(future)
+    
+    def notify(self, server_name: str) -> None:
+        """Tell the index that latest.log grew; updates are coalesced to one per NOTIFY_DELAY"""
+        if server_name in self._notified:
+            return
+        loop = asyncio.get_running_loop()
+        
+        def run():
+            self._notified.pop(server_name, None)
+            task = asyncio.ensure_future(self.refresh(server_name))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        
+        self._notified[server_name] = loop.call_later(NOTIFY_DELAY, run)
+    
+    def search(self, server_name: str, query: str, start: Optional[float] = None, end: Optional[float] = None,
+               page: int = 0, page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """Search the index of a server, newest lines first (blocking, any thread)"""
+        started = time.perf_counter()
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        page = max(0, int(page))
+        match = fts_query(query)
+        if not match:
+            return {'results': [], 'has_more': False, 'elapsed_ms': 0.0}
+        
+        path = self._db_path(server_name)
+        if not os.path.exists(path):
+            return {'results': [], 'has_more': False, 'elapsed_ms': 0.0}
+        
+        sql = ('SELECT l.ts, l.file, l.line FROM log_fts JOIN log_lines l ON l.id = log_fts.rowid '
+               'WHERE log_fts MATCH ?')
+        params: List[Any] = [match]
+        if start is not None:
+            sql += ' AND l.ts >= ?'
+            params.append(float(start))
+        if end is not None:
+            sql += ' AND l.ts <= ?'
+            params.append(float(end))
+        # One extra row tells whether there is a next page without counting every match
+        sql += ' ORDER BY l.ts DESC, l.id DESC LIMIT ? OFFSET ?'
+        params += [page_size + 1, page * page_size]
+        
+        # A read-only connection per search, readers never wait for the writer in WAL mode
+        connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f'Invalid search query: {e}')
+        finally:
+            connection.close()
+        
+        return {
+            'results': [{'ts': ts, 'file': file_name, 'line': line} for ts, file_name, line in rows[:page_size]],
+            'has_more': len(rows) > page_size,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+# Global log index instance
+log_index = LogIndex()
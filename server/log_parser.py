@@ -0,0 +1,137 @@
+import re
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+# Log levels from least to most severe; WARNING and SEVERE are the java.util.logging names
+LEVELS = ('TRACE', 'DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL')
+LEVEL_ALIASES = {'WARNING': 'WARN', 'SEVERE': 'ERROR'}
+
+# Every layout may start with the date of debug.log: [18Oct2026 12:34:56.789]
+_TIME = r'^\[(?:(?P<date>\d{2}[A-Za-z]{3}\d{4}) )?(?P<time>\d{2}:\d{2}:\d{2})(?:\.\d{3})?'
+# [12:34:56] [Server thread/INFO] [minecraft/DedicatedServer]: msg (Forge, NeoForge, Mohist, Arclight)
+MODDED_LAYOUT = re.compile(
+    _TIME + r'\] \[(?P<thread>[^\]]*)/(?P<level>[A-Z]+)\] \[(?P<logger>[^\]]*)\]: ?(?P<message>.*)$')
+# [12:34:56] [Server thread/INFO]: msg (vanilla, Paper)
+VANILLA_LAYOUT = re.compile(_TIME + r'\] \[(?P<thread>[^\]]*)/(?P<level>[A-Z]+)\]: ?(?P<message>.*)$')
+# [12:34:56 INFO]: msg (Bukkit console format, used by Paper, Mohist and Arclight consoles)
+CONSOLE_LAYOUT = re.compile(_TIME + r' (?P<level>[A-Z]+)\]: ?(?P<message>.*)$')
+# Plugins prefix their messages with their name on Bukkit-based servers: [LuckPerms] Loading...
+PLUGIN_PREFIX = re.compile(r'^\[(?P<plugin>[\w .-]{1,48})\] ')
+
+# Layouts tried in order for each platform_type of ServerManager._ensure_version_file
+PLATFORM_LAYOUTS = {
+    'Forge': (MODDED_LAYOUT, VANILLA_LAYOUT),
+    'Neoforge': (MODDED_LAYOUT, VANILLA_LAYOUT),
+    'Mohist': (MODDED_LAYOUT, VANILLA_LAYOUT, CONSOLE_LAYOUT),
+    'Arclight': (MODDED_LAYOUT, VANILLA_LAYOUT, CONSOLE_LAYOUT),
+    'Paper': (VANILLA_LAYOUT, CONSOLE_LAYOUT),
+}
+ALL_LAYOUTS = (MODDED_LAYOUT, VANILLA_LAYOUT, CONSOLE_LAYOUT)
+# Platforms that load Bukkit plugins
+PLUGIN_PLATFORMS = {'Paper', 'Mohist', 'Arclight'}
+
+def normalize_level(level: Optional[str]) -> Optional[str]:
+    """Map a level name to its LEVELS spelling, None if it is not a level"""
+    if not level:
+        return None
+    level = level.upper()
+    level = LEVEL_ALIASES.get(level, level)
+    return level if level in LEVELS else None
+
+def level_rank(level: Optional[str]) -> int:
+    """Get the position of a level name in LEVELS, 0 for unknown or no level"""
+    level = normalize_level(level)
+    return LEVELS.index(level) if level else 0
+
+class LogRecord(NamedTuple):
+    """One parsed log line"""
+    time: Optional[str]
+    thread: Optional[str]
+    level: Optional[str]
+    logger: Optional[str]
+    message: str
+    # Lines without a header (stack trace frames, multi-line messages) belong to the record before them
+    continuation: bool
+
+class LogLineParser:
+    """Parse the log lines of one server into LogRecords, one instance per log stream"""
+    
+    def __init__(self, platform_type: Optional[str] = None):
+        self._layouts = PLATFORM_LAYOUTS.get(platform_type, ALL_LAYOUTS)
+        self._plugins = platform_type in PLUGIN_PLATFORMS or platform_type not in PLATFORM_LAYOUTS
+        self._previous: Optional[LogRecord] = None
+    
+    def parse(self, line: str) -> LogRecord:
+        """Parse a line; header-less lines take the time, thread, level and logger of the previous record"""
+        line = line.rstrip('\r\n')
+        for layout in self._layouts:
+            match = layout.match(line)
+            if match is None:
+                continue
+            fields = match.groupdict()
+            level = normalize_level(fields['level'])
+            if level is None:
+                continue
+            message = fields['message']
+            logger = fields.get('logger')
+            if logger:
+                # Forge loggers end with a marker after the slash, often empty: ModLauncher/
+                logger = logger.rstrip('/')
+            elif self._plugins:
+                plugin = PLUGIN_PREFIX.match(message)
+                if plugin:
+                    logger = plugin.group('plugin')
+            record = LogRecord(fields['time'], fields.get('thread'), level, logger or None, message, False)
+            self._previous = record
+            return record
+        
+        previous = self._previous
+        if previous is None:
+            return LogRecord(None, None, None, None, line, True)
+        return LogRecord(previous.time, previous.thread, previous.level, previous.logger, line, True)
+
+class LogFilter:
+    """Which log records a client wants: a minimum level and logger name prefixes to keep or drop"""
+    
+    def __init__(self, min_level: Optional[str] = None, loggers: Iterable[str] = (),
+                 exclude_loggers: Iterable[str] = ()):
+        self.min_level = normalize_level(min_level)
+        self._min_rank = level_rank(self.min_level)
+        self.loggers: Tuple[str, ...] = tuple(logger.lower() for logger in loggers if logger)
+        self.exclude_loggers: Tuple[str, ...] = tuple(logger.lower() for logger in exclude_loggers if logger)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LogFilter':
+        """Build a filter from a set_log_filter message, raising ValueError on bad values"""
+        min_level = data.get('min_level') or None
+        if min_level is not None and normalize_level(str(min_level)) is None:
+            raise ValueError(f'Unknown log level: {min_level}')
+        loggers = data.get('loggers') or []
+        exclude_loggers = data.get('exclude_loggers') or []
+        if not isinstance(loggers, list) or not isinstance(exclude_loggers, list):
+            raise ValueError('loggers and exclude_loggers must be lists')
+        return cls(min_level, [str(logger) for logger in loggers], [str(logger) for logger in exclude_loggers])
+    
+    @property
+    def active(self) -> bool:
+        """Whether the filter drops anything at all"""
+        return bool(self._min_rank or self.loggers or self.exclude_loggers)
+    
+    def matches(self, record: LogRecord) -> bool:
+        """Whether a record passes the filter"""
+        if self._min_rank and level_rank(record.level) < self._min_rank:
+            return False
+        if self.loggers or self.exclude_loggers:
+            logger = (record.logger or '').lower()
+            if self.loggers and not logger.startswith(self.loggers):
+                return False
+            if self.exclude_loggers and logger and logger.startswith(self.exclude_loggers):
+                return False
+        return True
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Describe the filter for clients"""
+        return {
+            'min_level': self.min_level,
+            'loggers': list(self.loggers),
+            'exclude_loggers': list(self.exclude_loggers)
+        }
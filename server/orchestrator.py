@@ -0,0 +1,162 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .event_bus import event_bus
+from .event_types import BULK_PROGRESS
+
+# Maximum number of servers booting (or stopping) at the same time
+DEFAULT_CONCURRENCY = 2
+# Seconds a server gets to log its startup completion line
+DEFAULT_READY_TIMEOUT = 300.0
+
+class DependencyCycleError(ValueError):
+    """Raised when server dependencies form a cycle"""
+
+class LifecycleOrchestrator:
+    """Start, stop and restart groups of servers with bounded concurrency and dependency ordering"""
+    
+    def __init__(self, start: Callable[[str], Awaitable[bool]], stop: Callable[[str], Awaitable[bool]],
+                 is_ready: Callable[[str], bool]):
+        # start(server_name) launches a server and returns whether it was launched
+        self._start = start
+        # stop(server_name) stops a server and returns whether it has exited
+        self._stop = stop
+        # is_ready(server_name) tells whether a server already completed startup
+        self._is_ready = is_ready
+        # Dictionary mapping server names to futures waiting for startup completion
+        self._ready_waiters: Dict[str, List[asyncio.Future]] = {}
+    
+    async def on_startup_completed(self, **kwargs) -> None:
+        """Resolve readiness waiters when a server logs its startup completion line"""
+        for waiter in self._ready_waiters.pop(kwargs.get('server_name'), []):
+            if not waiter.done():
+                waiter.set_result(True)
+    
+    async def on_server_crashed(self, **kwargs) -> None:
+        """Fail readiness waiters when a server exits during startup"""
+        for waiter in self._ready_waiters.pop(kwargs.get('server_name'), []):
+            if not waiter.done():
+                waiter.set_result(False)
+    
+    async def start_many(self, server_names: Iterable[str], dependencies: Optional[Dict[str, List[str]]] = None,
+                         concurrency: int = DEFAULT_CONCURRENCY,
+                         ready_timeout: float = DEFAULT_READY_TIMEOUT) -> Dict[str, str]:
+        """Start servers after their dependencies are ready, at most `concurrency` booting at once"""
+        async def start_one(server_name):
+            return 'ready' if await self._start_and_wait(server_name, ready_timeout) else 'failed'
+        
+        return await self._run('start', server_names, dependencies, concurrency, start_one, reverse=False)
+    
+    async def stop_many(self, server_names: Iterable[str], dependencies: Optional[Dict[str, List[str]]] = None,
+                        concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, str]:
+        """Stop servers after the servers depending on them have stopped"""
+        async def stop_one(server_name):
+            return 'stopped' if await self._stop(server_name) else 'failed'
+        
+        return await self._run('stop', server_names, dependencies, concurrency, stop_one, reverse=True)
+    
+    async def restart_many(self, server_names: Iterable[str], dependencies: Optional[Dict[str, List[str]]] = None,
+                           concurrency: int = 1,
+                           ready_timeout: float = DEFAULT_READY_TIMEOUT) -> Dict[str, str]:
+        """Rolling restart: each server is stopped and started again once its dependencies are back up"""
+        async def restart_one(server_name):
+            await self._publish_progress('restart', server_name, 'stopping')
+            if not await self._stop(server_name):
+                return 'failed'
+            return 'ready' if await self._start_and_wait(server_name, ready_timeout) else 'failed'
+        
+        return await self._run('restart', server_names, dependencies, concurrency, restart_one, reverse=False)
+    
+    async def _start_and_wait(self, server_name, ready_timeout) -> bool:
+        """Launch a server and wait for its startup completion line"""
+        # Register the waiter before launching so a fast startup is not missed
+        waiter = asyncio.get_running_loop().create_future()
+        self._ready_waiters.setdefault(server_name, []).append(waiter)
+        try:
+            if not await self._start(server_name):
+                return False
+            if self._is_ready(server_name):
+                return True
+            return await asyncio.wait_for(asyncio.shield(waiter), ready_timeout)
+        except asyncio.TimeoutError:
+            print(f"Server {server_name} did not complete startup within {ready_timeout} seconds")
+            return False
+        finally:
+            waiters = self._ready_waiters.get(server_name)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._ready_waiters[server_name]
+    
+    async def _run(self, operation, server_names, dependencies, concurrency, action, reverse) -> Dict[str, str]:
+        """Run action on every server in dependency order with bounded concurrency"""
+        server_names = list(dict.fromkeys(server_names))
+        order = self.dependency_order(server_names, dependencies or {})
+        # Only dependencies inside this batch are waited on
+        graph = {
+            name: [dep for dep in (dependencies or {}).get(name, []) if dep in order]
+            for name in order
+        }
+        if reverse:
+            # Stop dependents before the servers they depend on
+            dependents = {name: [] for name in order}
+            for name, deps in graph.items():
+                for dep in deps:
+                    dependents[dep].append(name)
+            graph = dependents
+        
+        semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+        done = {name: asyncio.get_running_loop().create_future() for name in order}
+        results: Dict[str, str] = {}
+        started = time.monotonic()
+        
+        async def run_one(server_name):
+            try:
+                # Wait for prerequisites; a failed prerequisite skips this server
+                for prerequisite in graph[server_name]:
+                    if not await done[prerequisite]:
+                        results[server_name] = 'skipped'
+                        await self._publish_progress(operation, server_name, 'skipped', results, len(order))
+                        return
+                await self._publish_progress(operation, server_name, 'waiting', results, len(order))
+                async with semaphore:
+                    await self._publish_progress(operation, server_name, 'running', results, len(order))
+                    results[server_name] = await action(server_name)
+            except Exception as e:
+                print(f"Error during {operation} of server {server_name}: {e}")
+                results[server_name] = 'failed'
+            finally:
+                done[server_name].set_result(results.get(server_name) in ('ready', 'stopped'))
+            await self._publish_progress(operation, server_name, results[server_name], results, len(order))
+        
+        await asyncio.gather(*(run_one(name) for name in order))
+        print(f"Bulk {operation} of {len(order)} servers finished in {time.monotonic() - started:.1f}s: {results}")
+        return results
+    
+    async def _publish_progress(self, operation, server_name, state, results=None, total=None) -> None:
+        """Publish a BULK_PROGRESS event"""
+        await event_bus.publish(BULK_PROGRESS, operation=operation, server_name=server_name, state=state,
+                                completed=len(results) if results is not None else None, total=total)
+    
+    @staticmethod
+    def dependency_order(server_names: List[str], dependencies: Dict[str, List[str]]) -> List[str]:
+        """Sort servers so that dependencies come first; raise DependencyCycleError on cycles"""
+        order = []
+        state = {}  # 1: visiting, 2: done
+        
+        def visit(name, path):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise DependencyCycleError(' -> '.join(path + [name]))
+            state[name] = 1
+            for dep in dependencies.get(name, []):
+                if dep in server_names:
+                    visit(dep, path + [name])
+            state[name] = 2
+            order.append(name)
+        
+        for name in server_names:
+            visit(name, [])
+        return order
@@ -0,0 +1,340 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from .log_index import FINGERPRINT_BYTES, ROTATED_LOG, LineClock, log_fingerprint, log_start_day
+from .log_parser import LogLineParser
+
+# Directory under <server>/Fallenmoon/ holding the per-day session logs and the tracker state
+PLAYERS_DIR = 'players'
+STATE_FILE = 'state.json'
+# Sessions longer than this many days are cut short when a range is queried
+MAX_SESSION_DAYS = 2
+# Upper bound of the points of a concurrent players series
+MAX_SERIES_POINTS = 500
+# Newest archives compared with the fingerprint of a latest.log that rolled over
+ROLLED_LOG_CANDIDATES = 3
+
+# Messages of the Server thread, chat lines start with <name> and never match
+JOINED = re.compile(r'^(?P<name>\w{1,16})(?: \(formerly known as \w{1,16}\))? joined the game$')
+LEFT = re.compile(r'^(?P<name>\w{1,16}) left the game$')
+PLAYER_UUID = re.compile(r'^UUID of player (?P<name>\w{1,16}) is (?P<uuid>[0-9a-fA-F-]{32,36})$')
+STOPPING = re.compile(r'^Stopping (?:the )?server$')
+
+class _ServerPlayers:
+    """Log position and open sessions of one server"""
+    
+    def __init__(self, state: Dict[str, Any]):
+        self.offset: int = state.get('offset', 0)
+        self.fingerprint: Optional[str] = state.get('fingerprint')
+        # Start time of the server process the log belongs to, a rollover keeps it and a restart changes it
+        self.run: Optional[float] = state.get('run')
+        self.day: Optional[str] = state.get('day')
+        self.last_seconds: Optional[int] = state.get('last_seconds')
+        self.last_ts: float = state.get('last_ts', 0.0)
+        # Dictionary mapping player names to {'uuid', 'start'}
+        self.online: Dict[str, Dict[str, Any]] = state.get('online', {})
+        # Dictionary mapping player names to the UUIDs logged while they logged in
+        self.uuids: Dict[str, str] = state.get('uuids', {})
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'offset': self.offset,
+            'fingerprint': self.fingerprint,
+            'run': self.run,
+            'day': self.day,
+            'last_seconds': self.last_seconds,
+            'last_ts': self.last_ts,
+            'online': self.online,
+            'uuids': self.uuids
+        }
+
+class PlayerTracker:
+    """Player sessions read from the join/leave lines of latest.log, stored as one JSON lines file per day"""
+    
+    def __init__(self, servers_dir: str = 'cached_minecraft_servers'):
+        self._servers_dir = servers_dir
+        # Dictionary mapping server names to their tracking state
+        self._servers: Dict[str, _ServerPlayers] = {}
+        # Queries read the open sessions while the follower updates them
+        self._lock = threading.Lock()
+    
+    def _players_dir(self, server_name: str) -> str:
+        """Get the session log directory of a server"""
+        return os.path.join(self._servers_dir, server_name, 'Fallenmoon', PLAYERS_DIR)
+    
+    def _state(self, server_name: str) -> _ServerPlayers:
+        """Get the tracking state of a server, loading it on first use"""
+        state = self._servers.get(server_name)
+        if state is None:
+            try:
+                with open(os.path.join(self._players_dir(server_name), STATE_FILE), 'r', encoding='utf-8') as f:
+                    state = _ServerPlayers(json.load(f))
+            except (OSError, ValueError):
+                state = _ServerPlayers({})
+            self._servers[server_name] = state
+        return state
+    
+    def _save_state(self, server_name: str, state: _ServerPlayers) -> None:
+        """Write the tracking state of a server atomically"""
+        directory = self._players_dir(server_name)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, STATE_FILE)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state.to_dict(), f)
+        os.replace(temp_path, path)
+    
+    def _write_sessions(self, server_name: str, sessions: List[Tuple[str, Optional[str], float, float]]) -> None:
+        """Append finished sessions to the log of the day each of them started on"""
+        directory = self._players_dir(server_name)
+        os.makedirs(directory, exist_ok=True)
+        by_day: Dict[str, List[str]] = {}
+        for name, uuid, start, end in sessions:
+            day = datetime.fromtimestamp(start).strftime('%Y-%m-%d')
+            # Short keys keep a busy server's day log small
+            by_day.setdefault(day, []).append(json.dumps(
+                {'p': name, 'u': uuid, 's': round(start), 'e': round(end)}, separators=(',', ':')))
+        for day, lines in by_day.items():
+            with open(os.path.join(directory, f'{day}.jsonl'), 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+    
+    def _take_online(self, state: _ServerPlayers, end: Optional[float] = None) -> List[Tuple[str, Optional[str], float, float]]:
+        """End every open session of a server, at its last log line unless an end is given"""
+        with self._lock:
+            finished = [(name, session['uuid'], session['start'], end or state.last_ts or session['start'])
+                        for name, session in state.online.items()]
+            state.online = {}
+        return finished
+    
+    def _rolled_log(self, server_name: str, fingerprint: str) -> Optional[str]:
+        """Find the archive a rolled over latest.log went to by the fingerprint it had"""
+        logs_dir = os.path.join(self._servers_dir, server_name, 'logs')
+        try:
+            with os.scandir(logs_dir) as entries:
+                archives = sorted((entry for entry in entries if entry.is_file() and ROTATED_LOG.match(entry.name)),
+                                  key=lambda entry: entry.stat().st_mtime, reverse=True)
+        except FileNotFoundError:
+            return None
+        # The archive was just written, it is one of the newest
+        for entry in archives[:ROLLED_LOG_CANDIDATES]:
+            try:
+                with gzip.open(entry.path, 'rb') as f:
+                    if hashlib.sha1(f.read(FINGERPRINT_BYTES)).hexdigest() == fingerprint:
+                        return entry.path
+            except (OSError, EOFError):
+                continue
+        return None
+    
+    def _read_lines(self, state: _ServerPlayers, f, clock: LineClock, parser: LogLineParser,
+                    finished: List[Tuple[str, Optional[str], float, float]]) -> bool:
+        """Apply the join, leave and stop lines of a log from state.offset on; return whether anyone joined or left"""
+        changed = False
+        for raw in f:
+            # A line still being written is read again on the next call
+            if not raw.endswith(b'\n'):
+                break
+            state.offset += len(raw)
+            line = raw.decode('utf-8', errors='ignore')
+            ts = clock.stamp(line)
+            record = parser.parse(line)
+            if record.continuation:
+                continue
+            state.last_ts = ts
+            message = record.message.strip()
+            
+            match = PLAYER_UUID.match(message)
+            if match:
+                state.uuids[match.group('name')] = match.group('uuid')
+                continue
+            match = JOINED.match(message)
+            if match:
+                name = match.group('name')
+                with self._lock:
+                    if name not in state.online:
+                        state.online[name] = {'uuid': state.uuids.get(name), 'start': ts}
+                changed = True
+                continue
+            match = LEFT.match(message)
+            if match:
+                with self._lock:
+                    session = state.online.pop(match.group('name'), None)
+                if session is not None:
+                    finished.append((match.group('name'), session['uuid'], session['start'], ts))
+                    changed = True
+                continue
+            if STOPPING.match(message) and state.online:
+                finished.extend(self._take_online(state, ts))
+                changed = True
+        return changed
+    
+    def _store(self, server_name: str, state: _ServerPlayers,
+               finished: List[Tuple[str, Optional[str], float, float]]) -> None:
+        """Write finished sessions and the tracking state of a server"""
+        try:
+            if finished:
+                self._write_sessions(server_name, finished)
+            self._save_state(server_name, state)
+        except OSError as e:
+            print(f"Error saving player sessions of server {server_name}: {e}")
+    
+    def follow(self, server_name: str, run: Optional[float] = None) -> Optional[int]:
+        """Read the lines appended to latest.log since the last call (blocking)
+
+        run identifies the server process (its start time). A new latest.log within the same run is a
+        log4j rollover and keeps the players online; a new run ends every open session.
+        Returns the number of players online if a player joined or left, otherwise None.
+        """
+        latest_log = os.path.join(self._servers_dir, server_name, 'logs', 'latest.log')
+        try:
+            file_stats = os.stat(latest_log)
+            fingerprint = log_fingerprint(latest_log)
+        except OSError:
+            return None
+        
+        state = self._state(server_name)
+        finished: List[Tuple[str, Optional[str], float, float]] = []
+        changed = False
+        new_run = run is not None and state.run is not None and run != state.run
+        if new_run and state.fingerprint == fingerprint:
+            # The old process is gone and the new one has not replaced latest.log yet
+            finished = self._take_online(state)
+            self._store(server_name, state, finished)
+            return 0 if finished else None
+        
+        clock = None
+        parser = LogLineParser()
+        if state.fingerprint != fingerprint or file_stats.st_size < state.offset:
+            if run is not None and run == state.run and state.fingerprint:
+                # log4j rolled latest.log over (at midnight) while the server kept running: finish the old file
+                clock = LineClock(state.day, state.last_seconds)
+                rolled = self._rolled_log(server_name, state.fingerprint)
+                if rolled:
+                    with gzip.open(rolled, 'rb') as f:
+                        f.seek(state.offset)
+                        changed = self._read_lines(state, f, clock, parser, finished)
+                state.offset, state.fingerprint = 0, fingerprint
+            else:
+                # A new run replaced latest.log: whoever was still online left when the old run ended
+                finished.extend(self._take_online(state))
+                changed = bool(finished)
+                state.offset, state.fingerprint = 0, fingerprint
+                state.day, state.last_seconds = log_start_day(file_stats), None
+        elif file_stats.st_size == state.offset and (run is None or run == state.run):
+            return None
+        if run is not None:
+            state.run = run
+        
+        clock = clock or LineClock(state.day, state.last_seconds)
+        with open(latest_log, 'rb') as f:
+            f.seek(state.offset)
+            changed = self._read_lines(state, f, clock, parser, finished) or changed
+        
+        state.day, state.last_seconds = clock.day_text, clock.last_seconds
+        # UUIDs are only needed until their player joins
+        state.uuids = {name: uuid for name, uuid in state.uuids.items() if name not in state.online}
+        self._store(server_name, state, finished)
+        return len(state.online) if changed else None
+    
+    def close(self, server_name: str) -> bool:
+        """End the open sessions of a server that went away without a "Stopping server" line, like on a crash (blocking)
+
+        The sessions end at the last line the server logged. Returns whether any session was open.
+        """
+        state = self._state(server_name)
+        finished = self._take_online(state)
+        if not finished:
+            return False
+        state.uuids = {}
+        self._store(server_name, state, finished)
+        return True
+    
+    def online(self, server_name: str) -> List[Dict[str, Any]]:
+        """Get the players online on a server with the start of their session"""
+        state = self._state(server_name)
+        with self._lock:
+            return sorted(({'name': name, **session} for name, session in state.online.items()),
+                          key=lambda session: session['start'])
+    
+    def sessions(self, server_name: str, start: float, end: float) -> List[Dict[str, Any]]:
+        """Get the sessions overlapping a time range, open sessions end now (blocking)"""
+        directory = self._players_dir(server_name)
+        sessions = []
+        day = datetime.fromtimestamp(start).date() - timedelta(days=MAX_SESSION_DAYS)
+        last_day = datetime.fromtimestamp(end).date()
+        while day <= last_day:
+            try:
+                with open(os.path.join(directory, f'{day.isoformat()}.jsonl'), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            session = json.loads(line)
+                        except ValueError:
+                            continue
+                        if session['s'] < end and session['e'] > start:
+                            sessions.append({'name': session['p'], 'uuid': session.get('u'),
+                                             'start': session['s'], 'end': session['e']})
+            except FileNotFoundError:
+                pass
+            day += timedelta(days=1)
+        
+        now = time.time()
+        for session in self.online(server_name):
+            if session['start'] < end:
+                sessions.append({'name': session['name'], 'uuid': session['uuid'],
+                                 'start': session['start'], 'end': now, 'online': True})
+        return sessions
+    
+    def concurrent(self, sessions: List[Dict[str, Any]], start: float, end: float,
+                   step: Optional[float] = None) -> List[Tuple[float, int]]:
+        """Get the number of players online at evenly spaced times of a range"""
+        if end <= start:
+            return []
+        step = max(step or 0, (end - start) / MAX_SERIES_POINTS, 1.0)
+        # Sweep over the joins and leaves in time order
+        events = sorted([(session['start'], 1) for session in sessions] +
+                        [(session['end'], -1) for session in sessions])
+        series = []
+        count = 0
+        index = 0
+        moment = start
+        while moment <= end:
+            while index < len(events) and events[index][0] <= moment:
+                count += events[index][1]
+                index += 1
+            series.append((moment, count))
+            moment += step
+        return series
+    
+    def top_playtime(self, sessions: List[Dict[str, Any]], start: float, end: float,
+                     limit: int = 10) -> List[Dict[str, Any]]:
+        """Get the players with the most time online within a range"""
+        players: Dict[str, Dict[str, Any]] = {}
+        for session in sessions:
+            seconds = min(session['end'], end) - max(session['start'], start)
+            if seconds <= 0:
+                continue
+            player = players.setdefault(session['name'], {'name': session['name'], 'uuid': None,
+                                                          'seconds': 0.0, 'sessions': 0})
+            player['uuid'] = session['uuid'] or player['uuid']
+            player['seconds'] += seconds
+            player['sessions'] += 1
+        return sorted(players.values(), key=lambda player: -player['seconds'])[:limit]
+    
+    def stats(self, server_name: str, start: float, end: float, limit: int = 10) -> Dict[str, Any]:
+        """Get the online players, concurrent players over a range and its top playtime (blocking)"""
+        sessions = self.sessions(server_name, start, end)
+        return {
+            'online': self.online(server_name),
+            'concurrent': self.concurrent(sessions, start, end),
+            'top_playtime': self.top_playtime(sessions, start, end, limit),
+            'sessions': len(sessions)
+        }
+
+# Global player tracker instance
+player_tracker = PlayerTracker()
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+import psutil
+
+from .event_bus import event_bus
+from .event_types import SERVER_CRASHED
+
+# Process names that identify the JVM started by server_start.bat
+JAVA_PROCESS_NAMES = ('java', 'javaw')
+# How long to look for the JVM under the cmd.exe wrapper before watching the wrapper itself
+JAVA_RESOLVE_TIMEOUT = 30.0
+JAVA_RESOLVE_INTERVAL = 0.2
+
+class ProcessWatcher:
+    """Await server process termination and publish crash events the moment it happens"""
+    
+    def __init__(self):
+        # Dictionary mapping server names to their exit watcher tasks
+        self._tasks: Dict[str, asyncio.Task] = {}
+    
+    def watch(self, server_name: str, process_info: dict) -> None:
+        """Start an exit watcher for a tracked server process"""
+        self.unwatch(server_name)
+        # Set once the watched process has exited, so other coroutines can await it
+        process_info['exited'] = asyncio.Event()
+        self._tasks[server_name] = asyncio.create_task(self._watch(server_name, process_info))
+    
+    def unwatch(self, server_name: str) -> None:
+        """Stop watching a server process"""
+        task = self._tasks.pop(server_name, None)
+        if task and not task.done():
+            task.cancel()
+    
+    async def _resolve_java_process(self, process) -> Optional[psutil.Process]:
+        """Find the JVM started by the cmd.exe wrapper process"""
+        deadline = time.monotonic() + JAVA_RESOLVE_TIMEOUT
+        while time.monotonic() < deadline:
+            # The wrapper exited before the JVM showed up
+            if process.poll() is not None:
+                return None
+            try:
+                wrapper = psutil.Process(process.pid)
+                for child in wrapper.children(recursive=True):
+                    try:
+                        name = child.name().lower()
+                    except (psutil.NoSuchProcess, psutil.AccessDenied):
+                        continue
+                    if name.split('.')[0] in JAVA_PROCESS_NAMES:
+                        return child
+            except psutil.NoSuchProcess:
+                return None
+            await asyncio.sleep(JAVA_RESOLVE_INTERVAL)
+        return None
+    
+    def _wait_in_thread(self, wait_func, name: str) -> asyncio.Future:
+        """Run a blocking wait in a daemon thread and resolve a future when it returns"""
+        # A daemon thread is used instead of the default executor so that a server
+        # which outlives the dashboard never blocks interpreter shutdown
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def resolve(result, error):
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        
+        def runner():
+            result, error = None, None
+            try:
+                result = wait_func()
+            except Exception as e:
+                error = e
+            try:
+                loop.call_soon_threadsafe(resolve, result, error)
+            except RuntimeError:
+                # Event loop already closed
+                pass
+        
+        threading.Thread(target=runner, name=name, daemon=True).start()
+        return future
+    
+    async def _watch(self, server_name: str, process_info: dict) -> None:
+        """Wait for the server process to exit and publish SERVER_CRASHED if it was unexpected"""
+        process = process_info.get('process')
+        if not process:
+            return
+        
+        exit_code = None
+        try:
+            java_process = await self._resolve_java_process(process)
+            if java_process:
+                process_info['java_pid'] = java_process.pid
+                process_info['java_process'] = java_process
+                print(f"Watching JVM of server {server_name} (pid {java_process.pid})")
+                exit_code = await self._wait_in_thread(java_process.wait, f"exit-watcher-{server_name}")
+            else:
+                print(f"JVM of server {server_name} not found, watching wrapper process (pid {process.pid})")
+                exit_code = await self._wait_in_thread(process.wait, f"exit-watcher-{server_name}")
+        except asyncio.CancelledError:
+            raise
+        except psutil.NoSuchProcess:
+            # Process exited between resolving and waiting
+            exit_code = process.poll()
+        except Exception as e:
+            print(f"Error watching process for server {server_name}: {e}")
+        
+        process_info['exit_code'] = exit_code
+        process_info['exited'].set()
+        if self._tasks.get(server_name) is asyncio.current_task():
+            del self._tasks[server_name]
+        
+        # Stops requested through the dashboard are not crashes
+        if process_info.get('stopping'):
+            print(f"Server {server_name} exited with code {exit_code} after a stop request")
+            return
+        
+        print(f"Server {server_name} exited unexpectedly with code {exit_code}")
+        await event_bus.publish(SERVER_CRASHED, server_name=server_name, exit_code=exit_code)
+
+# Create a global process watcher instance
+process_watcher = ProcessWatcher()
@@ -0,0 +1,114 @@
+import socket
+
+# RCON protocol constants
+RCON_TYPE_AUTH = 3
+RCON_TYPE_AUTH_RESPONSE = 2
+RCON_TYPE_COMMAND = 2
+RCON_TYPE_RESPONSE_VALUE = 0
+
+class RCONClient:
+    """RCON client for Minecraft servers"""
+    
+    def __init__(self, host='localhost', port=25575, password=''):
+        self.host = host
+        self.port = int(port)  # Ensure port is integer
+        self.password = password
+        self.socket = None
+    
+    def connect(self):
+        """Connect to the RCON server"""
+        try:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.settimeout(5)
+            self.socket.connect((self.host, self.port))
+            return True
+        except Exception as e:
+            print(f"Failed to connect to RCON: {e}")
+            return False
+    
+    def authenticate(self):
+        """Authenticate with the RCON server"""
+        if not self.socket:
+            if not self.connect():
+                return False
+        
+        try:
+            # Send auth request
+            auth_packet = self._build_packet(1, RCON_TYPE_AUTH, self.password)
+            self.socket.send(auth_packet)
+            
+            # Receive response
+            response = self._receive_packet()
+            if response['request_id'] == -1:
+                return False  # Authentication failed
+            return True
+        except Exception as e:
+            print(f"RCON authentication failed: {e}")
+            return False
+    
+    def send_command(self, command):
+        """Send a command to the RCON server"""
+        if not self.socket:
+            if not self.connect():
+                return None
+        
+        try:
+            # Send command packet
+            command_packet = self._build_packet(2, RCON_TYPE_COMMAND, command)
+            self.socket.send(command_packet)
+            
+            # Receive response
+            response = self._receive_packet()
+            return response['payload']
+        except Exception as e:
+            print(f"Failed to send RCON command: {e}")
+            return None
+    
+    def close(self):
+        """Close the RCON connection"""
+        if self.socket:
+            try:
+                self.socket.close()
+            except Exception as e:
+                print(f"Error closing RCON socket: {e}")
+            self.socket = None
+    
+    def _build_packet(self, request_id, packet_type, payload):
+        """Build an RCON packet"""
+        # Packet structure: Length (4 bytes) + Request ID (4 bytes) + Type (4 bytes) + Payload + 2 null bytes
+        payload_bytes = payload.encode('utf-8')
+        packet_size = 4 + 4 + len(payload_bytes) + 2  # Request ID + Type + Payload + 2 null bytes
+        
+        packet = bytearray()
+        packet.extend(packet_size.to_bytes(4, byteorder='little'))
+        packet.extend(request_id.to_bytes(4, byteorder='little'))
+        packet.extend(packet_type.to_bytes(4, byteorder='little'))
+        packet.extend(payload_bytes)
+        packet.extend(b'\x00\x00')  # Two null bytes at the end
+        
+        return packet
+    
+    def _receive_packet(self):
+        """Receive an RCON packet"""
+        # Read length
+        length_bytes = self.socket.recv(4)
+        if not length_bytes:
+            raise ConnectionError("Connection closed by server")
+        
+        length = int.from_bytes(length_bytes, byteorder='little')
+        
+        # Read the rest of the packet
+        packet = self.socket.recv(length)
+        if len(packet) < length:
+            raise ConnectionError("Incomplete packet received")
+        
+        # Parse packet
+        request_id = int.from_bytes(packet[:4], byteorder='little')
+        packet_type = int.from_bytes(packet[4:8], byteorder='little')
+        payload = packet[8:-2].decode('utf-8', errors='replace')
+        
+        return {
+            'request_id': request_id,
+            'type': packet_type,
+            'payload': payload
+        }
@@ -0,0 +1,344 @@
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .command_queue import MAX_BATCH_SIZE
+
+# File under <server>/Fallenmoon/ holding the jobs of a server and their last run
+SCHEDULE_FILE = 'schedule.json'
+# Default upper bound (in seconds) of the random delay added to each run
+DEFAULT_JITTER = 30.0
+# Shortest allowed interval between two runs of an interval job
+MIN_INTERVAL = 10.0
+# Seconds the scheduler sleeps at most, so clock changes are picked up
+MAX_SLEEP = 60.0
+# Actions a job can run
+JOB_ACTIONS = ('command', 'restart')
+
+# Ranges of the cron fields: minute, hour, day of month, month, day of week (0 and 7 are Sunday)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+CRON_ALIASES = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *'
+}
+
+class CronExpression:
+    """A five-field cron expression (minute hour day month weekday) in local time"""
+    
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f'Cron expression needs 5 fields: {expression!r}')
+        minutes, hours, days, months, weekdays = (
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS))
+        self.minutes = minutes
+        self.hours = hours
+        self.days = days
+        self.months = months
+        # Sunday may be written as 0 or 7
+        self.weekdays = {weekday % 7 for weekday in weekdays}
+        # Like Vixie cron, a restricted day of month and day of week match when either matches
+        self._days_restricted = fields[2] != '*'
+        self._weekdays_restricted = fields[4] != '*'
+    
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        """Parse one field made of comma separated values, ranges and steps"""
+        values = set()
+        for part in field.split(','):
+            value_range, _, step = part.partition('/')
+            step = int(step) if step else 1
+            if value_range == '*':
+                start, end = low, high
+            elif '-' in value_range:
+                start, end = (int(value) for value in value_range.split('-', 1))
+            else:
+                start = int(value_range)
+                # "5/15" means every 15 starting at 5
+                end = high if step > 1 else start
+            if step < 1 or start < low or end > high or start > end:
+                raise ValueError(f'Invalid cron field: {field!r}')
+            values.update(range(start, end + 1, step))
+        return values
+    
+    def _day_matches(self, moment: datetime) -> bool:
+        """Check the day of month and day of week of a date"""
+        day_ok = moment.day in self.days
+        # datetime counts weekdays from Monday = 0, cron from Sunday = 0
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+    
+    def next_after(self, moment: datetime) -> datetime:
+        """Get the first matching minute strictly after a moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Jump over whole months, days and hours that can't match; a few years covers every valid expression
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f'Cron expression never matches: {self.expression!r}')
+
+class ScheduledJob:
+    """One job of a server: an action run on a cron expression or a fixed interval"""
+    
+    def __init__(self, server_name: str, config: Dict[str, Any]):
+        self.server_name = server_name
+        self.id = str(config.get('id') or uuid.uuid4().hex[:12])
+        self.name = str(config.get('name') or self.id)
+        self.action = config.get('action', 'command')
+        if self.action not in JOB_ACTIONS:
+            raise ValueError(f'Unknown job action: {self.action!r}')
+        self.commands = [str(command).strip() for command in config.get('commands') or [] if str(command).strip()]
+        if self.action == 'command' and not self.commands:
+            raise ValueError(f'Job {self.name} has no commands')
+        if len(self.commands) > MAX_BATCH_SIZE:
+            raise ValueError(f'Job {self.name} has {len(self.commands)} commands, at most {MAX_BATCH_SIZE} are allowed')
+        self.cron = CronExpression(config['cron']) if config.get('cron') else None
+        self.interval = float(config['interval']) if config.get('interval') else None
+        if (self.cron is None) == (self.interval is None):
+            raise ValueError(f'Job {self.name} needs either a cron expression or an interval')
+        if self.interval is not None and self.interval < MIN_INTERVAL:
+            raise ValueError(f'Job {self.name} interval must be at least {MIN_INTERVAL:.0f} seconds')
+        self.jitter = max(0.0, float(config.get('jitter', DEFAULT_JITTER)))
+        self.enabled = bool(config.get('enabled', True))
+        # State of the last run, kept across dashboard restarts
+        self.last_run: Optional[float] = config.get('last_run')
+        self.last_result: Optional[str] = config.get('last_result')
+        self.last_ok: Optional[bool] = config.get('last_ok')
+        self.next_run: Optional[float] = None
+        self.running = False
+    
+    def schedule_next(self, now: float) -> None:
+        """Compute the next run time, including a fresh random jitter"""
+        if self.cron is not None:
+            base = self.cron.next_after(datetime.fromtimestamp(now)).timestamp()
+        elif self.last_run is not None:
+            # Interval jobs keep their cadence across restarts, but a missed run is not replayed twice
+            base = max(self.last_run + self.interval, now)
+        else:
+            base = now + self.interval
+        # Spread runs of many servers, so they don't all save-all in the same second
+        self.next_run = base + random.uniform(0, self.jitter)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the job to a JSON-serializable dict"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'action': self.action,
+            'commands': self.commands,
+            'cron': self.cron.expression if self.cron else None,
+            'interval': self.interval,
+            'jitter': self.jitter,
+            'enabled': self.enabled,
+            'last_run': self.last_run,
+            'last_result': self.last_result,
+            'last_ok': self.last_ok
+        }
+
+class Scheduler:
+    """Run scheduled jobs of every server from a single asyncio task"""
+    
+    def __init__(self, run_job: Callable[[ScheduledJob], Awaitable[Tuple[str, bool]]],
+                 servers_dir: str = 'cached_minecraft_servers'):
+        # run_job(job) runs the action of a job and returns (result, ok)
+        self._run_job = run_job
+        self._servers_dir = servers_dir
+        # Dictionary mapping server names to their jobs
+        self._jobs: Dict[str, List[ScheduledJob]] = {}
+        # Job runs in flight, kept so they are not garbage collected
+        self._running: Set[asyncio.Task] = set()
+        # Set when jobs change, so the loop recomputes how long to sleep
+        self._changed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def _schedule_path(self, server_name: str) -> str:
+        """Get the path of the schedule file of a server"""
+        return os.path.join(self._servers_dir, server_name, 'Fallenmoon', SCHEDULE_FILE)
+    
+    def load_all(self) -> None:
+        """Load the schedule files of every server directory"""
+        if not os.path.isdir(self._servers_dir):
+            return
+        for server_name in os.listdir(self._servers_dir):
+            if os.path.isfile(self._schedule_path(server_name)):
+                self.load(server_name)
+    
+    def load(self, server_name: str) -> List[ScheduledJob]:
+        """Load the jobs of a server from its schedule file, skipping invalid ones"""
+        jobs = []
+        try:
+            with open(self._schedule_path(server_name), 'r', encoding='utf-8') as f:
+                configs = json.load(f).get('jobs', [])
+        except FileNotFoundError:
+            configs = []
+        except (OSError, ValueError) as e:
+            print(f"Error reading schedule of server {server_name}: {e}")
+            configs = []
+        
+        now = time.time()
+        for config in configs:
+            try:
+                job = ScheduledJob(server_name, config)
+                job.schedule_next(now)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Skipping invalid scheduled job of server {server_name}: {e}")
+                continue
+            jobs.append(job)
+        
+        self._jobs[server_name] = jobs
+        self._wake()
+        return jobs
+    
+    def save(self, server_name: str) -> None:
+        """Write the jobs of a server and their last run to its schedule file"""
+        path = self._schedule_path(server_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first, so a crash never leaves a truncated schedule behind
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'jobs': [job.to_dict() for job in self._jobs.get(server_name, [])]},
+                      f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, path)
+    
+    def set_jobs(self, server_name: str, configs: List[Dict[str, Any]]) -> List[ScheduledJob]:
+        """Replace the jobs of a server; raises ValueError if a job is invalid"""
+        previous = {job.id: job for job in self._jobs.get(server_name, [])}
+        now = time.time()
+        jobs = []
+        for config in configs:
+            job = ScheduledJob(server_name, config)
+            old = previous.get(job.id)
+            if old is not None:
+                # The client may not send the run state back, keep it; a run still in progress
+                # marks the new job as running too, so the loop does not start it a second time
+                job.last_run = old.last_run
+                job.last_result = old.last_result
+                job.last_ok = old.last_ok
+                job.running = old.running
+            job.schedule_next(now)
+            jobs.append(job)
+        
+        self._jobs[server_name] = jobs
+        self.save(server_name)
+        self._wake()
+        return jobs
+    
+    def jobs(self, server_name: str) -> List[ScheduledJob]:
+        """Get the jobs of a server"""
+        return list(self._jobs.get(server_name, []))
+    
+    def find(self, server_name: str, job_id: str) -> Optional[ScheduledJob]:
+        """Get a job of a server by id"""
+        for job in self._jobs.get(server_name, []):
+            if job.id == job_id:
+                return job
+        return None
+    
+    def start(self) -> None:
+        """Load every schedule and start the scheduler loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._changed = asyncio.Event()
+        self.load_all()
+        self._task = asyncio.create_task(self._loop())
+    
+    def run_now(self, job: ScheduledJob) -> bool:
+        """Run a job right away; return False if it is already running"""
+        if job.running:
+            return False
+        self._launch(job)
+        return True
+    
+    def _wake(self) -> None:
+        """Make the loop recompute its sleep after the jobs changed"""
+        if self._changed is not None:
+            self._changed.set()
+    
+    def _launch(self, job: ScheduledJob) -> None:
+        """Run a job in its own task, so a slow job never delays the others"""
+        job.running = True
+        task = asyncio.create_task(self._run(job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+    
+    async def _loop(self) -> None:
+        """Sleep until the next job is due, then launch every due job"""
+        while True:
+            now = time.time()
+            next_run = None
+            for jobs in list(self._jobs.values()):
+                for job in jobs:
+                    if not job.enabled or job.next_run is None:
+                        continue
+                    if job.next_run <= now:
+                        if job.running:
+                            # Never overlap two runs of the same job
+                            job.schedule_next(now)
+                        else:
+                            self._launch(job)
+                            continue
+                    if next_run is None or job.next_run < next_run:
+                        next_run = job.next_run
+            
+            delay = MAX_SLEEP if next_run is None else min(max(next_run - now, 0.0), MAX_SLEEP)
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _run(self, job: ScheduledJob) -> None:
+        """Run a job and record its result"""
+        started = time.time()
+        # Schedule the following run from the planned start, before a long job finishes
+        job.last_run = started
+        job.schedule_next(started)
+        self._wake()
+        try:
+            result, ok = await self._run_job(job)
+        except Exception as e:
+            result, ok = f'Error: {e}', False
+        job.last_result = result
+        job.last_ok = ok
+        job.running = False
+        # Saving the schedule while the job ran replaced it with a new job of the same id
+        current = self.find(job.server_name, job.id)
+        if current is not None and current is not job:
+            current.last_run = job.last_run
+            current.last_result = result
+            current.last_ok = ok
+            current.running = False
+        print(f"Scheduled job {job.name} on server {job.server_name} finished "
+              f"in {time.time() - started:.1f}s: {'ok' if ok else 'failed'}")
+        
+        # The job may have been removed while it was running
+        if current is not None:
+            try:
+                self.save(job.server_name)
+            except OSError as e:
+                print(f"Error saving schedule of server {job.server_name}: {e}")
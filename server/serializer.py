@@ -0,0 +1,102 @@
+import json
+from typing import Any, Callable, Dict, Optional
+
+# Try to import orjson, which is several times faster than the json module
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+# Try to import msgpack for the optional binary MessagePack encoding
+try:
+    import msgpack
+    msgpack_available = True
+except ImportError:
+    msgpack_available = False
+
+ENCODING_JSON = 'json'
+ENCODING_MSGPACK = 'msgpack'
+
+def dumps_json(data) -> bytes:
+    """Serialize data to compact UTF-8 JSON bytes"""
+    if orjson_available:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def dumps_msgpack(data) -> bytes:
+    """Serialize data to MessagePack bytes"""
+    return msgpack.packb(data, use_bin_type=True)
+
+def serialize(data, encoding: str = ENCODING_JSON):
+    """Serialize a message for the wire; pre-encoded str or bytes frames are passed through"""
+    if isinstance(data, (str, bytes)):
+        return data
+    if encoding == ENCODING_MSGPACK:
+        return dumps_msgpack(data)
+    return dumps_json(data)
+
+class Frame:
+    """A message together with its wire encodings, each computed at most once"""
+    
+    __slots__ = ('data', '_encoder', '_encoded')
+    
+    def __init__(self, data, encoder: Optional[Callable[[str], Any]] = None):
+        self.data = data
+        # encoder(encoding) builds the wire form, defaults to serialize(data, encoding)
+        self._encoder = encoder
+        # Dictionary mapping encodings to the serialized frame
+        self._encoded: Dict[str, Any] = {}
+    
+    @property
+    def type(self) -> str:
+        """Get the message type, for logging"""
+        return self.data.get('type', 'unknown') if isinstance(self.data, dict) else 'pre-encoded'
+    
+    def encode(self, encoding: str = ENCODING_JSON):
+        """Get the frame serialized with an encoding"""
+        message = self._encoded.get(encoding)
+        if message is None:
+            if self._encoder is not None:
+                message = self._encoder(encoding)
+            else:
+                message = serialize(self.data, encoding)
+            self._encoded[encoding] = message
+        return message
+    
+    def cached(self, encoding: str = ENCODING_JSON):
+        """Get the frame serialized with an encoding if that was already done, otherwise None"""
+        return self._encoded.get(encoding)
+
+def to_frame(data) -> Frame:
+    """Wrap a message dict (or pre-encoded frame) in a Frame"""
+    return data if isinstance(data, Frame) else Frame(data)
+
+class Envelope:
+    """Pre-encoded template of a {'type': ..., field: value} message, only the value is serialized per frame"""
+    
+    def __init__(self, message_type: str, field: str):
+        self.message_type = message_type
+        self.field = field
+        # Serialize the envelope once with a null value and cut the value off
+        self._json_prefix = dumps_json({'type': message_type, field: None})[:-len(b'null}')]
+    
+    def encode(self, value, encoding: str = ENCODING_JSON) -> bytes:
+        """Serialize a message with the given value"""
+        # orjson and msgpack serialize the small dict faster than the template can be joined,
+        # the template only pays off for the stdlib json fallback
+        if encoding == ENCODING_MSGPACK:
+            return dumps_msgpack({'type': self.message_type, self.field: value})
+        if orjson_available:
+            return orjson.dumps({'type': self.message_type, self.field: value})
+        return self._json_prefix + json.dumps(value, ensure_ascii=False).encode('utf-8') + b'}'
+    
+    def frame(self, value) -> Frame:
+        """Build a frame with the given value"""
+        return Frame({'type': self.message_type, self.field: value}, lambda encoding: self.encode(value, encoding))
+
+# Envelopes of hot message types
+LOG_ENVELOPE = Envelope('server_log', 'log')
+
+# The heartbeat never changes, so its encodings are built once and reused
+HEARTBEAT_FRAME = Frame({'type': 'heartbeat'})
@@ -0,0 +1,366 @@
+import asyncio
+import json
+import os
+import re
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import psutil
+
+# Directory under <server>/Fallenmoon/ holding one JSON bundle per incident
+INCIDENTS_DIR = 'incidents'
+# Incident bundles kept per server, the oldest are deleted first
+MAX_INCIDENTS = 100
+# A tick taking longer than this (ms) is lag players notice
+MSPT_THRESHOLD = 50.0
+# Once the baseline is known, a spike must also exceed its P95 by this factor, so a server
+# that always runs at 60 ms is not one endless incident
+SPIKE_FACTOR = 1.5
+# MSPT samples of the rolling baseline, and how many it needs before it is trusted
+BASELINE_SAMPLES = 300
+MIN_BASELINE_SAMPLES = 20
+# Seconds MSPT must stay below the threshold before an incident is closed
+RECOVERY_SECONDS = 15.0
+# Seconds after an incident closed before another one is opened on the same server
+INCIDENT_COOLDOWN = 120.0
+# Upper bound of one incident, a server stuck in lag is still written down eventually
+MAX_INCIDENT_SECONDS = 600.0
+# MSPT and host samples kept per incident
+MAX_INCIDENT_SAMPLES = 600
+# Log context: bytes read from latest.log and lines kept before and after the spike
+LOG_CONTEXT_BYTES = 64 * 1024
+LOG_CONTEXT_LINES = 200
+# spark profiler run started on a spike, it uploads its report when the timeout ends
+SPARK_PROFILE_SECONDS = 30
+SPARK_COMMAND = f'spark profiler start --timeout {SPARK_PROFILE_SECONDS} --only-ticks-over {int(MSPT_THRESHOLD)}'
+# The viewer link spark logs once the profile is uploaded
+SPARK_URL = re.compile(r'https://spark\.lucko\.me/\w+')
+
+class RollingPercentiles:
+    """Percentiles over the last N values, kept sorted so a lookup is O(1) and an update O(N)"""
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._values: Deque[float] = deque()
+        self._sorted: List[float] = []
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def add(self, value: float) -> None:
+        """Add a value, dropping the oldest one once the window is full"""
+        self._values.append(value)
+        insort(self._sorted, value)
+        if len(self._values) > self.size:
+            oldest = self._values.popleft()
+            del self._sorted[bisect_left(self._sorted, oldest)]
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Get the value below which the given fraction of the window lies (nearest rank)"""
+        if not self._sorted:
+            return None
+        return self._sorted[min(len(self._sorted) - 1, int(round(fraction * (len(self._sorted) - 1))))]
+    
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Get P50, P95 and P99 of the window"""
+        return {'p50': self.percentile(0.5), 'p95': self.percentile(0.95), 'p99': self.percentile(0.99)}
+
+class _ServerSpikes:
+    """Baseline and open incident of one server"""
+    
+    def __init__(self):
+        self.baseline = RollingPercentiles(BASELINE_SAMPLES)
+        self.incident: Optional[Dict[str, Any]] = None
+        self.last_high = 0.0
+        self.closed_at = 0.0
+
+def _read_log_tail(path: str) -> Tuple[List[str], int]:
+    """Get the last lines of a log and its current size"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            f.seek(max(0, end - LOG_CONTEXT_BYTES))
+            data = f.read()
+    except OSError:
+        return [], 0
+    lines = data.decode('utf-8', errors='ignore').splitlines()
+    if end > LOG_CONTEXT_BYTES:
+        # The first line was cut in half
+        lines = lines[1:]
+    return lines[-LOG_CONTEXT_LINES:], end
+
+def _read_log_from(path: str, offset: int) -> List[str]:
+    """Get the lines written to a log after an offset"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < offset:
+                # latest.log was rotated meanwhile
+                return []
+            f.seek(offset)
+            data = f.read(LOG_CONTEXT_BYTES)
+    except OSError:
+        return []
+    return data.decode('utf-8', errors='ignore').splitlines()[:LOG_CONTEXT_LINES]
+
+def _find_spark_url(path: str, offset: int) -> Optional[str]:
+    """Find the first spark viewer link logged after an offset, however much was logged since"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < offset:
+                # latest.log was rotated meanwhile, the link is in the new one
+                offset = 0
+            f.seek(offset)
+            for line in f:
+                url = SPARK_URL.search(line.decode('utf-8', errors='ignore'))
+                if url:
+                    return url.group(0)
+    except OSError:
+        pass
+    return None
+
+def _host_sample() -> Dict[str, Any]:
+    """Get host CPU and memory usage without blocking, for servers whose host metrics are not polled"""
+    # interval=None compares against the previous call instead of sleeping
+    return {'cpu_usage': psutil.cpu_percent(interval=None), 'memory_usage': psutil.virtual_memory().percent}
+
+def _host_snapshot(pid: Optional[int]) -> Dict[str, Any]:
+    """Collect host CPU, memory and disk IO plus the CPU, memory and threads of the server process tree"""
+    processes = []
+    if pid:
+        try:
+            # The java process may be a child of the start script
+            process = psutil.Process(pid)
+            processes = [process] + process.children(recursive=True)
+            # The first cpu_percent call of a process only starts its measurement
+            for child in processes:
+                child.cpu_percent(interval=None)
+        except (psutil.Error, OSError):
+            processes = []
+    
+    cpu_usage = psutil.cpu_percent(interval=0.2)
+    disk_io = psutil.disk_io_counters()
+    memory = psutil.virtual_memory()
+    snapshot: Dict[str, Any] = {
+        'time': time.time(),
+        'cpu_usage': cpu_usage,
+        'cpu_per_core': psutil.cpu_percent(percpu=True),
+        'memory_usage': memory.percent,
+        'memory_used': memory.used,
+        'swap_usage': psutil.swap_memory().percent,
+        # Cumulative counters, the rate is the difference between two snapshots
+        'disk_io': {
+            'read_bytes': disk_io.read_bytes,
+            'write_bytes': disk_io.write_bytes,
+            'busy_time': getattr(disk_io, 'busy_time', None)
+        } if disk_io else None
+    }
+    if processes:
+        try:
+            snapshot['process'] = {
+                'cpu_percent': sum(child.cpu_percent(interval=None) for child in processes),
+                'memory_rss': sum(child.memory_info().rss for child in processes),
+                'threads': sum(child.num_threads() for child in processes)
+            }
+        except (psutil.Error, OSError):
+            pass
+    return snapshot
+
+class SpikeDetector:
+    """Detect MSPT spikes against a rolling baseline and store an incident bundle for each of them"""
+    
+    def __init__(self, run_command: Callable[[str, str], Awaitable[Tuple[str, bool]]],
+                 notify: Callable[[Dict[str, Any]], Awaitable[None]],
+                 servers_dir: str = 'cached_minecraft_servers'):
+        # run_command(server_name, command) sends a console command and returns (result, ok)
+        self._run_command = run_command
+        # notify(message) tells clients about a spike or a stored incident
+        self._notify = notify
+        self._servers_dir = servers_dir
+        # Dictionary mapping server names to their baseline and open incident
+        self._servers: Dict[str, _ServerSpikes] = {}
+        # Capture tasks in flight, kept so they are not garbage collected
+        self._captures: Set[asyncio.Task] = set()
+    
+    def _incidents_dir(self, server_name: str) -> str:
+        """Get the incident directory of a server"""
+        return os.path.join(self._servers_dir, server_name, 'Fallenmoon', INCIDENTS_DIR)
+    
+    def threshold(self, server_name: str) -> float:
+        """Get the MSPT above which a sample of a server is a spike"""
+        state = self._servers.get(server_name)
+        if state is None or len(state.baseline) < MIN_BASELINE_SAMPLES:
+            return MSPT_THRESHOLD
+        return max(MSPT_THRESHOLD, state.baseline.percentile(0.95) * SPIKE_FACTOR)
+    
+    def observe(self, server_name: str, mspt: float, host_info: Optional[Dict[str, Any]] = None,
+                pid: Optional[int] = None, spark_installed: bool = False) -> None:
+        """Feed one MSPT sample of a server, with the host metrics polled alongside it if there are any"""
+        now = time.time()
+        if host_info is None:
+            host_info = _host_sample()
+        state = self._servers.setdefault(server_name, _ServerSpikes())
+        threshold = self.threshold(server_name)
+        sample = {'time': now, 'mspt': mspt, 'cpu_usage': host_info.get('cpu_usage'),
+                  'memory_usage': host_info.get('memory_usage')}
+        
+        incident = state.incident
+        if incident is not None:
+            if len(incident['samples']) < MAX_INCIDENT_SAMPLES:
+                incident['samples'].append(sample)
+            if mspt >= incident['threshold']:
+                state.last_high = now
+                incident['peak_mspt'] = max(incident['peak_mspt'], mspt)
+                incident['spike_samples'] += 1
+            return
+        
+        if mspt < threshold:
+            state.baseline.add(mspt)
+            return
+        # Spikes stay out of the baseline, they would raise the threshold they are measured against
+        if now - state.closed_at < INCIDENT_COOLDOWN:
+            return
+        
+        state.last_high = now
+        state.incident = {
+            'id': time.strftime('%Y%m%d-%H%M%S', time.localtime(now)),
+            'server_name': server_name,
+            'started_at': now,
+            'ended_at': None,
+            'threshold': threshold,
+            'peak_mspt': mspt,
+            'spike_samples': 1,
+            'baseline': state.baseline.summary(),
+            'samples': [sample],
+            'host': [],
+            'log_before': [],
+            'log_after': [],
+            'spark': None
+        }
+        print(f"MSPT spike on server {server_name}: {mspt:.1f} ms (threshold {threshold:.1f} ms)")
+        task = asyncio.create_task(self._capture(server_name, state, pid, spark_installed))
+        self._captures.add(task)
+        task.add_done_callback(self._captures.discard)
+    
+    async def _capture(self, server_name: str, state: _ServerSpikes, pid: Optional[int],
+                       spark_installed: bool) -> None:
+        """Collect the context of an open incident until the server recovers, then store its bundle"""
+        incident = state.incident
+        loop = asyncio.get_running_loop()
+        latest_log = os.path.join(self._servers_dir, server_name, 'logs', 'latest.log')
+        try:
+            await self._notify({
+                'type': 'lag_spike',
+                'server_name': server_name,
+                'incident_id': incident['id'],
+                'mspt': incident['peak_mspt'],
+                'threshold': incident['threshold']
+            })
+            
+            incident['log_before'], log_offset = await loop.run_in_executor(None, _read_log_tail, latest_log)
+            incident['host'].append(await loop.run_in_executor(None, _host_snapshot, pid))
+            
+            if spark_installed:
+                # Profile the ticks that are still slow; spark uploads the report when it stops
+                result, ok = await self._run_command(server_name, SPARK_COMMAND)
+                incident['spark'] = {'command': SPARK_COMMAND, 'ok': ok, 'result': result, 'url': None}
+            spark_done = time.time() + (SPARK_PROFILE_SECONDS + 10 if spark_installed else 0)
+            
+            # Keep sampling the host until MSPT stayed low for a while and spark had time to upload
+            while True:
+                await asyncio.sleep(5)
+                now = time.time()
+                if now - incident['started_at'] >= MAX_INCIDENT_SECONDS:
+                    break
+                if now - state.last_high >= RECOVERY_SECONDS and now >= spark_done:
+                    break
+                if len(incident['host']) < MAX_INCIDENT_SAMPLES:
+                    incident['host'].append(await loop.run_in_executor(None, _host_snapshot, pid))
+            
+            incident['ended_at'] = state.last_high
+            incident['log_after'] = await loop.run_in_executor(None, _read_log_from, latest_log, log_offset)
+            if incident['spark'] is not None:
+                # The link comes after the whole profile, often beyond the context kept in log_after
+                incident['spark']['url'] = await loop.run_in_executor(None, _find_spark_url, latest_log, log_offset)
+            
+            await loop.run_in_executor(None, self._save, server_name, incident)
+            print(f"Stored lag incident {incident['id']} of server {server_name}: "
+                  f"peak {incident['peak_mspt']:.1f} ms over {incident['ended_at'] - incident['started_at']:.0f}s")
+            await self._notify({
+                'type': 'lag_incident',
+                'server_name': server_name,
+                'incident': self._summary(incident)
+            })
+        except Exception as e:
+            print(f"Error capturing lag incident of server {server_name}: {e}")
+        finally:
+            state.incident = None
+            state.closed_at = time.time()
+    
+    def _save(self, server_name: str, incident: Dict[str, Any]) -> None:
+        """Write an incident bundle atomically and prune the oldest bundles"""
+        directory = self._incidents_dir(server_name)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{incident['id']}.json")
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(incident, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        
+        # Bundle ids sort by time
+        bundles = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+        for name in bundles[:-MAX_INCIDENTS]:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _summary(incident: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the fields of an incident shown in lists"""
+        return {
+            'id': incident['id'],
+            'started_at': incident['started_at'],
+            'ended_at': incident['ended_at'],
+            'peak_mspt': incident['peak_mspt'],
+            'threshold': incident['threshold'],
+            'spike_samples': incident['spike_samples'],
+            'spark_url': (incident.get('spark') or {}).get('url')
+        }
+    
+    def incidents(self, server_name: str) -> List[Dict[str, Any]]:
+        """Get the summaries of the stored incidents of a server, newest first (blocking)"""
+        directory = self._incidents_dir(server_name)
+        try:
+            names = sorted((name for name in os.listdir(directory) if name.endswith('.json')), reverse=True)
+        except FileNotFoundError:
+            return []
+        summaries = []
+        for name in names:
+            incident = self.incident(server_name, name[:-len('.json')])
+            if incident is not None:
+                summaries.append(self._summary(incident))
+        return summaries
+    
+    def incident(self, server_name: str, incident_id: str) -> Optional[Dict[str, Any]]:
+        """Read the full bundle of an incident (blocking)"""
+        # Ids are timestamps; anything else could walk out of the incident directory
+        if not re.fullmatch(r'\d{8}-\d{6}', str(incident_id)):
+            return None
+        try:
+            with open(os.path.join(self._incidents_dir(server_name), f'{incident_id}.json'),
+                      'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def forget(self, server_name: str) -> None:
+        """Drop the baseline of a server, a restarted server starts a new one"""
+        state = self._servers.get(server_name)
+        # An incident still being captured keeps its state until it is stored
+        if state is not None and state.incident is None:
+            del self._servers[server_name]
@@ -2,11 +2,36 @@
 let ws = null;
 let connected = false;
 let currentServer = null;
+let currentServerName = null; // Folder name of the connected server, used to match broadcasts
 let selectedServer = null; // Track selected server across all pages
 let memoryChart = null;
 let cpuChart = null;
 let isConnecting = false;
 let serverInfoMap = {}; // Store server info for display names
+let subscribedTopics = new Set(); // Topics this client receives (status:<server>, logs:<server>, metrics:host)
+let statusState = null; // Last status merged from the full snapshot and the deltas after it
+let statusPlatformType = 'Unknown';
+let statusServer = null; // Server of the status stream (null for host metrics only)
+let statusSeq = null; // Sequence number of the last status frame applied
+let statusResyncPending = false;
+let statusFrameRequested = false; // A status render is scheduled for the next animation frame
+let statusRenderPending = false; // Status changed while the page was hidden
+let componentsServerName = null; // Server whose component pages are being shown
+let commandCounter = 0;
+const pendingCommands = new Map(); // request_id -> commands waiting for their command_result
+
+// Virtualized console: lines live in a ring buffer and only the visible rows are in the DOM
+const CONSOLE_MAX_LINES = 50000; // Oldest lines are dropped beyond this
+const CONSOLE_OVERSCAN = 10; // Rows rendered above and below the visible area
+const consoleLines = new Array(CONSOLE_MAX_LINES);
+let consoleStart = 0; // Ring index of the oldest line
+let consoleCount = 0;
+let consolePending = []; // Lines appended since the last animation frame
+let consoleFrameRequested = false;
+let consoleRowHeight = 0; // Measured once the console is visible
+let consoleFollow = true; // Stick to the newest line unless the user scrolled up
+let consoleSpacer = null; // Sized to all lines, so the scrollbar covers the whole buffer
+let consoleRows = null; // Holds the rendered rows, moved to the first visible line
 // WebSocket default settings
 let wsConfig = {
     ip: 'localhost',
@@ -32,6 +57,7 @@ const elements = {
     consoleOutput: document.getElementById('console-output'),
     consoleInput: document.getElementById('console-input'),
     executeBtn: document.getElementById('execute-btn'),
+    logLevelFilter: document.getElementById('log-level-filter'),
     connectionStatus: document.getElementById('connection-status'),
     terminateBtn: document.getElementById('terminate-btn'),
     
@@ -56,6 +82,18 @@ const elements = {
     componentTabBtns: document.querySelectorAll('.component-tab-btn'),
     componentTabContents: document.querySelectorAll('.component-tab-content'),
     
+    // World Analyzer Tab
+    worldServerSelect: document.getElementById('world-server-select'),
+    worldSearchBtn: document.getElementById('world-search-btn'),
+    worldAnalyzeBtn: document.getElementById('world-analyze-btn'),
+    worldResult: document.getElementById('world-result'),
+    
+    // Crash Analyzer Tab
+    crashServerSelect: document.getElementById('crash-server-select'),
+    crashSearchBtn: document.getElementById('crash-search-btn'),
+    crashAnalyzeBtn: document.getElementById('crash-analyze-btn'),
+    crashResult: document.getElementById('crash-result'),
+    
     // Panel Settings Tab
     outputRate: document.getElementById('output-rate'),
     backgroundSelect: document.getElementById('background-select'),
@@ -66,13 +104,34 @@ const elements = {
 
 // Initialize the application
 document.addEventListener('DOMContentLoaded', () => {
+    initializeConsole();
     initializeCharts();
     initializeWebSocket();
     initializeEventListeners();
 });
 
+// Draw the percentage in the middle of a doughnut chart, as part of the chart's own draw
+const centerTextPlugin = {
+    id: 'centerText',
+    afterDraw(chart, args, options) {
+        if (options.value === null || options.value === undefined) {
+            return;
+        }
+        const { ctx, chartArea } = chart;
+        ctx.save();
+        ctx.font = 'bold 24px Arial';
+        ctx.fillStyle = '#ffffff';
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'middle';
+        ctx.fillText(`${options.value.toFixed(1)}%`, (chartArea.left + chartArea.right) / 2, (chartArea.top + chartArea.bottom) / 2);
+        ctx.restore();
+    }
+};
+
 // Initialize charts
 function initializeCharts() {
+    Chart.register(centerTextPlugin);
+
     // Memory Chart
     const memoryCtx = document.getElementById('memory-chart').getContext('2d');
     memoryChart = new Chart(memoryCtx, {
@@ -94,6 +153,9 @@ function initializeCharts() {
                 },
                 tooltip: {
                     enabled: false
+                },
+                centerText: {
+                    value: null
                 }
             },
             animation: {
@@ -124,6 +186,9 @@ function initializeCharts() {
                 },
                 tooltip: {
                     enabled: false
+                },
+                centerText: {
+                    value: null
                 }
             },
             animation: {
@@ -152,7 +217,12 @@ function initializeWebSocket() {
     
     try {
         const wsUrl = `ws://${wsConfig.ip}:${wsConfig.port}`;
-        ws = new WebSocket(wsUrl);
+        // Prefer binary MessagePack frames when the decoder is loaded, plain JSON otherwise
+        const protocols = typeof MessagePack !== 'undefined'
+            ? ['fallenmoon.msgpack', 'fallenmoon.json']
+            : ['fallenmoon.json'];
+        ws = new WebSocket(wsUrl, protocols);
+        ws.binaryType = 'arraybuffer';
         
         ws.onopen = () => {
             console.log('WebSocket connected');
@@ -164,6 +234,15 @@ function initializeWebSocket() {
             isConnecting = false;
             // Start heartbeat checker
             startHeartbeatChecker();
+            // Subscriptions do not survive a reconnect, subscribe again for the active tab
+            subscribedTopics = new Set();
+            statusSeq = null;
+            statusResyncPending = false;
+            updateSubscriptions();
+            // The log filter lives on the server per connection as well
+            if (elements.logLevelFilter && elements.logLevelFilter.value) {
+                sendLogFilter();
+            }
         };
         
         ws.onmessage = (event) => {
@@ -273,7 +352,10 @@ function stopHeartbeatChecker() {
 // Handle WebSocket messages
 function handleWebSocketMessage(message) {
     try {
-        const data = JSON.parse(message);
+        // Binary frames are MessagePack, text frames are JSON
+        const data = typeof message === 'string'
+            ? JSON.parse(message)
+            : MessagePack.decode(new Uint8Array(message));
         
         // Reset heartbeat timeout on any message from server
         startHeartbeatChecker();
@@ -286,27 +368,67 @@ function handleWebSocketMessage(message) {
                 updateServerList(data.servers);
                 break;
             case 'connect_success':
+                currentServerName = data.server_name;
                 handleConnectSuccess(data.server);
+                // The server moves our status and log subscriptions to the connected server
+                subscribedTopics = new Set([...subscribedTopics].filter(topic => topic.startsWith('metrics:')));
+                subscribedTopics.add(`status:${currentServerName}`);
+                subscribedTopics.add(`logs:${currentServerName}`);
+                updateSubscriptions();
                 break;
             case 'server_status':
-                updateServerStatus(data.system_info, data.platform_type);
+                // Ignore frames of a server we are no longer watching
+                if (!data.server_name || data.server_name === currentServerName) {
+                    handleStatusSnapshot(data);
+                }
+                break;
+            case 'server_status_delta':
+                if (!data.server_name || data.server_name === currentServerName) {
+                    handleStatusDelta(data);
+                }
                 break;
             case 'server_log':
                 appendToConsole(data.log);
                 break;
             case 'command_result':
-                appendToConsole(data.result);
+                handleCommandResult(data);
                 break;
             case 'server_stopped':
-                handleServerStopped(data.server_name);
-                resetAdvancedData();
+                // Stop notifications are broadcast to every client, only disconnect from our own server
+                if (connected && data.server_name === currentServerName) {
+                    handleServerStopped(data.server_name);
+                    resetAdvancedData();
+                } else {
+                    showMessage(`服务器 ${data.server_name} 已停止`, 'info');
+                }
+                break;
+            case 'server_stop_progress':
+                showStopProgress(data.server_name, data.stage, data.elapsed);
+                break;
+            case 'bulk_progress':
+                showBulkProgress(data);
+                break;
+            case 'bulk_done':
+                showBulkDone(data.operation, data.results);
                 break;
             case 'server_crashed':
                 // Server has crashed unexpectedly
+                // Disconnect from server and update UI if it is the one we are watching
+                if (connected && data.server_name === currentServerName) {
+                    handleServerStopped(data.server_name);
+                    resetAdvancedData();
+                }
                 showMessage(`服务器 ${data.server_name} 意外停止运行`, 'error');
-                // Disconnect from server and update UI
-                handleServerStopped(data.server_name);
-                resetAdvancedData();
+                break;
+            case 'world_stats':
+                showWorldStats(data);
+                break;
+                
+            case 'crash_analysis':
+                showCrashAnalysis(data);
+                break;
+            case 'log_filter':
+                elements.logLevelFilter.value = data.filter.min_level || '';
                 break;
             case 'server_started':
                 handleServerStarted(data.server_name);
@@ -320,8 +442,22 @@ function handleWebSocketMessage(message) {
             case 'config_saved':
                 showMessage(data.success ? '配置保存成功！' : '配置保存失败！', data.success ? 'success' : 'error');
                 break;
-            case 'components_data':
-                showComponents(data.server_name, data.components);
+            case 'components_begin':
+                beginComponents(data.server_name, data.component_types);
+                break;
+            case 'components_page':
+                appendComponentPage(data);
+                break;
+            case 'components_done':
+                if (data.server_name === componentsServerName) {
+                    showMessage(`成功加载服务器 ${data.server_name} 的组件`, 'success');
+                }
+                break;
+            case 'components_metadata':
+                showComponentMetadata(data);
+                break;
+            case 'components_duplicates':
+                showComponentDuplicates(data);
                 break;
             case 'schematic_deleted':
                 if (data.success) {
@@ -386,7 +522,19 @@ function initializeEventListeners() {
             executeCommand();
         }
     });
+    // Pasting several lines runs them as one batch over the same RCON session
+    elements.consoleInput.addEventListener('paste', (e) => {
+        const text = (e.clipboardData || window.clipboardData).getData('text');
+        const commands = text.split(/\r?\n/).map(line => line.trim()).filter(Boolean);
+        if (commands.length > 1) {
+            e.preventDefault();
+            sendCommands(commands, true);
+        }
+    });
     elements.terminateBtn.addEventListener('click', terminateConnection);
+    if (elements.logLevelFilter) {
+        elements.logLevelFilter.addEventListener('change', sendLogFilter);
+    }
     
     // Server Config Tab Event Listeners
     elements.searchServerBtn.addEventListener('click', searchServers);
@@ -421,6 +569,14 @@ function initializeEventListeners() {
     elements.componentsSearchBtn.addEventListener('click', searchComponentsServers);
     elements.componentsSelectBtn.addEventListener('click', selectComponentsServer);
     
+    // World Analyzer Tab Event Listeners
+    elements.worldSearchBtn.addEventListener('click', searchServers);
+    elements.worldAnalyzeBtn.addEventListener('click', analyzeWorld);
+    
+    // Crash Analyzer Tab Event Listeners
+    elements.crashSearchBtn.addEventListener('click', searchServers);
+    elements.crashAnalyzeBtn.addEventListener('click', analyzeCrash);
+    
     // Component tab switching
     elements.componentTabBtns.forEach(btn => {
         btn.addEventListener('click', () => {
@@ -448,10 +604,40 @@ function switchTab(tabName) {
         }
     });
     
-    // Refresh data if switching to server details tab
-    if (tabName === 'server-details' && connected) {
-        refreshServerStatus();
+    // Only receive the status and log streams of the page being viewed
+    updateSubscriptions(tabName);
+}
+
+// Get the name of the active main tab
+function getActiveTab() {
+    const activeBtn = Array.from(elements.tabBtns).find(btn => btn.classList.contains('active'));
+    return activeBtn ? activeBtn.dataset.tab : null;
+}
+
+// Subscribe to the topics needed by a tab and unsubscribe from the rest
+function updateSubscriptions(tabName = getActiveTab()) {
+    if (!ws || ws.readyState !== WebSocket.OPEN) {
+        return;
     }
+    
+    const wanted = new Set();
+    if (tabName === 'server-details') {
+        wanted.add('metrics:host');
+        if (connected && currentServerName) {
+            wanted.add(`status:${currentServerName}`);
+            wanted.add(`logs:${currentServerName}`);
+        }
+    }
+    
+    const toRemove = [...subscribedTopics].filter(topic => !wanted.has(topic));
+    const toAdd = [...wanted].filter(topic => !subscribedTopics.has(topic));
+    if (toRemove.length) {
+        sendWebSocketMessage('unsubscribe', { topics: toRemove });
+    }
+    if (toAdd.length) {
+        sendWebSocketMessage('subscribe', { topics: toAdd });
+    }
+    subscribedTopics = wanted;
 }
 
 // Switch config tabs
@@ -580,17 +766,93 @@ function handleConnectSuccess(server) {
 }
 
 // Update server status
-function updateServerStatus(systemInfo, platformType) {
+// Apply a full status snapshot
+function handleStatusSnapshot(data) {
+    statusServer = data.server_name || null;
+    statusSeq = data.seq;
+    statusResyncPending = false;
+    updateServerStatus(data.system_info, data.platform_type, true);
+}
+
+// Apply a status delta, or ask for a new snapshot when a frame was lost
+function handleStatusDelta(data) {
+    if (statusSeq === null || statusServer !== (data.server_name || null) || data.seq !== statusSeq + 1) {
+        requestStatusResync(data.server_name);
+        return;
+    }
+    statusSeq = data.seq;
+    const { platform_type: platformType, ...changes } = data.changes;
+    updateServerStatus(changes, platformType);
+}
+
+// Request a full status snapshot once until it arrives
+function requestStatusResync(serverName) {
+    statusSeq = null;
+    if (statusResyncPending) {
+        return;
+    }
+    statusResyncPending = true;
+    sendWebSocketMessage('resync_status', { server_name: serverName || null });
+}
+
+function updateServerStatus(systemInfo, platformType, replace = false) {
+    // Merge delta frames into the last full status
+    statusState = replace || !statusState ? { ...systemInfo } : { ...statusState, ...systemInfo };
+    if (platformType !== undefined) {
+        statusPlatformType = platformType;
+    }
+    scheduleStatusRender();
+}
+
+// Render the merged status on the next animation frame, or once the page is visible again
+function scheduleStatusRender() {
+    if (document.hidden) {
+        statusRenderPending = true;
+        return;
+    }
+    if (!statusFrameRequested) {
+        statusFrameRequested = true;
+        requestAnimationFrame(() => {
+            statusFrameRequested = false;
+            renderServerStatus();
+        });
+    }
+}
+
+// Status updates that arrive while the page is hidden are only merged, not rendered
+document.addEventListener('visibilitychange', () => {
+    if (!document.hidden && statusRenderPending) {
+        statusRenderPending = false;
+        scheduleStatusRender();
+    }
+});
+
+// Set the text of an element only if it changed
+function setText(id, text) {
+    const element = document.getElementById(id);
+    if (element.textContent !== text) {
+        element.textContent = text;
+    }
+}
+
+// Render the latest status; several updates within one frame render once
+function renderServerStatus() {
+    if (!statusState) {
+        return;
+    }
+    const systemInfo = statusState;
+    const platformType = statusPlatformType;
+    
     // Update charts
     updateChart(memoryChart, systemInfo.memory_usage);
     updateChart(cpuChart, systemInfo.cpu_usage);
     
     // Update status items
-    document.getElementById('network-io').textContent = `${formatBytes(systemInfo.network_io.bytes_sent)}/s ↑ / ${formatBytes(systemInfo.network_io.bytes_recv)}/s ↓`;
-    document.getElementById('cpu-info').textContent = `${systemInfo.cpu_frequency.toFixed(0)} MHz / ${systemInfo.cpu_usage.toFixed(1)}%`;
+    setText('network-io', `${formatBytes(systemInfo.network_io.bytes_sent)}/s ↑ / ${formatBytes(systemInfo.network_io.bytes_recv)}/s ↓`);
+    setText('cpu-info', `${systemInfo.cpu_frequency.toFixed(0)} MHz / ${systemInfo.cpu_usage.toFixed(1)}%`);
     
     // Update memory info with actual total memory and usage
-    document.getElementById('memory-info').textContent = `${formatBytes(systemInfo.memory_total)} / ${systemInfo.memory_usage.toFixed(1)}%`;
+    setText('memory-info', `${formatBytes(systemInfo.memory_total)} / ${systemInfo.memory_usage.toFixed(1)}%`);
     
     // Update TPS, MSPT, and players info
     const sparkInstalled = systemInfo.spark_installed;
@@ -598,51 +860,159 @@ function updateServerStatus(systemInfo, platformType) {
     const canDisplayMetrics = connected && (sparkInstalled || platformType === 'Paper');
     
     if (canDisplayMetrics) {
-        document.getElementById('tps').textContent = typeof systemInfo.tps === 'number' ? systemInfo.tps.toFixed(1) : systemInfo.tps;
-        document.getElementById('mspt').textContent = typeof systemInfo.mspt === 'number' ? systemInfo.mspt.toFixed(1) : systemInfo.mspt;
-        document.getElementById('players').textContent = `${systemInfo.players_online}/${systemInfo.players_max}`;
+        setText('tps', typeof systemInfo.tps === 'number' ? systemInfo.tps.toFixed(1) : String(systemInfo.tps));
+        setText('mspt', typeof systemInfo.mspt === 'number' ? systemInfo.mspt.toFixed(1) : String(systemInfo.mspt));
+        setText('players', `${systemInfo.players_online}/${systemInfo.players_max}`);
     } else {
         // Show spark installation message if connected but neither spark is installed nor it's a Paper server
         const sparkMessage = connected ? '安装Spark模组或插件以启用此监控' : '--';
-        document.getElementById('tps').textContent = sparkMessage;
-        document.getElementById('mspt').textContent = sparkMessage;
-        document.getElementById('players').textContent = sparkMessage;
+        setText('tps', sparkMessage);
+        setText('mspt', sparkMessage);
+        setText('players', sparkMessage);
     }
 }
 
 // Update chart
 function updateChart(chart, value) {
+    // Skip the redraw when the shown value did not change
+    const centerText = chart.options.plugins.centerText;
+    if (centerText.value !== null && centerText.value.toFixed(1) === value.toFixed(1)) {
+        return;
+    }
     chart.data.datasets[0].data = [value, 100 - value];
-    chart.update();
-    
-    // Update chart center text (using a custom plugin would be better, but this works for now)
-    const canvas = chart.canvas;
-    const ctx = canvas.getContext('2d');
-    const centerX = canvas.width / 2;
-    const centerY = canvas.height / 2;
+    centerText.value = value;
+    // A single redraw without animation; a one-second animation every second never lets the canvas rest
+    chart.update('none');
+}
+
+// Set up the virtualized console
+function initializeConsole() {
+    consoleSpacer = document.createElement('div');
+    consoleSpacer.className = 'console-spacer';
+    consoleRows = document.createElement('div');
+    consoleRows.className = 'console-rows';
+    consoleSpacer.appendChild(consoleRows);
+    elements.consoleOutput.innerHTML = '';
+    elements.consoleOutput.appendChild(consoleSpacer);
     
-    // Clear the center area
-    ctx.clearRect(centerX - 50, centerY - 20, 100, 40);
+    elements.consoleOutput.addEventListener('scroll', () => {
+        const output = elements.consoleOutput;
+        consoleFollow = output.scrollTop + output.clientHeight >= output.scrollHeight - Math.max(consoleRowHeight, 1);
+        scheduleConsoleRender();
+    }, { passive: true });
     
-    // Draw the percentage text
-    ctx.font = 'bold 24px Arial';
-    ctx.fillStyle = '#ffffff';
-    ctx.textAlign = 'center';
-    ctx.textBaseline = 'middle';
-    ctx.fillText(`${value.toFixed(1)}%`, centerX, centerY);
+    // The console has no size while its tab is hidden, render again once it is shown or resized
+    if (typeof ResizeObserver !== 'undefined') {
+        new ResizeObserver(() => scheduleConsoleRender()).observe(elements.consoleOutput);
+    }
 }
 
 // Append to console
 function appendToConsole(text) {
-    const logLine = document.createElement('div');
-    logLine.textContent = text;
-    elements.consoleOutput.appendChild(logLine);
-    elements.consoleOutput.scrollTop = elements.consoleOutput.scrollHeight;
+    // Lines are batched and written once per animation frame
+    String(text).split('\n').forEach(line => consolePending.push(line));
+    scheduleConsoleRender();
 }
 
 // Clear console
 function clearConsole() {
-    elements.consoleOutput.innerHTML = '';
+    consoleStart = 0;
+    consoleCount = 0;
+    consolePending = [];
+    consoleLines.fill(undefined);
+    consoleFollow = true;
+    scheduleConsoleRender();
+}
+
+// Render the console on the next animation frame
+function scheduleConsoleRender() {
+    if (!consoleFrameRequested) {
+        consoleFrameRequested = true;
+        requestAnimationFrame(flushConsole);
+    }
+}
+
+// Move pending lines into the ring buffer and render the visible rows
+function flushConsole() {
+    consoleFrameRequested = false;
+    const output = elements.consoleOutput;
+    
+    let dropped = 0;
+    if (consolePending.length > 0) {
+        // A burst larger than the buffer only keeps its newest lines
+        const lines = consolePending.length > CONSOLE_MAX_LINES
+            ? consolePending.slice(-CONSOLE_MAX_LINES)
+            : consolePending;
+        consolePending = [];
+        lines.forEach(line => {
+            if (consoleCount < CONSOLE_MAX_LINES) {
+                consoleLines[(consoleStart + consoleCount) % CONSOLE_MAX_LINES] = line;
+                consoleCount++;
+            } else {
+                // Overwrite the oldest line
+                consoleLines[consoleStart] = line;
+                consoleStart = (consoleStart + 1) % CONSOLE_MAX_LINES;
+                dropped++;
+            }
+        });
+    }
+    
+    if (!consoleRowHeight) {
+        consoleRowHeight = measureConsoleRow();
+        if (!consoleRowHeight) {
+            // Hidden tab, the resize observer renders once it is shown
+            return;
+        }
+    }
+    
+    consoleSpacer.style.height = `${consoleCount * consoleRowHeight}px`;
+    if (consoleFollow) {
+        output.scrollTop = output.scrollHeight;
+    } else if (dropped > 0) {
+        // Keep the lines the user is reading in place while old lines drop off the top
+        output.scrollTop -= dropped * consoleRowHeight;
+    }
+    
+    renderConsoleRows();
+}
+
+// Measure the height of one console row
+function measureConsoleRow() {
+    const probe = document.createElement('div');
+    probe.className = 'console-line';
+    probe.textContent = 'M';
+    consoleRows.appendChild(probe);
+    const height = probe.getBoundingClientRect().height;
+    probe.remove();
+    return height;
+}
+
+// Render the rows in and around the visible area, reusing the existing row nodes
+function renderConsoleRows() {
+    const output = elements.consoleOutput;
+    const top = Math.max(0, output.scrollTop - consoleSpacer.offsetTop);
+    const first = Math.max(0, Math.floor(top / consoleRowHeight) - CONSOLE_OVERSCAN);
+    const last = Math.min(consoleCount, Math.ceil((top + output.clientHeight) / consoleRowHeight) + CONSOLE_OVERSCAN);
+    const rowCount = Math.max(0, last - first);
+    
+    while (consoleRows.childElementCount < rowCount) {
+        const row = document.createElement('div');
+        row.className = 'console-line';
+        consoleRows.appendChild(row);
+    }
+    while (consoleRows.childElementCount > rowCount) {
+        consoleRows.lastElementChild.remove();
+    }
+    
+    consoleRows.style.transform = `translateY(${first * consoleRowHeight}px)`;
+    const rows = consoleRows.children;
+    for (let i = 0; i < rowCount; i++) {
+        const text = consoleLines[(consoleStart + first + i) % CONSOLE_MAX_LINES];
+        // Only touch rows whose text changed, so scrolling within the overscan costs no DOM writes
+        if (rows[i].textContent !== text) {
+            rows[i].textContent = text;
+        }
+    }
 }
 
 // Execute command
@@ -657,9 +1027,52 @@ function executeCommand() {
         return;
     }
     
-    sendWebSocketMessage('execute_command', { command });
+    sendCommands([command], false);
     elements.consoleInput.value = '';
-    appendToConsole(`> ${command}`);
+}
+
+// Ask the server to only send log lines at or above the selected level
+function sendLogFilter() {
+    sendWebSocketMessage('set_log_filter', { min_level: elements.logLevelFilter.value || null });
+}
+
+// Send commands to the connected server, tagged with a request id to match the results
+function sendCommands(commands, batch) {
+    if (!connected) {
+        showMessage('未连接到服务器', 'error');
+        return;
+    }
+    
+    commandCounter += 1;
+    const requestId = `cmd-${Date.now().toString(36)}-${commandCounter}`;
+    pendingCommands.set(requestId, commands);
+    
+    if (batch) {
+        sendWebSocketMessage('execute_command', { commands, server_name: currentServerName, request_id: requestId });
+        appendToConsole(`> [批量执行 ${commands.length} 条指令]`);
+    } else {
+        sendWebSocketMessage('execute_command', { command: commands[0], server_name: currentServerName, request_id: requestId });
+        appendToConsole(`> ${commands[0]}`);
+    }
+}
+
+// Show the result of one command
+function handleCommandResult(data) {
+    const commands = pendingCommands.get(data.request_id);
+    if (data.done) {
+        pendingCommands.delete(data.request_id);
+    }
+    
+    // Batch results are echoed with their command, they arrive one by one
+    if (data.batch && data.command) {
+        appendToConsole(`> ${data.command}`);
+    }
+    if (data.ok === false) {
+        const label = commands && commands.length > 1 && data.command ? `${data.command}: ` : '';
+        appendToConsole(`[!] ${label}${data.result}`);
+    } else {
+        appendToConsole(data.result);
+    }
 }
 
 // Terminate connection (only disconnect client from server, don't stop the server process)
@@ -679,6 +1092,7 @@ function terminateConnection() {
 function handleServerStopped(serverName) {
     connected = false;
     currentServer = null;
+    currentServerName = null;
     
     // Update UI
     elements.connectBtn.disabled = false;
@@ -691,9 +1105,55 @@ function handleServerStopped(serverName) {
     // Clear console output
     clearConsole();
     
+    // Stop receiving the streams of this server
+    updateSubscriptions();
+    
     showMessage(`与服务器 ${serverName} 的连接已终止`, 'info');
 }
 
+// Show progress of a server stop
+function showStopProgress(serverName, stage, elapsed) {
+    const stageNames = {
+        rcon_stop: '已发送停止指令，等待服务器保存并退出',
+        terminate: '服务器未及时退出，正在发送终止信号',
+        kill: '服务器仍未退出，正在强制结束进程',
+        stopped: '已正常停止',
+        terminated: '已终止',
+        killed: '已强制结束',
+        failed: '停止失败'
+    };
+    const type = stage === 'failed' ? 'error' : (stage === 'stopped' ? 'success' : 'info');
+    showMessage(`服务器 ${serverName}：${stageNames[stage] || stage}（${elapsed}s）`, type);
+}
+
+// Show progress of a bulk start/stop/restart
+function showBulkProgress(progress) {
+    const operationNames = { start: '批量启动', stop: '批量停止', restart: '滚动重启' };
+    const stateNames = {
+        waiting: '等待中',
+        running: '执行中',
+        stopping: '正在停止',
+        ready: '已就绪',
+        stopped: '已停止',
+        skipped: '已跳过（依赖未就绪）',
+        failed: '失败'
+    };
+    const operation = operationNames[progress.operation] || progress.operation;
+    const counter = progress.total ? `（${progress.completed}/${progress.total}）` : '';
+    const type = progress.state === 'failed' ? 'error' : 'info';
+    showMessage(`${operation}${counter}：服务器 ${progress.server_name} ${stateNames[progress.state] || progress.state}`, type);
+}
+
+// Show result of a bulk start/stop/restart
+function showBulkDone(operation, results) {
+    const failed = Object.entries(results).filter(([, state]) => state === 'failed' || state === 'skipped');
+    if (failed.length === 0) {
+        showMessage(`批量操作完成，共 ${Object.keys(results).length} 个服务器`, 'success');
+    } else {
+        showMessage(`批量操作完成，${failed.length} 个服务器未成功：${failed.map(([name]) => name).join(', ')}`, 'error');
+    }
+}
+
 // Search servers for config
 function searchServers() {
     sendWebSocketMessage('search_servers');
@@ -711,6 +1171,8 @@ function updateConfigServerList(servers) {
     // Update config page server list
     elements.configServerSelect.innerHTML = '<option value="">选择游戏服务端</option>';
     elements.componentsServerSelect.innerHTML = '<option value="">选择游戏服务端</option>';
+    elements.worldServerSelect.innerHTML = '<option value="">选择游戏服务端</option>';
+    elements.crashServerSelect.innerHTML = '<option value="">选择游戏服务端</option>';
     
     servers.forEach(server => {
         // Store server info in map for later use
@@ -728,12 +1190,26 @@ function updateConfigServerList(servers) {
         componentsOption.textContent = server.display_name;
         componentsOption.disabled = !server.valid;
         elements.componentsServerSelect.appendChild(componentsOption);
+        
+        // World folders can be analyzed whatever state the server is in
+        const worldOption = document.createElement('option');
+        worldOption.value = server.name;
+        worldOption.textContent = server.display_name;
+        elements.worldServerSelect.appendChild(worldOption);
+        
+        // Crashed servers can't be valid or running, so every server can be analyzed
+        const crashOption = document.createElement('option');
+        crashOption.value = server.name;
+        crashOption.textContent = server.display_name;
+        elements.crashServerSelect.appendChild(crashOption);
     });
     
     // Restore previous selection if it still exists
     if (currentValue) {
         elements.configServerSelect.value = currentValue;
         elements.componentsServerSelect.value = currentValue;
+        elements.worldServerSelect.value = currentValue;
+        elements.crashServerSelect.value = currentValue;
         selectedServer = currentValue;
     }
     
@@ -1060,10 +1536,9 @@ function selectComponentsServer() {
     showMessage(`正在获取服务器组件：${serverName}`, 'info');
 }
 
-// Show components data
-function showComponents(serverName, components) {
-    // Get available component types
-    const availableComponents = Object.keys(components);
+// Lay out the component tabs before the pages of a listing arrive
+function beginComponents(serverName, availableComponents) {
+    componentsServerName = serverName;
     
     // Update component tab buttons visibility
     elements.componentTabBtns.forEach(btn => {
@@ -1084,66 +1559,364 @@ function showComponents(serverName, components) {
         }
     }
     
-    // Render components for each type
-    for (const [componentType, files] of Object.entries(components)) {
-        renderComponentList(componentType, files, serverName);
-    }
-    
-    // Hide tabs for unavailable components
+    // Available tabs wait for their pages, the others are marked unavailable
     elements.componentTabContents.forEach(content => {
         const componentType = content.id;
-        if (!availableComponents.includes(componentType)) {
+        if (availableComponents.includes(componentType)) {
+            content.innerHTML = '<div class="empty-state">正在加载...</div>';
+        } else {
             content.innerHTML = '<div class="empty-state">此组件类型不可用</div>';
         }
     });
-    
-    showMessage(`成功加载服务器 ${serverName} 的组件`, 'success');
 }
 
-// Render component list
-function renderComponentList(componentType, files, serverName) {
-    const contentElement = document.getElementById(componentType);
+// Render one page of a component listing, pages arrive sorted by name
+function appendComponentPage(data) {
+    // Ignore pages of a listing that was replaced by selecting another server
+    if (data.server_name !== componentsServerName) {
+        return;
+    }
     
-    if (files.length === 0) {
+    const contentElement = document.getElementById(data.component_type);
+    if (!contentElement) {
+        return;
+    }
+    
+    if (data.total === 0) {
         contentElement.innerHTML = '<div class="empty-state">这个目录空空如也</div>';
         return;
     }
     
-    // Sort files by name
-    files.sort((a, b) => a.name.localeCompare(b.name));
+    let fileList = contentElement.querySelector('.file-list');
+    if (data.page === 0 || !fileList) {
+        fileList = document.createElement('div');
+        fileList.className = 'file-list';
+        contentElement.innerHTML = '';
+        contentElement.appendChild(fileList);
+    }
+    
+    // Build the page off-document and attach it in one go
+    const fragment = document.createDocumentFragment();
+    data.files.forEach(file => {
+        fragment.appendChild(createComponentItem(data.component_type, file, data.server_name));
+    });
+    fileList.appendChild(fragment);
+}
+
+// Create the list item of a component file
+function createComponentItem(componentType, file, serverName) {
+    const fileItem = document.createElement('div');
+    fileItem.className = 'file-item';
+    fileItem.dataset.fileName = file.name;
+    
+    // File info
+    const fileInfo = document.createElement('div');
+    fileInfo.className = 'file-info';
+    fileInfo.innerHTML = `
+        <div class="file-name">${file.name}</div>
+        <div class="file-size">${formatBytes(file.size)}</div>
+    `;
+    
+    fileItem.appendChild(fileInfo);
+    
+    // Add delete button for schematics
+    if (componentType === 'schematics') {
+        const deleteBtn = document.createElement('button');
+        deleteBtn.className = 'btn btn-danger btn-sm delete-btn';
+        deleteBtn.textContent = '删除';
+        deleteBtn.addEventListener('click', () => deleteSchematic(serverName, file.name));
+        fileItem.appendChild(deleteBtn);
+    }
+    
+    return fileItem;
+}
+
+// Annotate mod and plugin jars with the ids, versions and dependencies read from their metadata
+function showComponentMetadata(data) {
+    if (data.server_name !== componentsServerName) {
+        return;
+    }
     
-    // Create file list
-    const fileList = document.createElement('div');
-    fileList.className = 'file-list';
+    const contentElement = document.getElementById(data.component_type);
+    if (!contentElement) {
+        return;
+    }
     
-    files.forEach(file => {
-        const fileItem = document.createElement('div');
-        fileItem.className = 'file-item';
-        
-        // File info
-        const fileInfo = document.createElement('div');
-        fileInfo.className = 'file-info';
-        fileInfo.innerHTML = `
-            <div class="file-name">${file.name}</div>
-            <div class="file-size">${formatBytes(file.size)}</div>
-        `;
+    contentElement.querySelectorAll('.file-item').forEach(fileItem => {
+        const metadata = data.metadata[fileItem.dataset.fileName];
+        if (!metadata || metadata.mods.length === 0) {
+            return;
+        }
         
-        fileItem.appendChild(fileInfo);
+        let metaElement = fileItem.querySelector('.file-meta');
+        if (!metaElement) {
+            metaElement = document.createElement('div');
+            metaElement.className = 'file-meta';
+            fileItem.querySelector('.file-info').appendChild(metaElement);
+        }
+        metaElement.textContent = metadata.mods.map(mod => {
+            const required = mod.dependencies.filter(dependency => dependency.required).map(dependency => dependency.id);
+            const version = mod.version ? ` ${mod.version}` : '';
+            const loader = metadata.loader ? ` [${metadata.loader}]` : '';
+            const depends = required.length ? ` · 依赖: ${required.join(', ')}` : '';
+            return `${mod.id}${version}${loader}${depends}`;
+        }).join('；');
+    });
+}
+
+// Flag duplicate and conflicting jars, and note jars other servers hold identical copies of
+function showComponentDuplicates(data) {
+    if (data.server_name !== componentsServerName) {
+        return;
+    }
+    
+    // Group the warnings by the directory (mods/plugins) their files are in
+    const warnings = {};
+    const flagged = {};
+    const addWarning = (files, text, className) => {
+        files.forEach(path => {
+            const componentType = path.split('/')[0];
+            flagged[path] = className;
+            if (!warnings[componentType]) {
+                warnings[componentType] = new Set();
+            }
+            warnings[componentType].add(text);
+        });
+    };
+    data.duplicates.forEach(group => {
+        addWarning(group.files, `重复的文件: ${group.files.map(path => path.split('/')[1]).join(', ')}`, 'file-duplicate');
+    });
+    data.conflicts.forEach(conflict => {
+        addWarning(conflict.files, `${conflict.id} 存在多个版本: ${conflict.files.map(path => path.split('/')[1]).join(', ')}`, 'file-conflict');
+    });
+    const shared = {};
+    data.shared.forEach(item => {
+        shared[item.file] = item.servers.map(server => server.server_name);
+    });
+    
+    ['mods', 'plugins'].forEach(componentType => {
+        const contentElement = document.getElementById(componentType);
+        if (!contentElement) {
+            return;
+        }
         
-        // Add delete button for schematics
-        if (componentType === 'schematics') {
-            const deleteBtn = document.createElement('button');
-            deleteBtn.className = 'btn btn-danger btn-sm delete-btn';
-            deleteBtn.textContent = '删除';
-            deleteBtn.addEventListener('click', () => deleteSchematic(serverName, file.name));
-            fileItem.appendChild(deleteBtn);
+        contentElement.querySelectorAll('.component-warnings').forEach(element => element.remove());
+        if (warnings[componentType]) {
+            const warningElement = document.createElement('div');
+            warningElement.className = 'component-warnings';
+            warnings[componentType].forEach(text => {
+                const line = document.createElement('div');
+                line.textContent = `[!] ${text}`;
+                warningElement.appendChild(line);
+            });
+            contentElement.insertBefore(warningElement, contentElement.firstChild);
         }
         
-        fileList.appendChild(fileItem);
+        contentElement.querySelectorAll('.file-item').forEach(fileItem => {
+            const path = `${componentType}/${fileItem.dataset.fileName}`;
+            fileItem.classList.remove('file-duplicate', 'file-conflict');
+            if (flagged[path]) {
+                fileItem.classList.add(flagged[path]);
+            }
+            fileItem.title = shared[path] ? `其他服务器中有相同的文件: ${shared[path].join(', ')}` : '';
+        });
     });
     
-    contentElement.innerHTML = '';
-    contentElement.appendChild(fileList);
+    const problemCount = data.duplicates.length + data.conflicts.length;
+    if (problemCount > 0) {
+        showMessage(`发现 ${problemCount} 组重复或冲突的模组/插件`, 'error');
+    }
+}
+
+// Analyze the world folders of the selected server
+function analyzeWorld() {
+    const serverName = elements.worldServerSelect.value;
+    
+    if (!serverName) {
+        showMessage('请选择一个服务器', 'error');
+        return;
+    }
+    
+    elements.worldResult.innerHTML = '<div class="empty-state">正在扫描区域文件...</div>';
+    sendWebSocketMessage('get_world_stats', { server_name: serverName });
+}
+
+// Format a growth rate in bytes per day, worlds can also shrink after trimming
+function formatGrowth(bytesPerDay) {
+    if (bytesPerDay === null || bytesPerDay === undefined) {
+        return '数据不足';
+    }
+    const bytes = Math.round(Math.abs(bytesPerDay));
+    return `${bytesPerDay < 0 ? '-' : '+'}${formatBytes(bytes)}/天`;
+}
+
+// Show the size, chunk count and growth of each dimension of a server
+function showWorldStats(data) {
+    if (data.server_name !== elements.worldServerSelect.value) {
+        return;
+    }
+    
+    const container = elements.worldResult;
+    container.innerHTML = '';
+    
+    if (data.dimensions.length === 0) {
+        container.innerHTML = '<div class="empty-state">没有找到世界存档</div>';
+        return;
+    }
+    
+    const summary = document.createElement('div');
+    summary.className = 'world-summary';
+    const lines = [
+        ['服务器', data.server_name],
+        ['存档总大小', formatBytes(data.total_size)],
+        ['已生成区块', data.total_chunks.toLocaleString()],
+        ['增长速度', formatGrowth(data.growth_per_day)],
+        ['磁盘剩余空间', data.disk_free !== null ? formatBytes(data.disk_free) : '--'],
+        ['预计写满', data.days_until_full !== null ? `约 ${Math.floor(data.days_until_full)} 天后` : '--'],
+        ['扫描耗时', `${data.elapsed_ms} ms (重新读取 ${data.changed_files} 个区域文件)`]
+    ];
+    lines.forEach(([label, value]) => {
+        const line = document.createElement('div');
+        line.textContent = `${label}: ${value}`;
+        summary.appendChild(line);
+    });
+    container.appendChild(summary);
+    
+    const list = document.createElement('div');
+    list.className = 'file-list';
+    data.dimensions.forEach(dimension => {
+        const item = document.createElement('div');
+        item.className = 'file-item';
+        const info = document.createElement('div');
+        info.className = 'file-info';
+        const name = document.createElement('div');
+        name.className = 'file-name';
+        name.textContent = `${dimension.dimension} (${dimension.path})`;
+        const meta = document.createElement('div');
+        meta.className = 'file-size';
+        const lastSaved = dimension.last_chunk_saved ? new Date(dimension.last_chunk_saved * 1000).toLocaleString() : '--';
+        meta.textContent = `${formatBytes(dimension.size)} · ${dimension.region_files} 个区域文件 · ${dimension.chunks.toLocaleString()} 个区块 · ${formatGrowth(dimension.growth_per_day)} · 最近保存: ${lastSaved}`;
+        info.appendChild(name);
+        info.appendChild(meta);
+        item.appendChild(info);
+        
+        // Share of the dimension in the whole save
+        const bar = document.createElement('div');
+        bar.className = 'world-size-bar';
+        const fill = document.createElement('div');
+        fill.style.width = `${data.total_size ? (dimension.size / data.total_size * 100).toFixed(1) : 0}%`;
+        bar.appendChild(fill);
+        item.appendChild(bar);
+        list.appendChild(item);
+    });
+    container.appendChild(list);
+}
+
+// Analyze the latest crash of the selected server
+function analyzeCrash() {
+    const serverName = elements.crashServerSelect.value;
+    
+    if (!serverName) {
+        showMessage('请选择一个服务器', 'error');
+        return;
+    }
+    
+    sendWebSocketMessage('analyze_crash', { server_name: serverName });
+}
+
+// Show a crash analysis; analyses broadcast right after a crash come without the history
+function showCrashAnalysis(data) {
+    // Automatic analyses of other servers only replace the view when nothing else is selected
+    const selected = elements.crashServerSelect.value;
+    if (data.history === undefined && selected && selected !== data.server_name) {
+        return;
+    }
+    
+    const container = elements.crashResult;
+    const previousHistory = container.querySelector('.crash-history');
+    container.innerHTML = '';
+    
+    if (!data.signature) {
+        container.innerHTML = '<div class="empty-state">没有找到崩溃报告或异常堆栈</div>';
+    } else {
+        const summary = document.createElement('div');
+        summary.className = 'crash-summary';
+        const lines = [
+            ['服务器', data.server_name],
+            ['描述', data.description || '--'],
+            ['来源', data.report ? `crash-reports/${data.report}` : data.source],
+            ['异常', data.exceptions.map(exception => exception.class).join(' ← ')],
+            ['相关模组', data.mods.length ? data.mods.join(', ') : '--'],
+            ['签名', data.signature],
+            ['出现次数', data.occurrences > 1 ? `${data.occurrences} 次 (首次: ${new Date(data.first_seen * 1000).toLocaleString()})` : '首次出现'],
+            ['分析耗时', `${data.elapsed_ms} ms`]
+        ];
+        lines.forEach(([label, value]) => {
+            const line = document.createElement('div');
+            line.textContent = `${label}: ${value}`;
+            summary.appendChild(line);
+        });
+        container.appendChild(summary);
+        
+        // Exception chain with the top frames of each exception
+        const trace = document.createElement('pre');
+        trace.className = 'crash-trace';
+        trace.textContent = data.exceptions.map((exception, index) => {
+            const header = `${index > 0 ? 'Caused by: ' : ''}${exception.class}${exception.message ? `: ${exception.message}` : ''}`;
+            return [header, ...exception.frames.map(frame => `    at ${frame}`)].join('\n');
+        }).join('\n');
+        container.appendChild(trace);
+    }
+    
+    if (data.history) {
+        container.appendChild(createCrashHistory(data.history));
+    } else if (previousHistory) {
+        container.appendChild(previousHistory);
+    }
+    
+    if (data.history === undefined) {
+        elements.crashServerSelect.value = data.server_name;
+        showMessage(`服务器 ${data.server_name} 的崩溃分析已完成`, 'info');
+    }
+}
+
+// List the past crash signatures of a server
+function createCrashHistory(history) {
+    const historyElement = document.createElement('div');
+    historyElement.className = 'crash-history';
+    
+    const title = document.createElement('h3');
+    title.textContent = '历史崩溃';
+    historyElement.appendChild(title);
+    
+    if (history.length === 0) {
+        const empty = document.createElement('div');
+        empty.className = 'empty-state';
+        empty.textContent = '没有记录过崩溃';
+        historyElement.appendChild(empty);
+        return historyElement;
+    }
+    
+    const list = document.createElement('div');
+    list.className = 'file-list';
+    history.forEach(entry => {
+        const item = document.createElement('div');
+        item.className = 'file-item';
+        const info = document.createElement('div');
+        info.className = 'file-info';
+        const name = document.createElement('div');
+        name.className = 'file-name';
+        name.textContent = `${entry.exception}${entry.message ? `: ${entry.message}` : ''}`;
+        const meta = document.createElement('div');
+        meta.className = 'file-size';
+        meta.textContent = `${entry.signature} · ${entry.count} 次 · 最近: ${new Date(entry.last_seen * 1000).toLocaleString()}${entry.mods.length ? ` · 模组: ${entry.mods.join(', ')}` : ''}`;
+        info.appendChild(name);
+        info.appendChild(meta);
+        item.appendChild(info);
+        list.appendChild(item);
+    });
+    historyElement.appendChild(list);
+    return historyElement;
 }
 
 // Delete schematic
@@ -1188,17 +1961,6 @@ function formatBytes(bytes) {
     return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
 }
 
-// Clear console
-function clearConsole() {
-    elements.consoleOutput.innerHTML = '';
-}
-
-// Refresh server status (for when switching to the server details tab)
-function refreshServerStatus() {
-    // This would trigger a status update from the server
-    sendWebSocketMessage('refresh_status');
-}
-
 // Switch config tab
 function switchConfigTab(tabName) {
     // Update active config tab buttons
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from typing import Dict, List
+
+import psutil
+
+from .event_bus import event_bus
+from .event_types import SERVER_STOP_PROGRESS
+from .rcon_client import RCONClient
+
+# Seconds a server gets to shut down after the RCON stop command
+DEFAULT_STOP_TIMEOUT = 30.0
+# Seconds to wait after SIGTERM before killing the process
+TERMINATE_TIMEOUT = 10.0
+# Seconds to wait for the process to disappear after kill
+KILL_TIMEOUT = 5.0
+# Poll interval used when no exit watcher is attached to the process
+EXIT_POLL_INTERVAL = 0.2
+
+class StopCoordinator:
+    """Stop server processes gracefully, escalating from RCON stop to SIGTERM to kill"""
+    
+    def __init__(self):
+        # Dictionary mapping server names to in-flight stop tasks
+        self._stops: Dict[str, asyncio.Task] = {}
+    
+    async def stop(self, server_name: str, process_info: dict, rcon_port=25575, rcon_password='',
+                   timeout: float = DEFAULT_STOP_TIMEOUT, already_requested: bool = False) -> str:
+        """Stop a server and return the outcome: 'stopped', 'terminated', 'killed' or 'failed'
+
+        With already_requested the server was sent stop by someone else, so it only gets the timeout
+        to exit before it is terminated.
+        """
+        # Repeated stop requests for the same server share the running stop
+        task = self._stops.get(server_name)
+        if task is None or task.done():
+            task = asyncio.create_task(
+                self._stop(server_name, process_info, rcon_port, rcon_password, timeout, already_requested))
+            self._stops[server_name] = task
+            
+            def forget(finished):
+                if self._stops.get(server_name) is finished:
+                    del self._stops[server_name]
+            
+            task.add_done_callback(forget)
+        return await asyncio.shield(task)
+    
+    async def stop_many(self, requests: List[dict]) -> Dict[str, str]:
+        """Stop several servers in parallel; each request holds the keyword arguments of stop()"""
+        results = await asyncio.gather(*(self.stop(**request) for request in requests), return_exceptions=True)
+        outcomes = {}
+        for request, result in zip(requests, results):
+            if isinstance(result, Exception):
+                print(f"Error stopping server {request['server_name']}: {result}")
+                result = 'failed'
+            outcomes[request['server_name']] = result
+        return outcomes
+    
+    async def _stop(self, server_name, process_info, rcon_port, rcon_password, timeout, already_requested) -> str:
+        """Run the escalation steps until the server process has exited"""
+        started = time.monotonic()
+        # Mark the process as stopping so its exit is not reported as a crash
+        process_info['stopping'] = True
+        
+        async def progress(stage):
+            await event_bus.publish(SERVER_STOP_PROGRESS, server_name=server_name, stage=stage,
+                                    elapsed=round(time.monotonic() - started, 1))
+        
+        if self.has_exited(process_info):
+            await progress('stopped')
+            return 'stopped'
+        
+        # Step 1: ask the server to save and shut down via RCON; a second stop while it is already
+        # saving would only add noise, so a server that was sent stop just gets its time to exit
+        if rcon_password or already_requested:
+            await progress('rcon_stop')
+            if not already_requested:
+                loop = asyncio.get_running_loop()
+                sent = await loop.run_in_executor(None, self._send_rcon_stop, rcon_port, rcon_password)
+                if sent:
+                    print(f"Sent stop command to server {server_name} via RCON")
+            if await self._wait_exit(process_info, timeout):
+                print(f"Server {server_name} stopped successfully")
+                await progress('stopped')
+                self.close_wrapper(process_info)
+                return 'stopped'
+        
+        # Step 2: SIGTERM (TerminateProcess on Windows)
+        print(f"Server {server_name} is still running, sending SIGTERM...")
+        await progress('terminate')
+        self._signal(process_info, 'terminate')
+        if await self._wait_exit(process_info, TERMINATE_TIMEOUT):
+            await progress('terminated')
+            self.close_wrapper(process_info)
+            return 'terminated'
+        
+        # Step 3: kill
+        print(f"Server {server_name} ignored SIGTERM, forcing termination...")
+        await progress('kill')
+        self._signal(process_info, 'kill')
+        if await self._wait_exit(process_info, KILL_TIMEOUT):
+            await progress('killed')
+            self.close_wrapper(process_info)
+            return 'killed'
+        
+        print(f"Failed to kill server {server_name} after {KILL_TIMEOUT} seconds")
+        await progress('failed')
+        return 'failed'
+    
+    @staticmethod
+    def _send_rcon_stop(rcon_port, rcon_password) -> bool:
+        """Send the stop command over RCON (blocking, run in an executor)"""
+        rcon_client = RCONClient(host='localhost', port=rcon_port, password=rcon_password)
+        try:
+            if rcon_client.connect() and rcon_client.authenticate():
+                return rcon_client.send_command('stop') is not None
+        except Exception as e:
+            print(f"Failed to send stop command via RCON: {e}")
+        finally:
+            rcon_client.close()
+        return False
+    
+    @staticmethod
+    def has_exited(process_info) -> bool:
+        """Check whether the server process has already exited"""
+        exited = process_info.get('exited')
+        if exited is not None:
+            return exited.is_set()
+        process = process_info.get('process')
+        return process is None or process.poll() is not None
+    
+    async def _wait_exit(self, process_info, timeout) -> bool:
+        """Wait up to timeout seconds for the server process to exit"""
+        exited = process_info.get('exited')
+        if exited is not None:
+            # The exit watcher sets this event the moment the JVM exits
+            try:
+                await asyncio.wait_for(exited.wait(), timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+        
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.has_exited(process_info):
+                return True
+            await asyncio.sleep(EXIT_POLL_INTERVAL)
+        return self.has_exited(process_info)
+    
+    @staticmethod
+    def _signal(process_info, method):
+        """Call terminate() or kill() on the JVM, or on the wrapper if the JVM is unknown"""
+        target = process_info.get('java_process') or process_info.get('process')
+        if target is None:
+            return
+        try:
+            getattr(target, method)()
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            pass
+        except Exception as e:
+            print(f"Failed to {method} process {target.pid}: {e}")
+    
+    @staticmethod
+    def close_wrapper(process_info):
+        """Close the cmd.exe wrapper left behind (e.g. waiting on pause) once the JVM has exited"""
+        process = process_info.get('process')
+        if process is not None and process_info.get('java_process') is not None and process.poll() is None:
+            try:
+                process.kill()
+            except Exception as e:
+                print(f"Failed to close wrapper process {process.pid}: {e}")
+
+# Create a global stop coordinator instance
+stop_coordinator = StopCoordinator()
@@ -1,18 +1,40 @@
 import asyncio
 import websockets
+from websockets.extensions.permessage_deflate import ServerPerMessageDeflateFactory
 import json
 import psutil
 import os
 import subprocess
 import time
 import traceback
+import re
 import wmi
-import socket
 import platform
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from .server_manager import ServerManager
 from .event_bus import event_bus
 from .event_types import *
+from .process_watcher import process_watcher
+from .rcon_client import RCONClient
+from .stop_coordinator import stop_coordinator, DEFAULT_STOP_TIMEOUT
+from .broadcast_hub import broadcast_hub, select_subprotocol, SUBPROTOCOL_MSGPACK, SUBPROTOCOL_JSON
+from .serializer import to_frame, msgpack_available, orjson_available, ENCODING_JSON, LOG_ENVELOPE, HEARTBEAT_FRAME
+from .delta_encoder import DeltaEncoder
+from .orchestrator import LifecycleOrchestrator, DependencyCycleError, DEFAULT_CONCURRENCY, DEFAULT_READY_TIMEOUT
+from .command_queue import CommandQueue, MAX_COMMAND_TIMEOUT, MAX_BATCH_SIZE
+from .scheduler import Scheduler
+from .jar_index import jar_index
+from .hash_index import hash_index
+from .crash_analyzer import crash_analyzer
+from .log_index import log_index, DEFAULT_PAGE_SIZE
+from .log_archive import log_archive_reader, LINES_PER_MESSAGE, ARCHIVE_SCAN_TIMEOUT
+from . import worker_pool
+from .log_parser import LogLineParser, LogFilter
+from .spike_detector import SpikeDetector
+from .adaptive_poller import adaptive_poller, METRICS
+from .player_tracker import player_tracker
+from .world_analyzer import world_analyzer
 
 # Try to import win32pdh and pythoncom for Windows performance counters
 try:
@@ -24,18 +46,12 @@ except ImportError as e:
     win32pdh_available = False
 
 # Global variables
-connected_clients = set()
 server_processes = {}
 server_info = {}
-current_client = None
 
-# Persistent RCON connection for status monitoring
-persistent_rcon_client = None
-persistent_rcon_server = None
-
-# Data rotation counter for轮流获取数据
-# 0: TPS (via tps command), 1: MSPT (via mspt command), 2: Players (via list command)
-rotation_counter = 0
+# Persistent RCON connections for status monitoring
+# Key: server name, Value: RCONClient
+persistent_rcon_clients = {}
 
 # Server startup completion flag
 # Dictionary to track if each server has completed startup
@@ -45,14 +61,59 @@ server_startup_completed = {}
 # Stores log lines from server start until client connects or startup completes
 log_caches = {}
 
-# Previous advanced data values
+# Messages of one client waiting to be processed before its receive loop stops reading
+CLIENT_INBOX_SIZE = 64
+
+# Seconds to wait for a freshly started server to create its latest.log
+LOG_WAIT_TIMEOUT = 120
+
+# Seconds between two reads of the join and leave lines of latest.log by the player tracker
+PLAYER_TRACK_INTERVAL = 2
+
+# Seconds between two background scans of the world folders, each one adds a sample to the size history
+WORLD_SCAN_INTERVAL = 3600
+
+# Automatic restarts after a crash wait AUTO_RESTART_BASE_DELAY seconds, doubled for every earlier
+# restart within AUTO_RESTART_WINDOW seconds, and stop after AUTO_RESTART_MAX_ATTEMPTS of them
+AUTO_RESTART_BASE_DELAY = 5
+AUTO_RESTART_MAX_DELAY = 300
+AUTO_RESTART_MAX_ATTEMPTS = 5
+AUTO_RESTART_WINDOW = 1800
+
+# Times of the recent automatic restarts of each server
+# Key: server name, Value: list of restart timestamps
+auto_restart_history = {}
+# Pending automatic restarts
+# Key: server name, Value: task waiting out the backoff
+auto_restart_tasks = {}
+
+# Shared log streams: one tailer per server fans lines out to the subscribers of its logs topic
+# Key: server name, Value: log tailer task
+log_tailers = {}
+
+# Advanced data values per server
 # Stores the last successfully retrieved values for TPS, MSPT, and players
-previous_advanced_data = {
-    'tps': '--',
-    'mspt': '--',
-    'players_online': '--',
-    'players_max': '--'
-}
+advanced_data = {}
+
+# Subscription topics; producers skip topics nobody is subscribed to
+HOST_METRICS_TOPIC = 'metrics:host'
+TOPIC_PREFIXES = ('status:', 'logs:', 'metrics:')
+
+def status_topic(server_name):
+    """Get the status topic of a server"""
+    return f'status:{server_name}'
+
+def logs_topic(server_name):
+    """Get the logs topic of a server"""
+    return f'logs:{server_name}'
+
+# Status frames are delta-encoded per topic: a full snapshot first, then only changed fields
+status_deltas = DeltaEncoder()
+
+# permessage-deflate settings; smaller windows than the zlib defaults keep the memory per client low
+# while repetitive log and component frames still compress several times over
+DEFLATE_WINDOW_BITS = 12
+DEFLATE_MEM_LEVEL = 5
 
 # Log rate limiting settings
 # Maximum number of log lines to send per second
@@ -62,222 +123,161 @@ LOG_RATE_LIMIT = 100
 log_rate_counters = {}
 # Dictionary to track if we've already sent a warning for this second
 warning_sent = {}
+# Dictionary mapping client websockets to the LogFilter they set, clients without one get every line
+log_filters = {}
 
-# RCON protocol constants
-RCON_TYPE_AUTH = 3
-RCON_TYPE_AUTH_RESPONSE = 2
-RCON_TYPE_COMMAND = 2
-RCON_TYPE_RESPONSE_VALUE = 0
-
-class RCONClient:
-    """RCON client for Minecraft servers"""
-    
-    def __init__(self, host='localhost', port=25575, password=''):
-        self.host = host
-        self.port = int(port)  # Ensure port is integer
-        self.password = password
-        self.socket = None
-    
-    def connect(self):
-        """Connect to the RCON server"""
-        try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(5)
-            self.socket.connect((self.host, self.port))
-            return True
-        except Exception as e:
-            print(f"Failed to connect to RCON: {e}")
-            return False
-    
-    def authenticate(self):
-        """Authenticate with the RCON server"""
-        if not self.socket:
-            if not self.connect():
-                return False
-        
-        try:
-            # Send auth request
-            auth_packet = self._build_packet(1, RCON_TYPE_AUTH, self.password)
-            self.socket.send(auth_packet)
-            
-            # Receive response
-            response = self._receive_packet()
-            if response['request_id'] == -1:
-                return False  # Authentication failed
-            return True
-        except Exception as e:
-            print(f"RCON authentication failed: {e}")
-            return False
-    
-    def send_command(self, command):
-        """Send a command to the RCON server"""
-        if not self.socket:
-            if not self.connect():
-                return None
-        
-        try:
-            # Send command packet
-            command_packet = self._build_packet(2, RCON_TYPE_COMMAND, command)
-            self.socket.send(command_packet)
-            
-            # Receive response
-            response = self._receive_packet()
-            return response['payload']
-        except Exception as e:
-            print(f"Failed to send RCON command: {e}")
-            return None
-    
-    def close(self):
-        """Close the RCON connection"""
-        if self.socket:
-            try:
-                self.socket.close()
-            except Exception as e:
-                print(f"Error closing RCON socket: {e}")
-            self.socket = None
-    
-    def _build_packet(self, request_id, packet_type, payload):
-        """Build an RCON packet"""
-        # Packet structure: Length (4 bytes) + Request ID (4 bytes) + Type (4 bytes) + Payload + 2 null bytes
-        payload_bytes = payload.encode('utf-8')
-        packet_size = 4 + 4 + len(payload_bytes) + 2  # Request ID + Type + Payload + 2 null bytes
-        
-        packet = bytearray()
-        packet.extend(packet_size.to_bytes(4, byteorder='little'))
-        packet.extend(request_id.to_bytes(4, byteorder='little'))
-        packet.extend(packet_type.to_bytes(4, byteorder='little'))
-        packet.extend(payload_bytes)
-        packet.extend(b'\x00\x00')  # Two null bytes at the end
-        
-        return packet
-    
-    def _receive_packet(self):
-        """Receive an RCON packet"""
-        # Read length
-        length_bytes = self.socket.recv(4)
-        if not length_bytes:
-            raise ConnectionError("Connection closed by server")
-        
-        length = int.from_bytes(length_bytes, byteorder='little')
-        
-        # Read the rest of the packet
-        packet = self.socket.recv(length)
-        if len(packet) < length:
-            raise ConnectionError("Incomplete packet received")
-        
-        # Parse packet
-        request_id = int.from_bytes(packet[:4], byteorder='little')
-        packet_type = int.from_bytes(packet[4:8], byteorder='little')
-        payload = packet[8:-2].decode('utf-8', errors='replace')
-        
-        return {
-            'request_id': request_id,
-            'type': packet_type,
-            'payload': payload
-        }
+def _log_packet(kind, frame):
+    """Print the type and, if it is already JSON-encoded, the beginning of a sent frame"""
+    print(f"[Packet {kind}] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Type: {frame.type}")
+    # Encoding a frame just to print it would undo serializing it once, e.g. for MessagePack-only clients
+    message = frame.cached(ENCODING_JSON)
+    if message is not None:
+        content = message[:500].decode('utf-8', errors='replace') if isinstance(message, bytes) else message[:500]
+        print(f"[Packet Content] {content}{'...' if len(message) > 500 else ''}")
 
 async def send_message_with_log(websocket, data):
-    """Send message to client and log it"""
+    """Send message (a dict or a pre-encoded Frame) to client and log it"""
+    # Nothing to do when no client is attached (e.g. automatic restarts)
+    if websocket is None:
+        return
+    
     try:
-        # Convert data to JSON string
-        message = json.dumps(data) if isinstance(data, dict) else data
+        frame = to_frame(data)
         
-        # Send message to client
-        await websocket.send(message)
+        # Send message to client through its send queue so frames stay in order
+        if websocket in broadcast_hub:
+            broadcast_hub.send(websocket, frame)
+        else:
+            await websocket.send(frame.encode(ENCODING_JSON), text=True)
         
         # Log the message
-        print(f"[Packet Sent] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Type: {data.get('type', 'unknown')}")
-        print(f"[Packet Content] {message[:500]}{'...' if len(message) > 500 else ''}")
+        _log_packet('Sent', frame)
     except Exception as e:
         # Check if it's a normal close (1000, 1001) to avoid spamming logs
         error_str = str(e)
         if "1000" not in error_str and "1001" not in error_str:
             print(f"Error sending message: {e}")
 
+async def broadcast_message_with_log(data, clients=None, droppable=False):
+    """Send message to all (or the given) clients, serializing it once, and log it"""
+    try:
+        frame = to_frame(data)
+        if broadcast_hub.broadcast(frame, clients=clients, droppable=droppable):
+            # Log the message
+            _log_packet('Broadcast', frame)
+    except Exception as e:
+        print(f"Error broadcasting message: {e}")
+
 async def handle_client(*args):
-    global current_client
-    
     # Get websocket object (works with both 1 and 2 argument signatures)
     websocket = args[0]
     
-    # Check if there's already a connected client
-    if current_client is not None:
-        await websocket.close(code=1008, reason="Another client is already connected")
-        return
-    
-    # Set this client as the current client
-    current_client = websocket
-    
-    # Start heartbeat task for this client
-    heartbeat_task = asyncio.create_task(send_heartbeat(websocket))
+    # Register the client; any number of clients can watch the dashboard at once
+    broadcast_hub.register(websocket)
+    dispatcher = None
     
     try:
         # Publish client connected event
         await event_bus.publish(CLIENT_CONNECTED, websocket=websocket)
         
+        # Send a first heartbeat right away, the shared heartbeat loop takes over after that
+        await send_message_with_log(websocket, HEARTBEAT_FRAME)
+        
+        # Messages of this client are handled in arrival order by a dispatcher task of its own, so a slow
+        # handler never stalls the receive loop and different clients are still handled in parallel
+        inbox = asyncio.Queue(maxsize=CLIENT_INBOX_SIZE)
+        dispatcher = asyncio.create_task(_dispatch_messages(websocket, inbox))
         async for message in websocket:
-            await process_message(websocket, message)
+            await inbox.put(message)
     except websockets.exceptions.ConnectionClosedError:
         # Expected close, do nothing
         pass
     except Exception as e:
         print(f"Error handling client: {e}")
     finally:
+        # Messages still waiting would act on a client that is gone
+        if dispatcher is not None:
+            dispatcher.cancel()
+        
         # Publish client disconnected event
         await event_bus.publish(CLIENT_DISCONNECTED, websocket=websocket)
         
         # Clean up when client disconnects
-        heartbeat_task.cancel()
-        current_client = None
-        # Reset advanced data values
-        global previous_advanced_data
-        previous_advanced_data = {
-            'tps': '--',
-            'mspt': '--',
-            'players_online': '--',
-            'players_max': '--'
-        }
-        # Remove all server processes tracked for this client
-        server_processes.clear()
+        # Unregistering also drops all topic subscriptions of the client
+        broadcast_hub.unregister(websocket)
+        status_deltas.resync(websocket)
+        log_rate_counters.pop(websocket, None)
+        warning_sent.pop(websocket, None)
+        log_filters.pop(websocket, None)
+
+# Routing table from client actions to internal events
+ACTION_EVENTS = {
+    'refresh_servers': REFRESH_SERVERS,
+    'connect_server': SERVER_CONNECTED,
+    'execute_command': COMMAND_EXECUTED,
+    'stop_server': SERVER_STOPPED,
+    'start_server': SERVER_STARTED,
+    'bulk_start': BULK_START,
+    'bulk_stop': BULK_STOP,
+    'bulk_restart': BULK_RESTART,
+    'search_servers': 'search.servers',
+    'select_server': 'server.selected',
+    'save_config': 'config.save',
+    'get_components': 'components.get',
+    'delete_schematic': 'schematic.delete',
+    'get_bus_stats': BUS_STATS,
+    'subscribe': CLIENT_SUBSCRIBE,
+    'unsubscribe': CLIENT_UNSUBSCRIBE,
+    'resync_status': STATUS_RESYNC,
+    'get_schedule': SCHEDULE_GET,
+    'save_schedule': SCHEDULE_SAVE,
+    'run_scheduled_job': SCHEDULE_RUN,
+    'analyze_crash': CRASH_ANALYZE,
+    'search_logs': LOG_SEARCH,
+    'scan_log_archives': LOG_ARCHIVE_SCAN,
+    'set_log_filter': LOG_FILTER_SET,
+    'get_incidents': INCIDENT_LIST,
+    'get_incident': INCIDENT_GET,
+    'get_player_stats': PLAYER_STATS,
+    'get_world_stats': WORLD_STATS
+}
+
+async def _dispatch_messages(websocket, inbox):
+    """Process the messages of one client one after another, in the order they arrived"""
+    while True:
+        message = await inbox.get()
+        try:
+            await process_message(websocket, message)
+        except Exception as e:
+            print(f"Error processing message: {e}")
 
 async def process_message(websocket, message):
     """Process incoming messages from clients"""
     try:
         data = json.loads(message)
         action = data.get('action')
+        event = ACTION_EVENTS.get(action)
+        if event is None:
+            return
         
-        # Publish message events instead of direct function calls
-        if action == 'refresh_servers':
-            await event_bus.publish(REFRESH_SERVERS, websocket=websocket)
-        elif action == 'connect_server':
-            await event_bus.publish(SERVER_CONNECTED, websocket=websocket, data=data)
-        elif action == 'execute_command':
-            await event_bus.publish(COMMAND_EXECUTED, websocket=websocket, data=data)
-        elif action == 'stop_server':
-            await event_bus.publish(SERVER_STOPPED, websocket=websocket, data=data)
-        elif action == 'start_server':
-            await event_bus.publish(SERVER_STARTED, websocket=websocket, data=data)
-        elif action == 'search_servers':
-            await event_bus.publish('search.servers', websocket=websocket)
-        elif action == 'select_server':
-            await event_bus.publish('server.selected', websocket=websocket, data=data)
-        elif action == 'save_config':
-            await event_bus.publish('config.save', websocket=websocket, data=data)
-        elif action == 'get_components':
-            await event_bus.publish('components.get', websocket=websocket, data=data)
-        elif action == 'delete_schematic':
-            await event_bus.publish('schematic.delete', websocket=websocket, data=data)
+        if event_bus.has_queue(event):
+            # Heavy events go through a bounded work queue; a full queue is reported back.
+            # They are handed over in order but finish in the background, so a bulk start or a log scan
+            # does not hold up the later messages of the client
+            if not event_bus.enqueue_nowait(event, websocket=websocket, data=data):
+                await send_message_with_log(websocket, {
+                    'type': 'error',
+                    'message': f'Server is busy, please retry later ({action})'
+                })
+        else:
+            # Awaited, so e.g. connect_server is done before a following get_components is handed over
+            await event_bus.publish(event, websocket=websocket, data=data)
             
     except json.JSONDecodeError:
         await send_message_with_log(websocket, {'error': 'Invalid JSON format'})
 
-async def on_refresh_servers(**kwargs):
-    """Handle refresh_servers event"""
-    websocket = kwargs.get('websocket', current_client)
-    if not websocket:
-        return
-    
-    # Format server list with display names from version.json
+def _format_server_list():
+    """Format the tracked server list with display names from version.json"""
     formatted_servers = []
     for server_name in server_processes.keys():
         # Get server info from server_info map
@@ -288,10 +288,17 @@ async def on_refresh_servers(**kwargs):
             'name': server_name,
             'display_name': display_name
         })
+    return formatted_servers
+
+async def on_refresh_servers(**kwargs):
+    """Handle refresh_servers event"""
+    websocket = kwargs.get('websocket')
+    if not websocket:
+        return
     
     await send_message_with_log(websocket, {
         'type': 'server_list',
-        'servers': formatted_servers
+        'servers': _format_server_list()
     })
 
 # Alias for backward compatibility
@@ -299,7 +306,7 @@ refresh_servers = on_refresh_servers
 
 async def on_server_connected(**kwargs):
     """Handle server.connected event"""
-    websocket = kwargs.get('websocket', current_client)
+    websocket = kwargs.get('websocket')
     data = kwargs.get('data')
     if not websocket or not data:
         return
@@ -318,39 +325,18 @@ async def on_server_connected(**kwargs):
                 with open(version_file, 'r', encoding='utf-8') as f:
                     server_info_data = json.load(f)
             
-            # Check if spark is installed
-            spark_installed = False
-            # Check mods directory
-            mods_dir = os.path.join(server_path, 'mods')
-            if os.path.exists(mods_dir):
-                for file in os.listdir(mods_dir):
-                    if file.startswith('spark-') and file.endswith('.jar'):
-                        spark_installed = True
-                        break
-            
-            # Check plugins directory if not found in mods
-            if not spark_installed:
-                plugins_dir = os.path.join(server_path, 'plugins')
-                if os.path.exists(plugins_dir):
-                    for file in os.listdir(plugins_dir):
-                        if file.startswith('spark-') and file.endswith('.jar'):
-                            spark_installed = True
-                            break
-            
-            # Reset advanced data values when connecting to a new server
-            global previous_advanced_data
-            previous_advanced_data = {
-                'tps': '--',
-                'mspt': '--',
-                'players_online': '--',
-                'players_max': '--'
-            }
+            # Reset advanced data values when nobody was watching the server yet
+            if not broadcast_hub.has_subscribers(status_topic(server_name)):
+                _reset_advanced_data(server_name)
             
-            # Store server info with spark status
+            # Store server info with spark status as far as it is known yet,
+            # the jar index corrects it in the background
             server_info[server_name] = {
                 **server_info_data,
-                'spark_installed': spark_installed
+                'spark_installed': _spark_installed(server_name, server_path)
             }
+            _index_jars_in_background(server_name)
+            _index_logs_in_background(server_name)
             
             # Check if server has already completed startup by scanning existing logs
             try:
@@ -370,11 +356,18 @@ async def on_server_connected(**kwargs):
             # Send confirmation
             await send_message_with_log(websocket, {
                 'type': 'connect_success',
+                'server_name': server_name,
                 'server': server_info[server_name]
             })
             
-            # Start log streaming for this server
-            asyncio.create_task(stream_server_logs(websocket, server_path))
+            # A client watches one server at a time: move its status and log subscriptions here
+            broadcast_hub.unsubscribe_all(websocket, 'status:')
+            broadcast_hub.unsubscribe_all(websocket, 'logs:')
+            broadcast_hub.subscribe(websocket, status_topic(server_name))
+            status_deltas.resync(websocket, status_topic(server_name))
+            
+            # Attach this client to the shared log stream of the server
+            await _subscribe_logs(websocket, server_path)
             
         except Exception as e:
             await send_message_with_log(websocket, {
@@ -385,172 +378,333 @@ async def on_server_connected(**kwargs):
 # Alias for backward compatibility
 connect_server = on_server_connected
 
+# Background jar and log indexing tasks, kept so they are not garbage collected
+jar_index_tasks = set()
+
+async def _refresh_jar_index(server_name):
+    """Update the jar index of a server and the spark detection that depends on it"""
+    try:
+        await jar_index.refresh(server_name)
+    except Exception as e:
+        print(f"Error indexing jars of server {server_name}: {e}")
+        return
+    # spark is detected by its mod id, not by the file name of its jar
+    if server_name in server_info:
+        server_info[server_name]['spark_installed'] = jar_index.has_mod(server_name, 'spark')
+
+def _spark_installed(server_name, server_path):
+    """Check whether spark is installed, by jar file name until the jar index of the server is ready"""
+    if jar_index.indexed(server_name):
+        return jar_index.has_mod(server_name, 'spark')
+    for directory in ('mods', 'plugins'):
+        try:
+            if any(file.startswith('spark-') and file.endswith('.jar')
+                   for file in os.listdir(os.path.join(server_path, directory))):
+                return True
+        except OSError:
+            continue
+    return False
+
+def _index_jars_in_background(server_name):
+    """Start updating the jar index of a server without waiting for it"""
+    task = asyncio.create_task(_refresh_jar_index(server_name))
+    jar_index_tasks.add(task)
+    task.add_done_callback(jar_index_tasks.discard)
+
+async def _refresh_log_index(server_name):
+    """Index the rotated logs and latest.log of a server"""
+    try:
+        added = await log_index.refresh(server_name)
+        if added:
+            print(f"Indexed {added} log line(s) of server {server_name}")
+    except Exception as e:
+        print(f"Error indexing logs of server {server_name}: {e}")
+
+def _index_logs_in_background(server_name):
+    """Start updating the log index of a server without waiting for it"""
+    task = asyncio.create_task(_refresh_log_index(server_name))
+    jar_index_tasks.add(task)
+    task.add_done_callback(jar_index_tasks.discard)
+
+def _rcon_credentials(server_name):
+    """Get (rcon_port, rcon_password) of a tracked server"""
+    server_info_data = server_info.get(server_name)
+    if server_info_data is None:
+        return None
+    return server_info_data.get('rcon_port', 25575), server_info_data.get('rcon_password', '')
+
+# User commands run in submission order per server over pooled RCON sessions,
+# separate from the persistent status monitoring connections
+command_queue = CommandQueue(_rcon_credentials)
+
 async def on_command_executed(**kwargs):
     """Handle command.executed event"""
-    websocket = kwargs.get('websocket', current_client)
+    websocket = kwargs.get('websocket')
     data = kwargs.get('data')
     if not websocket or not data:
         return
     
-    command = data.get('command')
+    # Correlation id chosen by the client, echoed in every command_result
+    request_id = data.get('request_id')
+    # A batch is a script of commands run one after another over the same RCON session
+    batch = 'commands' in data
+    commands = data.get('commands') if batch else [data.get('command')]
+    commands = [command.strip() for command in commands or [] if isinstance(command, str) and command.strip()]
+    server_name = data.get('server_name')
     
-    if not server_processes:
+    async def reply(result, ok=True, index=0, command=None, done=True):
         await send_message_with_log(websocket, {
             'type': 'command_result',
-            'result': 'No server is running'
+            'request_id': request_id,
+            'server_name': server_name,
+            'index': index,
+            'command': command,
+            'result': result,
+            'ok': ok,
+            'done': done,
+            'batch': batch
         })
+    
+    if not server_processes:
+        await reply('No server is running', ok=False)
         return
     
-    # Get first connected server (assuming only one server is connected at a time)
-    server_name = list(server_processes.keys())[0]
-    server_info_data = server_info.get(server_name, {})
+    if not server_name:
+        # Older clients don't name the server, use the first one
+        server_name = list(server_processes.keys())[0]
+    elif server_name not in server_processes:
+        await reply(f'Server {server_name} is not running', ok=False)
+        return
     
-    # Get RCON credentials from server_info
-    rcon_port = server_info_data.get('rcon_port', 25575)
-    rcon_password = server_info_data.get('rcon_password', '')
+    if not commands:
+        await reply('No command given', ok=False)
+        return
     
-    if not rcon_password:
-        await send_message_with_log(websocket, {
-            'type': 'command_result',
-            'result': 'RCON password not found'
-        })
+    if len(commands) > MAX_BATCH_SIZE:
+        # The whole batch is rejected, running only its start would leave the script half done
+        await reply(f'Batch of {len(commands)} commands exceeds the limit of {MAX_BATCH_SIZE}, '
+                    f'{len(commands) - MAX_BATCH_SIZE} command(s) over the limit; nothing was run', ok=False)
         return
     
-    # Use a new temporary RCON connection for executing user commands
-    # This ensures user commands don't interfere with the persistent status monitoring connection
-    rcon_client = RCONClient(host='localhost', port=rcon_port, password=rcon_password)
-    result = None
+    async def on_result(index, command, result, ok):
+        # Results stream back as each command completes
+        await reply(result, ok, index, command, done=index == len(commands) - 1)
+        # Check if command is 'stop'
+        if command.lower() == 'stop':
+            _handle_stop_command(websocket, server_name)
     
-    try:
-        if rcon_client.connect() and rcon_client.authenticate():
-            result = rcon_client.send_command(command)
-            if result is None:
-                result = 'Failed to execute command'
-        else:
-            result = 'Failed to connect to RCON server'
-    except Exception as e:
-        result = f'Error executing command: {str(e)}'
-    finally:
-        rcon_client.close()
+    if not command_queue.submit(server_name, commands, on_result, timeout=data.get('timeout')):
+        await reply('Command queue is full, please retry later', ok=False)
+
+def _handle_stop_command(websocket, server_name):
+    """Clean up after a user ran the stop command on a server"""
+    print(f"User executed stop command on server {server_name}, performing cleanup")
     
-    # Check if command is 'stop'
-    if command.strip().lower() == 'stop':
-        # Command is 'stop', perform additional cleanup
-        print(f"User executed stop command on server {server_name}, performing cleanup")
-        
-        # Close persistent RCON connection for status monitoring
-        global persistent_rcon_client, persistent_rcon_server
-        if persistent_rcon_client:
-            persistent_rcon_client.close()
-            persistent_rcon_client = None
-            persistent_rcon_server = None
-        
-        # Reset server startup status
-        if server_name in server_startup_completed:
-            server_startup_completed[server_name] = False
-        
-        # Reset previous advanced data values
-        global previous_advanced_data
-        previous_advanced_data = {
-            'tps': '--',
-            'mspt': '--',
-            'players_online': '--',
-            'players_max': '--'
-        }
-        
-        # Notify client to update status
-        await send_message_with_log(websocket, {
-            'type': 'server_stopped',
-            'server_name': server_name
-        })
-        
-        # Publish server stopped event
-        await event_bus.publish(SERVER_STOPPED, websocket=websocket, data={'server_name': server_name})
+    # Mark the process as stopping so its exit is not reported as a crash
+    if server_name in server_processes:
+        server_processes[server_name]['stopping'] = True
     
-    await send_message_with_log(websocket, {
-        'type': 'command_result',
-        'result': result
-    })
+    # Close persistent RCON connection for status monitoring
+    _close_persistent_rcon(server_name)
+    
+    # Reset server startup status
+    if server_name in server_startup_completed:
+        server_startup_completed[server_name] = False
+    
+    # Reset advanced data values
+    _reset_advanced_data(server_name)
+    
+    # Queue the server stopped event, which notifies all clients once the server has exited;
+    # it is not awaited here because stopping closes the command queue running this callback.
+    # The stop command already went out, so the coordinator only waits for the exit
+    data = {'server_name': server_name}
+    if not event_bus.enqueue_nowait(SERVER_STOPPED, websocket=websocket, data=data, already_requested=True):
+        event_bus.publish_nowait(SERVER_STOPPED, websocket=websocket, data=data, already_requested=True)
 
 # Alias for backward compatibility
 execute_command = on_command_executed
 
+async def _run_queued_commands(server_name, commands):
+    """Run commands through the command queue of a server and return (result, ok)"""
+    if server_name not in server_processes or not server_startup_completed.get(server_name, False):
+        return 'Server is not running', False
+    
+    # Commands share the per-server queue and pooled RCON session with the console
+    loop = asyncio.get_running_loop()
+    finished = loop.create_future()
+    if len(commands) > MAX_BATCH_SIZE:
+        return f'{len(commands)} commands exceed the batch limit of {MAX_BATCH_SIZE}, nothing was run', False
+    results = []
+    
+    async def on_result(index, command, result, ok):
+        results.append((command, result, ok))
+        if index == len(commands) - 1 and not finished.done():
+            finished.set_result(None)
+    
+    if not command_queue.submit(server_name, commands, on_result):
+        return 'Command queue is full', False
+    try:
+        # The queue drops requests of a server that stops, don't wait forever for them
+        await asyncio.wait_for(finished, MAX_COMMAND_TIMEOUT * len(commands))
+    except asyncio.TimeoutError:
+        return 'Commands did not finish', False
+    result = '\n'.join(f'{command}: {output}' for command, output, _ in results)
+    return result, all(command_ok for _, _, command_ok in results)
+
+async def _run_scheduled_job(job):
+    """Run the action of a scheduled job and return (result, ok)"""
+    server_name = job.server_name
+    if job.action == 'restart':
+        # Restarts go through the orchestrator like a bulk restart of a single server
+        if server_name not in server_processes:
+            return 'Server is not running', False
+        results = await orchestrator.restart_many([server_name], concurrency=1)
+        state = results.get(server_name, 'failed')
+        result, ok = f'Restart {state}', state == 'ready'
+    else:
+        result, ok = await _run_queued_commands(server_name, job.commands)
+    
+    await broadcast_message_with_log({
+        'type': 'schedule_job_result',
+        'server_name': server_name,
+        'job_id': job.id,
+        'name': job.name,
+        'result': result,
+        'ok': ok
+    }, droppable=True)
+    return result, ok
+
+# Jobs of every server, stored in <server>/Fallenmoon/schedule.json
+scheduler = Scheduler(_run_scheduled_job)
+
+async def _run_spike_command(server_name, command):
+    """Send a console command for the lag spike detector, e.g. to start the spark profiler"""
+    return await _run_queued_commands(server_name, [command])
+
+async def _notify_lag(message):
+    """Tell every client about a lag spike or a stored lag incident"""
+    await broadcast_message_with_log(message, droppable=True)
+
+# MSPT spike detection, incidents are stored in <server>/Fallenmoon/incidents/
+spike_detector = SpikeDetector(_run_spike_command, _notify_lag)
+
+def _observe_mspt(server_name, mspt_value, host_info):
+    """Feed a polled MSPT value to the lag spike detector"""
+    try:
+        mspt = float(mspt_value)
+    except (TypeError, ValueError):
+        return
+    spike_detector.observe(
+        server_name, mspt, host_info,
+        pid=server_processes.get(server_name, {}).get('pid'),
+        spark_installed=server_info.get(server_name, {}).get('spark_installed', False)
+    )
+
+def _format_schedule(server_name):
+    """Format the jobs of a server with their next run for clients"""
+    return [
+        dict(job.to_dict(), next_run=job.next_run, running=job.running)
+        for job in scheduler.jobs(server_name)
+    ]
+
 async def on_server_stopped(**kwargs):
     """Handle server.stopped event"""
-    websocket = kwargs.get('websocket', current_client)
+    websocket = kwargs.get('websocket')
     data = kwargs.get('data')
     if not websocket or not data:
         return
     
-    server_name = data.get('server_name')
-    if server_name in server_processes:
-        try:
-            # Get server info
-            server_info_data = server_info.get(server_name, {})
-            rcon_port = server_info_data.get('rcon_port', 25575)
-            rcon_password = server_info_data.get('rcon_password', '')
-            
-            # Get the process object
-            process_info = server_processes[server_name]
-            process = process_info.get('process')
-            
-            # First try to stop server via RCON
-            if rcon_password and process:
-                rcon_client = RCONClient(host='localhost', port=rcon_port, password=rcon_password)
-                try:
-                    if rcon_client.connect() and rcon_client.authenticate():
-                        rcon_client.send_command('stop')
-                        print(f"Sent stop command to server {server_name} via RCON")
-                except Exception as e:
-                    print(f"Failed to send stop command via RCON: {e}")
-                finally:
-                    rcon_client.close()
-            
-            # Wait for 30 seconds before checking if process is still running
-            if process:
-                print(f"Waiting for server {server_name} to stop...")
-                await asyncio.sleep(30)
-                
-                # Check if process is still running
-                try:
-                    process_status = process.poll()
-                    if process_status is None:
-                        # Process is still running, force terminate
-                        print(f"Server {server_name} is still running, forcing termination...")
-                        process.kill()
-                        # Wait for process to terminate
-                        try:
-                            process.wait(timeout=5)
-                        except subprocess.TimeoutExpired:
-                            print(f"Failed to kill server {server_name} after 5 seconds")
-                    else:
-                        print(f"Server {server_name} stopped successfully")
-                except Exception as e:
-                    print(f"Error checking process status: {e}")
-        except Exception as e:
-            print(f"Error stopping server {server_name}: {e}")
-        finally:
-            # Remove from process list
-            del server_processes[server_name]
-            if server_name in server_info:
-                del server_info[server_name]
-            await send_message_with_log(websocket, {
-                'type': 'server_stopped',
-                'server_name': server_name
-            })
+    # Accept either a single server or a list of servers, which are stopped in parallel
+    server_names = data.get('server_names') or [data.get('server_name')]
+    await asyncio.gather(*(
+        _stop_tracked_server(server_name, data.get('timeout'), kwargs.get('already_requested', False))
+        for server_name in server_names
+    ))
+
+async def _stop_tracked_server(server_name, timeout=None, already_requested=False):
+    """Stop a tracked server through the stop coordinator and notify all clients, return whether it exited"""
+    if server_name not in server_processes:
+        return True
+    
+    outcome = 'failed'
+    try:
+        # Get server info
+        server_info_data = server_info.get(server_name, {})
+        
+        # Per-request timeout first, then the per-server setting from version.json
+        if timeout is None:
+            timeout = server_info_data.get('stop_timeout', DEFAULT_STOP_TIMEOUT)
+        
+        outcome = await stop_coordinator.stop(
+            server_name,
+            server_processes[server_name],
+            rcon_port=server_info_data.get('rcon_port', 25575),
+            rcon_password=server_info_data.get('rcon_password', ''),
+            timeout=float(timeout),
+            already_requested=already_requested
+        )
+        print(f"Stopping server {server_name} finished: {outcome}")
+    except Exception as e:
+        print(f"Error stopping server {server_name}: {e}")
+    
+    process_info = server_processes.get(server_name)
+    if process_info is None:
+        return True
+    if outcome == 'failed' and not stop_coordinator.has_exited(process_info):
+        # The JVM is still running: keep tracking it, so it can be stopped again and its exit is
+        # still reported, without an automatic restart of a server someone wanted stopped
+        process_info['stopping'] = False
+        process_info['stop_failed'] = True
+        await broadcast_message_with_log({
+            'type': 'error',
+            'message': f'Failed to stop server {server_name}, it is still running'
+        })
+        return False
+    
+    # Remove from process list
+    server_processes.pop(server_name, None)
+    server_info.pop(server_name, None)
+    server_startup_completed.pop(server_name, None)
+    _close_persistent_rcon(server_name)
+    command_queue.close(server_name)
+    advanced_data.pop(server_name, None)
+    adaptive_poller.forget(server_name)
+    status_deltas.forget(status_topic(server_name))
+    await broadcast_message_with_log({
+        'type': 'server_stopped',
+        'server_name': server_name
+    })
+    return True
+
+async def on_server_stop_progress(**kwargs):
+    """Handle server.stop.progress event"""
+    await broadcast_message_with_log({
+        'type': 'server_stop_progress',
+        'server_name': kwargs.get('server_name'),
+        'stage': kwargs.get('stage'),
+        'elapsed': kwargs.get('elapsed')
+    })
 
 # Alias for backward compatibility
 stop_server = on_server_stopped
 
 async def on_server_started(**kwargs):
     """Handle server.started event"""
-    websocket = kwargs.get('websocket', current_client)
+    # websocket may be None when the server is restarted automatically after a crash
+    websocket = kwargs.get('websocket')
     data = kwargs.get('data')
-    if not websocket or not data:
+    if not data:
         return
     
     server_name = data.get('server_name')
     
+    if websocket is not None:
+        # Starting a server by hand gives its automatic restarts a fresh budget
+        auto_restart_history.pop(server_name, None)
+        pending_restart = auto_restart_tasks.pop(server_name, None)
+        if pending_restart and pending_restart is not asyncio.current_task():
+            pending_restart.cancel()
+    
     try:
         # Get server path
         server_path = os.path.join('cached_minecraft_servers', server_name)
@@ -563,6 +717,10 @@ async def on_server_started(**kwargs):
             })
             return
         
+        # Record the launch time so log monitoring ignores the previous run's latest.log
+        started_at = time.time()
+        server_startup_completed[server_name] = False
+        
         # Start the server with a visible console window
         # Use CREATE_NEW_CONSOLE flag to show the console window
         process = subprocess.Popen(
@@ -579,50 +737,42 @@ async def on_server_started(**kwargs):
             with open(version_file, 'r', encoding='utf-8') as f:
                 server_info_data = json.load(f)
         
-        # Check if spark is installed
-        spark_installed = False
-        # Check mods directory
-        mods_dir = os.path.join(server_path, 'mods')
-        if os.path.exists(mods_dir):
-            for file in os.listdir(mods_dir):
-                if file.startswith('spark-') and file.endswith('.jar'):
-                    spark_installed = True
-                    break
-        
-        # Check plugins directory if not found in mods
-        if not spark_installed:
-            plugins_dir = os.path.join(server_path, 'plugins')
-            if os.path.exists(plugins_dir):
-                for file in os.listdir(plugins_dir):
-                    if file.startswith('spark-') and file.endswith('.jar'):
-                        spark_installed = True
-                        break
-        
-        # Store server info with spark status
+        # Store server info with spark status as far as it is known yet,
+        # the jar index corrects it in the background
         server_info[server_name] = {
             **server_info_data,
-            'spark_installed': spark_installed
+            'spark_installed': _spark_installed(server_name, server_path)
         }
+        _index_jars_in_background(server_name)
+        _index_logs_in_background(server_name)
         
         # Add server to the process list
         server_processes[server_name] = {
             'name': server_name,
             'pid': process.pid,  # Save the actual PID
             'process': process,  # Save the process object
-            'status': 'running'
+            'status': 'running',
+            'started_at': started_at
         }
         
+        # Watch the server process so crashes are detected the moment the JVM exits
+        process_watcher.watch(server_name, server_processes[server_name])
+        
+        # A fresh JVM ticks differently, start a new MSPT baseline
+        spike_detector.forget(server_name)
+        
         # Start log monitoring for this server immediately after starting
         asyncio.create_task(monitor_server_logs(server_path, server_name))
         
-        # Send confirmation
-        await send_message_with_log(websocket, {
+        # Notify all clients and send them the updated server list
+        await broadcast_message_with_log({
             'type': 'server_started',
             'server_name': server_name
         })
-        
-        # Send updated server list
-        await on_refresh_servers(websocket=websocket)
+        await broadcast_message_with_log({
+            'type': 'server_list',
+            'servers': _format_server_list()
+        })
         
     except Exception as e:
         await send_message_with_log(websocket, {
@@ -633,9 +783,117 @@ async def on_server_started(**kwargs):
 # Alias for backward compatibility
 start_server = on_server_started
 
+async def _orchestrated_start(server_name):
+    """Start a server on behalf of the lifecycle orchestrator"""
+    if server_name not in server_processes:
+        await on_server_started(data={'server_name': server_name})
+    return server_name in server_processes
+
+async def _orchestrated_stop(server_name):
+    """Stop a server on behalf of the lifecycle orchestrator"""
+    return await _stop_tracked_server(server_name)
+
+orchestrator = LifecycleOrchestrator(
+    start=_orchestrated_start,
+    stop=_orchestrated_stop,
+    is_ready=lambda server_name: server_startup_completed.get(server_name, False)
+)
+
+def _dependency_list(value):
+    """Normalize the dependencies of one server to a list of names, a single name is allowed"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list) and all(isinstance(dep, str) for dep in value):
+        return list(value)
+    raise ValueError(f'Dependencies must be a server name or a list of server names, got {value!r}')
+
+async def _run_bulk_operation(operation, **kwargs):
+    """Run a bulk start/stop/restart request through the orchestrator"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    server_names = [server_name for server_name in data.get('server_names', []) if server_name]
+    if not server_names:
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': 'Server names are required'
+        })
+        return
+    
+    # Dependencies come from depends_on in each version.json plus the request itself
+    dependencies = {}
+    try:
+        for server_name in server_names:
+            version_data = ServerManager._get_server_info(os.path.join('cached_minecraft_servers', server_name))
+            dependencies[server_name] = _dependency_list(version_data.get('depends_on'))
+        extra_dependencies = data.get('dependencies') or {}
+        if not isinstance(extra_dependencies, dict):
+            raise ValueError('Dependencies must map server names to their dependencies')
+        for server_name, deps in extra_dependencies.items():
+            dependencies.setdefault(server_name, [])
+            dependencies[server_name].extend(
+                dep for dep in _dependency_list(deps) if dep not in dependencies[server_name])
+    except ValueError as e:
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': str(e)
+        })
+        return
+    
+    # Rolling restarts default to one server at a time to keep the network up
+    concurrency = data.get('concurrency', 1 if operation == 'restart' else DEFAULT_CONCURRENCY)
+    ready_timeout = float(data.get('ready_timeout', DEFAULT_READY_TIMEOUT))
+    
+    try:
+        if operation == 'start':
+            results = await orchestrator.start_many(server_names, dependencies, concurrency, ready_timeout)
+        elif operation == 'stop':
+            results = await orchestrator.stop_many(server_names, dependencies, concurrency)
+        else:
+            results = await orchestrator.restart_many(server_names, dependencies, concurrency, ready_timeout)
+    except DependencyCycleError as e:
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Server dependencies contain a cycle: {e}'
+        })
+        return
+    
+    await send_message_with_log(websocket, {
+        'type': 'bulk_done',
+        'operation': operation,
+        'results': results
+    })
+
+async def on_bulk_start(**kwargs):
+    """Handle bulk.start event"""
+    await _run_bulk_operation('start', **kwargs)
+
+async def on_bulk_stop(**kwargs):
+    """Handle bulk.stop event"""
+    await _run_bulk_operation('stop', **kwargs)
+
+async def on_bulk_restart(**kwargs):
+    """Handle bulk.restart event"""
+    await _run_bulk_operation('restart', **kwargs)
+
+async def on_bulk_progress(**kwargs):
+    """Handle bulk.progress event"""
+    await broadcast_message_with_log({
+        'type': 'bulk_progress',
+        'operation': kwargs.get('operation'),
+        'server_name': kwargs.get('server_name'),
+        'state': kwargs.get('state'),
+        'completed': kwargs.get('completed'),
+        'total': kwargs.get('total')
+    })
+
 async def on_search_servers(**kwargs):
     """Handle search.servers event"""
-    websocket = kwargs.get('websocket', current_client)
+    websocket = kwargs.get('websocket')
     if not websocket:
         return
     
@@ -669,7 +927,7 @@ search_servers = on_search_servers
 
 async def on_server_selected(**kwargs):
     """Handle server.selected event"""
-    websocket = kwargs.get('websocket', current_client)
+    websocket = kwargs.get('websocket')
     data = kwargs.get('data')
     if not websocket or not data:
         return
@@ -693,7 +951,7 @@ select_server = on_server_selected
 
 async def on_config_save(**kwargs):
     """Handle config.save event"""
-    websocket = kwargs.get('websocket', current_client)
+    websocket = kwargs.get('websocket')
     data = kwargs.get('data')
     if not websocket or not data:
         return
@@ -712,9 +970,42 @@ async def on_config_save(**kwargs):
 # Alias for backward compatibility
 save_config = on_config_save
 
+# Component directories relative to the server directory
+COMPONENT_DIRS = {
+    'mods': ('mods',),
+    'plugins': ('plugins',),
+    'datapacks': ('world', 'datapacks'),
+    'resourcepacks': ('resourcepacks',),
+    'schematics': ('schematics',)
+}
+# Number of files sent per components_page message
+COMPONENT_PAGE_SIZE = 200
+
+def _scan_component_dir(component_path):
+    """List the files of a component directory sorted by name (blocking, run in an executor)"""
+    files = []
+    # scandir returns the file type with each entry, and on Windows the stat result too,
+    # so there is no extra isfile/stat round trip per file
+    with os.scandir(component_path) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+                file_stats = entry.stat()
+            except OSError:
+                # The file disappeared while scanning
+                continue
+            files.append({
+                'name': entry.name,
+                'size': file_stats.st_size,
+                'mtime': file_stats.st_mtime
+            })
+    files.sort(key=lambda file: file['name'].lower())
+    return files
+
 async def on_components_get(**kwargs):
     """Handle components.get event"""
-    websocket = kwargs.get('websocket', current_client)
+    websocket = kwargs.get('websocket')
     data = kwargs.get('data')
     if not websocket or not data:
         return
@@ -737,38 +1028,66 @@ async def on_components_get(**kwargs):
             })
             return
         
-        # Define component directories mapping
+        # Get the component directories that exist
         component_dirs = {
-            'mods': os.path.join(server_path, 'mods'),
-            'plugins': os.path.join(server_path, 'plugins'),
-            'datapacks': os.path.join(server_path, 'world', 'datapacks'),
-            'resourcepacks': os.path.join(server_path, 'resourcepacks'),
-            'schematics': os.path.join(server_path, 'schematics')
+            component_type: os.path.join(server_path, *parts)
+            for component_type, parts in COMPONENT_DIRS.items()
+            if os.path.isdir(os.path.join(server_path, *parts))
         }
         
-        # Get files for each component type
-        components = {}
-        for component_type, component_path in component_dirs.items():
-            if os.path.exists(component_path):
-                # Get list of files in the directory
-                files = []
-                for file_name in os.listdir(component_path):
-                    file_path = os.path.join(component_path, file_name)
-                    if os.path.isfile(file_path):
-                        # Get file stats
-                        file_stats = os.stat(file_path)
-                        files.append({
-                            'name': file_name,
-                            'size': file_stats.st_size,
-                            'mtime': file_stats.st_mtime
-                        })
-                components[component_type] = files
+        # Tell the client which component types are coming, so it can lay out the tabs right away
+        await send_message_with_log(websocket, {
+            'type': 'components_begin',
+            'server_name': server_name,
+            'component_types': list(component_dirs.keys())
+        })
+        
+        # Scan all directories in the executor at once and stream each one as soon as it is listed,
+        # the event loop keeps sending status updates meanwhile
+        loop = asyncio.get_running_loop()
+        
+        async def scan(component_type, component_path):
+            return component_type, await loop.run_in_executor(None, _scan_component_dir, component_path)
+        
+        counts = {}
+        for scanned in asyncio.as_completed([scan(*item) for item in component_dirs.items()]):
+            component_type, files = await scanned
+            counts[component_type] = len(files)
+            pages = max(1, (len(files) + COMPONENT_PAGE_SIZE - 1) // COMPONENT_PAGE_SIZE)
+            for page in range(pages):
+                await send_message_with_log(websocket, {
+                    'type': 'components_page',
+                    'server_name': server_name,
+                    'component_type': component_type,
+                    'page': page,
+                    'final': page == pages - 1,
+                    'total': len(files),
+                    'files': files[page * COMPONENT_PAGE_SIZE:(page + 1) * COMPONENT_PAGE_SIZE]
+                })
         
         await send_message_with_log(websocket, {
-            'type': 'components_data',
+            'type': 'components_done',
             'server_name': server_name,
-            'components': components
+            'counts': counts
         })
+        
+        # Mod ids, versions and dependencies follow the file listing; only new or changed jars are opened
+        jar_types = [component_type for component_type in ('mods', 'plugins') if counts.get(component_type)]
+        if jar_types:
+            await _refresh_jar_index(server_name)
+            for component_type in jar_types:
+                await send_message_with_log(websocket, {
+                    'type': 'components_metadata',
+                    'server_name': server_name,
+                    'component_type': component_type,
+                    'metadata': {
+                        file_name: {'loader': entry.get('loader'), 'mods': entry.get('mods', [])}
+                        for file_name, entry in jar_index.jars(server_name, component_type).items()
+                    }
+                })
+            
+            # Duplicate and conflicting jars, checked against the jars of every server
+            await _send_component_duplicates(websocket, server_name)
     except Exception as e:
             await send_message_with_log(websocket, {
                 'type': 'error',
@@ -778,9 +1097,33 @@ async def on_components_get(**kwargs):
 # Alias for backward compatibility
 get_server_components = on_components_get
 
+async def _send_component_duplicates(websocket, server_name):
+    """Report identical jars, two jars declaring the same mod and jars shared with other servers"""
+    try:
+        await hash_index.refresh()
+    except Exception as e:
+        print(f"Error hashing jars: {e}")
+        return
+    
+    duplicates = hash_index.duplicates(server_name)
+    # Identical copies are already reported as duplicates, conflicts are the jars that really differ
+    identical = [set(group['files']) for group in duplicates]
+    conflicts = [
+        conflict for conflict in jar_index.conflicts(server_name)
+        if not any(set(conflict['files']) <= files for files in identical)
+    ]
+    
+    await send_message_with_log(websocket, {
+        'type': 'components_duplicates',
+        'server_name': server_name,
+        'duplicates': duplicates,
+        'conflicts': conflicts,
+        'shared': hash_index.shared(server_name)
+    })
+
 async def on_schematic_delete(**kwargs):
     """Handle schematic.delete event"""
-    websocket = kwargs.get('websocket', current_client)
+    websocket = kwargs.get('websocket')
     data = kwargs.get('data')
     if not websocket or not data:
         return
@@ -821,442 +1164,950 @@ async def on_schematic_delete(**kwargs):
 # Alias for backward compatibility
 delete_schematic = on_schematic_delete
 
-async def send_heartbeat(websocket):
-    """Send periodic heartbeat to client to keep connection alive"""
-    while True:
-        try:
-            await send_message_with_log(websocket, {'type': 'heartbeat'})
-            await asyncio.sleep(30)  # Send heartbeat every 30 seconds
-        except websockets.exceptions.ConnectionClosedError:
-            break
-        except Exception as e:
-            print(f"Error sending heartbeat: {e}")
-            break
-
-async def _ensure_persistent_rcon():
-    """Ensure persistent RCON connection is established and valid"""
-    global persistent_rcon_client, persistent_rcon_server
-    
-    # Check if any server is connected
-    if not server_processes:
-        # No server connected, close any existing persistent connection
-        if persistent_rcon_client:
-            persistent_rcon_client.close()
-            persistent_rcon_client = None
-            persistent_rcon_server = None
-        return False
+async def on_bus_stats(**kwargs):
+    """Handle bus.stats event: report the slowest event handlers"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data') or {}
+    if not websocket:
+        return
+    
+    await send_message_with_log(websocket, {
+        'type': 'bus_stats',
+        'handlers': event_bus.slowest_handlers(
+            limit=int(data.get('limit', 10)),
+            sort_by=data.get('sort_by', 'p95_ms')
+        ),
+        'queues': event_bus.get_queue_stats(),
+        'pending_tasks': event_bus.pending_task_count()
+    })
+
+async def on_schedule_get(**kwargs):
+    """Handle schedule.get event"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    server_name = data.get('server_name')
+    await send_message_with_log(websocket, {
+        'type': 'schedule',
+        'server_name': server_name,
+        'jobs': _format_schedule(server_name)
+    })
+
+async def on_schedule_save(**kwargs):
+    """Handle schedule.save event: replace the jobs of a server"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    server_name = data.get('server_name')
+    if not server_name or not os.path.isdir(os.path.join('cached_minecraft_servers', server_name)):
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Server {server_name} not found'
+        })
+        return
+    
+    try:
+        scheduler.set_jobs(server_name, data.get('jobs') or [])
+    except (KeyError, TypeError, ValueError, OSError) as e:
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Invalid schedule: {e}'
+        })
+        return
+    
+    await send_message_with_log(websocket, {
+        'type': 'schedule',
+        'server_name': server_name,
+        'jobs': _format_schedule(server_name)
+    })
+
+async def on_schedule_run(**kwargs):
+    """Handle schedule.run event: run a job right away"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    job = scheduler.find(data.get('server_name'), data.get('job_id'))
+    if job is None:
+        message = f"Scheduled job {data.get('job_id')} not found"
+    elif not scheduler.run_now(job):
+        message = f'Scheduled job {job.name} is already running'
+    else:
+        return
+    await send_message_with_log(websocket, {
+        'type': 'error',
+        'message': message
+    })
+
+async def on_crash_analyze(**kwargs):
+    """Handle crash.analyze event: analyze the latest crash of a server and list its past crashes"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    server_name = data.get('server_name')
+    if not server_name or not os.path.isdir(os.path.join('cached_minecraft_servers', server_name)):
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Server {server_name} not found'
+        })
+        return
+    
+    # Looking at a crash again does not count it in the index
+    loop = asyncio.get_running_loop()
+    analysis = await loop.run_in_executor(None, crash_analyzer.analyze, server_name)
+    history = await loop.run_in_executor(None, crash_analyzer.history, server_name)
+    await send_message_with_log(websocket, {
+        'type': 'crash_analysis',
+        'history': history,
+        **analysis
+    })
+
+async def on_log_search(**kwargs):
+    """Handle log.search event: full-text search of the current and archived logs of a server"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    server_name = data.get('server_name')
+    if not server_name or not os.path.isdir(os.path.join('cached_minecraft_servers', server_name)):
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Server {server_name} not found'
+        })
+        return
+    
+    query = str(data.get('query') or '')
+    try:
+        # Time range in epoch seconds, both ends optional
+        start = float(data['start']) if data.get('start') is not None else None
+        end = float(data['end']) if data.get('end') is not None else None
+        page = int(data.get('page') or 0)
+        page_size = int(data.get('page_size') or DEFAULT_PAGE_SIZE)
+    except (TypeError, ValueError):
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': 'Invalid log search parameters'
+        })
+        return
+    
+    # Lines written since the last update are searchable right away
+    await _refresh_log_index(server_name)
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(
+            None, lambda: log_index.search(server_name, query, start, end, page, page_size))
+    except ValueError as e:
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': str(e)
+        })
+        return
+    await send_message_with_log(websocket, {
+        'type': 'log_search_result',
+        'server_name': server_name,
+        'query': query,
+        'start': start,
+        'end': end,
+        'page': page,
+        **result
+    })
+
+async def on_log_archive_scan(**kwargs):
+    """Handle log.archive_scan event: grep the rotated log archives of a server on every core"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    server_name = data.get('server_name')
+    if not server_name or not os.path.isdir(os.path.join('cached_minecraft_servers', server_name)):
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Server {server_name} not found'
+        })
+        return
+    
+    pattern = str(data.get('pattern') or '')
+    level = str(data.get('level') or '')
+    ignore_case = bool(data.get('ignore_case', True))
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Invalid pattern: {e}'
+        })
+        return
+    
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    archives = await loop.run_in_executor(
+        None, log_archive_reader.archives, server_name, data.get('start_date'), data.get('end_date'))
+    await send_message_with_log(websocket, {
+        'type': 'log_archive_begin',
+        'server_name': server_name,
+        'pattern': pattern,
+        'level': level,
+        'archives': [{'file': archive['file'], 'date': archive['date'], 'size': archive['size']} for archive in archives]
+    })
+    
+    # Archives are decompressed and filtered in parallel, but arrive in chronological order
+    scanned = matched = 0
+    truncated = False
+    results = log_archive_reader.scan(archives, pattern, ignore_case, level)
+    try:
+        async for result in results:
+            # Stop decompressing for a client that went away
+            if websocket not in broadcast_hub:
+                return
+            scanned += result['scanned']
+            matched += len(result['matches'])
+            truncated = truncated or result['truncated']
+            if result['timed_out']:
+                await send_message_with_log(websocket, {
+                    'type': 'error',
+                    'message': f"Scanning {result['archive']['file']} took over {ARCHIVE_SCAN_TIMEOUT}s, "
+                               f"the pattern is too slow; the scan was stopped"
+                })
+            lines = [{'number': number, 'log': line} for number, line in result['matches']]
+            for index in range(0, len(lines), LINES_PER_MESSAGE):
+                await send_message_with_log(websocket, {
+                    'type': 'log_archive_lines',
+                    'server_name': server_name,
+                    'file': result['archive']['file'],
+                    'date': result['archive']['date'],
+                    'lines': lines[index:index + LINES_PER_MESSAGE]
+                })
+    finally:
+        # Cancels the archives still queued on the process pool
+        await results.aclose()
+    
+    await send_message_with_log(websocket, {
+        'type': 'log_archive_done',
+        'server_name': server_name,
+        'archives': len(archives),
+        'scanned': scanned,
+        'matches': matched,
+        'truncated': truncated,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+async def on_log_filter_set(**kwargs):
+    """Handle log.filter_set event: choose which log lines a client is sent"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or data is None:
+        return
+    
+    try:
+        log_filter = LogFilter.from_dict(data)
+    except ValueError as e:
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': str(e)
+        })
+        return
+    
+    if log_filter.active:
+        log_filters[websocket] = log_filter
+    else:
+        log_filters.pop(websocket, None)
+    await send_message_with_log(websocket, {
+        'type': 'log_filter',
+        'filter': log_filter.to_dict()
+    })
+
+async def on_incident_list(**kwargs):
+    """Handle incident.list event: list the stored lag incidents of a server"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    server_name = data.get('server_name')
+    if not server_name or not os.path.isdir(os.path.join('cached_minecraft_servers', server_name)):
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Server {server_name} not found'
+        })
+        return
+    
+    loop = asyncio.get_running_loop()
+    incidents = await loop.run_in_executor(None, spike_detector.incidents, server_name)
+    await send_message_with_log(websocket, {
+        'type': 'lag_incidents',
+        'server_name': server_name,
+        'threshold': spike_detector.threshold(server_name),
+        'incidents': incidents
+    })
+
+async def on_incident_get(**kwargs):
+    """Handle incident.get event: send the full bundle of a lag incident"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    server_name = data.get('server_name')
+    loop = asyncio.get_running_loop()
+    incident = None
+    if server_name and os.path.isdir(os.path.join('cached_minecraft_servers', server_name)):
+        incident = await loop.run_in_executor(None, spike_detector.incident, server_name, data.get('incident_id'))
+    if incident is None:
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f"Lag incident {data.get('incident_id')} not found"
+        })
+        return
+    await send_message_with_log(websocket, {
+        'type': 'lag_incident_detail',
+        'server_name': server_name,
+        'incident': incident
+    })
+
+async def on_player_stats(**kwargs):
+    """Handle player.stats event: online players, concurrent players over time and top playtime"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    server_name = data.get('server_name')
+    if not server_name or not os.path.isdir(os.path.join('cached_minecraft_servers', server_name)):
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Server {server_name} not found'
+        })
+        return
+    
+    try:
+        # Time range in epoch seconds, the last day by default
+        end = float(data['end']) if data.get('end') is not None else time.time()
+        start = float(data['start']) if data.get('start') is not None else end - 86400
+        limit = max(1, min(int(data.get('limit') or 10), 100))
+    except (TypeError, ValueError):
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': 'Invalid player stats parameters'
+        })
+        return
     
-    # Get first connected server (assuming only one server is connected at a time)
-    server_name = list(server_processes.keys())[0]
+    # Answered from the session logs, no RCON command is sent
+    loop = asyncio.get_running_loop()
+    stats = await loop.run_in_executor(None, player_tracker.stats, server_name, start, end, limit)
+    await send_message_with_log(websocket, {
+        'type': 'player_stats',
+        'server_name': server_name,
+        'start': start,
+        'end': end,
+        **stats
+    })
+
+async def on_world_stats(**kwargs):
+    """Handle world.stats event: size, chunk count and growth of each dimension of a server"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data')
+    if not websocket or not data:
+        return
+    
+    server_name = data.get('server_name')
+    if not server_name or not os.path.isdir(os.path.join('cached_minecraft_servers', server_name)):
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Server {server_name} not found'
+        })
+        return
+    
+    try:
+        # Only region files changed since the last scan have their headers read
+        stats = await world_analyzer.refresh(server_name)
+    except Exception as e:
+        await send_message_with_log(websocket, {
+            'type': 'error',
+            'message': f'Error analyzing worlds of server {server_name}: {str(e)}'
+        })
+        return
+    
+    await send_message_with_log(websocket, {
+        'type': 'world_stats',
+        'server_name': server_name,
+        **stats
+    })
+
+async def on_client_subscribe(**kwargs):
+    """Handle client.subscribe event: subscribe a client to status, log or metric topics"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data') or {}
+    if not websocket:
+        return
+    
+    for topic in data.get('topics') or []:
+        if not isinstance(topic, str) or not topic.startswith(TOPIC_PREFIXES):
+            continue
+        if topic.startswith('logs:'):
+            # Log topics need a running tailer and start with the cached startup log
+            server_name = topic[len('logs:'):]
+            if server_name in server_processes and topic not in broadcast_hub.topics(websocket):
+                await _subscribe_logs(websocket, os.path.join('cached_minecraft_servers', server_name))
+        else:
+            broadcast_hub.subscribe(websocket, topic)
+            # A (re)subscribing client starts from a full status snapshot
+            status_deltas.resync(websocket, topic)
+    
+    await send_message_with_log(websocket, {
+        'type': 'subscriptions',
+        'topics': broadcast_hub.topics(websocket)
+    })
+
+async def on_client_unsubscribe(**kwargs):
+    """Handle client.unsubscribe event"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data') or {}
+    if not websocket:
+        return
+    
+    # Producers notice the missing subscribers on their next round and stop by themselves
+    for topic in data.get('topics') or []:
+        broadcast_hub.unsubscribe(websocket, topic)
+    
+    await send_message_with_log(websocket, {
+        'type': 'subscriptions',
+        'topics': broadcast_hub.topics(websocket)
+    })
+
+async def on_status_resync(**kwargs):
+    """Handle status.resync event: the client lost a delta frame and needs a full snapshot"""
+    websocket = kwargs.get('websocket')
+    data = kwargs.get('data') or {}
+    if not websocket:
+        return
+    
+    server_name = data.get('server_name')
+    status_deltas.resync(websocket, status_topic(server_name) if server_name else HOST_METRICS_TOPIC)
+
+async def send_heartbeat():
+    """Send periodic heartbeat to all clients to keep connections alive"""
+    while True:
+        await asyncio.sleep(30)  # Send heartbeat every 30 seconds
+        try:
+            await broadcast_message_with_log(HEARTBEAT_FRAME)
+        except Exception as e:
+            print(f"Error sending heartbeat: {e}")
+
+def _default_advanced_data():
+    """Get placeholder values shown until the first RCON reply arrives"""
+    return {
+        'tps': '--',
+        'mspt': '--',
+        'players_online': '--',
+        'players_max': '--'
+    }
+
+def _reset_advanced_data(server_name):
+    """Reset the advanced data values of a server"""
+    advanced_data[server_name] = _default_advanced_data()
+
+def _close_persistent_rcon(server_name):
+    """Close the persistent RCON connection of a server, if any"""
+    client = persistent_rcon_clients.pop(server_name, None)
+    if client:
+        client.close()
+
+def _remove_minecraft_formatting(text):
+    """Remove Minecraft formatting codes (§ followed by a code character)"""
+    return re.sub(r'§[0-9a-fklmnor]', '', text, flags=re.IGNORECASE)
+
+async def _ensure_persistent_rcon(server_name):
+    """Ensure the persistent RCON connection of a server is established and return it"""
+    # Check if the server is still tracked
+    if server_name not in server_processes:
+        _close_persistent_rcon(server_name)
+        return None
     
     # Check if server has completed startup
-    if server_name not in server_startup_completed or not server_startup_completed[server_name]:
+    if not server_startup_completed.get(server_name):
         # Server hasn't completed startup yet, don't establish RCON connection
         print(f"Server {server_name} hasn't completed startup yet, skipping RCON connection")
-        return False
+        return None
     
-    # Check if we already have a valid persistent connection for this server
-    if persistent_rcon_client and persistent_rcon_server == server_name:
-        # Try to send a simple command to check if connection is still valid
-        # Minecraft RCON doesn't support 'ping' command, use 'list' instead
-        try:
-            # Send a simple command that should always work
-            persistent_rcon_client.send_command('list')
-            return True
-        except Exception as e:
-            print(f"Persistent RCON connection is invalid: {e}")
-            persistent_rcon_client.close()
-            persistent_rcon_client = None
-            persistent_rcon_server = None
+    # Reuse the existing connection. There is no separate 'list' liveness probe any more: it doubled the
+    # RCON traffic of every server each second, while a status query that goes unanswered already makes
+    # _poll_advanced_data close the connection, and process_watcher reports servers that exit
+    client = persistent_rcon_clients.get(server_name)
+    if client and client.socket:
+        return client
     
     # Get server info
     server_info_data = server_info.get(server_name, {})
     rcon_port = server_info_data.get('rcon_port', 25575)
     rcon_password = server_info_data.get('rcon_password', '')
-    spark_installed = server_info_data.get('spark_installed', False)
     
     if not rcon_password:
-        return False
+        return None
     
     # Create new persistent RCON client
     try:
         client = RCONClient(host='localhost', port=rcon_port, password=rcon_password)
         if client.connect() and client.authenticate():
-            persistent_rcon_client = client
-            persistent_rcon_server = server_name
+            persistent_rcon_clients[server_name] = client
             print(f"Persistent RCON connection established for server {server_name}")
-            return True
+            return client
         else:
             client.close()
-            return False
+            return None
     except Exception as e:
         print(f"Failed to establish persistent RCON connection: {e}")
-        return False
+        return None
 
-async def send_server_status():
-    """Send server status updates to the connected client"""
-    global rotation_counter, persistent_rcon_client, persistent_rcon_server
-    
-    # Store previous network IO counters to calculate rate
-    previous_network_io = psutil.net_io_counters()
+def _get_cpu_frequency():
+    """Get CPU frequency (MHz) based on platform"""
+    cpu_frequency = 0
+    current_platform = platform.system()
     
-    while True:
+    if current_platform in ['Linux', 'Darwin']:  # Linux or macOS
+        # Use original logic for Linux/macOS
+        cpu_freq = psutil.cpu_freq()
+        cpu_frequency = cpu_freq.current if cpu_freq else 0
+    elif current_platform == 'Windows':  # Windows
+        # Try to use WMI with the correct class and property based on WMI Explorer findings
+        wmi_success = False
         try:
-            if current_client is not None:
-                # Get current network IO counters
-                current_network_io = psutil.net_io_counters()
-                
-                # Calculate network IO rate (bytes per second)
-                network_rate = {
-                    'bytes_sent': current_network_io.bytes_sent - previous_network_io.bytes_sent,
-                    'bytes_recv': current_network_io.bytes_recv - previous_network_io.bytes_recv
-                }
-                
-                # Update previous network IO counters
-                previous_network_io = current_network_io
-                
-                # Get memory information
-                memory = psutil.virtual_memory()
-                
-                # Get CPU frequency based on platform
-                cpu_frequency = 0
-                current_platform = platform.system()
+            import wmi
+            import pythoncom
+            
+            # Initialize COM library for this thread
+            pythoncom.CoInitialize()
+            
+            # Create WMI instance
+            c = wmi.WMI()
+            
+            # Use the specified SELECT statement to query ActualFrequency
+            query = "SELECT ActualFrequency, Name FROM Win32_PerfFormattedData_Counters_ProcessorInformation WHERE Name='_Total'"
+            result = c.query(query)
+            
+            total_freq = None
+            fallback_freq = None
+            
+            # Check if any results were returned
+            if result:
+                # Get the first result (should be _Total instance)
+                item = result[0]
+                try:
+                    # Check if ActualFrequency attribute exists
+                    if hasattr(item, 'ActualFrequency'):
+                        # ActualFrequency is already in MHz, no conversion needed
+                        actual_freq = float(item.ActualFrequency)
+                        # Store _Total instance frequency
+                        total_freq = actual_freq
+                        instance_name = str(item.Name) if hasattr(item, 'Name') else "_Total"
+                        print(f"Found _Total instance frequency: {total_freq} MHz")
+                except (ValueError, TypeError, AttributeError) as e:
+                    print(f"Error processing result: {e}")
+            
+            # If _Total query failed, try without WHERE clause
+            if total_freq is None:
+                print("_Total instance query failed, trying without WHERE clause")
+                query_all = "SELECT ActualFrequency, Name FROM Win32_PerfFormattedData_Counters_ProcessorInformation"
+                result_all = c.query(query_all)
                 
-                if current_platform in ['Linux', 'Darwin']:  # Linux or macOS
-                    # Use original logic for Linux/macOS
-                    cpu_freq = psutil.cpu_freq()
-                    cpu_frequency = cpu_freq.current if cpu_freq else 0
-                elif current_platform == 'Windows':  # Windows
-                    # Try to use WMI with the correct class and property based on WMI Explorer findings
-                    wmi_success = False
-                    try:                        
-                        import wmi
-                        import pythoncom
+                for i, item in enumerate(result_all):
+                    try:
+                        if hasattr(item, 'ActualFrequency') and hasattr(item, 'Name'):
+                            instance_name = str(item.Name)
+                            actual_freq = float(item.ActualFrequency)
+                            
+                            if instance_name == '_Total':
+                                total_freq = actual_freq
+                                print(f"Found _Total instance frequency: {total_freq} MHz (index: {i})")
+                                break
+                            elif fallback_freq is None:
+                                fallback_freq = actual_freq
+                                print(f"Found fallback frequency: {fallback_freq} MHz (instance: {instance_name}, index: {i})")
+                    except (ValueError, TypeError, AttributeError) as e:
+                        print(f"Error processing result {i}: {e}")
+                        continue
+            
+            # Use _Total instance frequency if available, otherwise use fallback
+            if total_freq is not None:
+                cpu_frequency = total_freq
+                print(f"Windows CPU frequency via WMI ActualFrequency: {cpu_frequency} MHz (instance: _Total)")
+                wmi_success = True
+            elif fallback_freq is not None:
+                cpu_frequency = fallback_freq
+                print(f"No _Total instance found, using fallback frequency: {cpu_frequency} MHz")
+                wmi_success = True
+            else:
+                # No valid frequency found in query results
+                print(f"No valid frequency found in query results. Result count: {len(result_all) if 'result_all' in locals() else 0}")
+        except Exception as e:
+            print(f"Error getting CPU frequency with WMI: {e}")
+            traceback.print_exc()
+        finally:
+            # Uninitialize COM library for this thread
+            try:
+                pythoncom.CoUninitialize()
+            except:
+                pass
+        
+        # If WMI failed, fallback to psutil
+        if not wmi_success:
+            try:
+                cpu_freq = psutil.cpu_freq()
+                if cpu_freq:
+                    cpu_frequency = cpu_freq.current
+                    print(f"Fallback to psutil CPU frequency: {cpu_frequency} MHz")
+                else:
+                    cpu_frequency = 0.0
+                    print(f"psutil.cpu_freq() returned None, using default: {cpu_frequency} MHz")
+            except Exception as e:
+                print(f"Error getting CPU frequency with psutil: {e}")
+                cpu_frequency = 0.0
+                print(f"Fallback to default CPU frequency: {cpu_frequency} MHz")
+    
+    return cpu_frequency
+
+# Host metrics are collected off the event loop: cpu_percent samples for 0.1s and WMI calls block.
+# One thread keeps collections from overlapping and WMI in a single COM apartment
+host_metrics_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='host-metrics')
+
+def _collect_host_metrics(previous_network_io, previous_io_time):
+    """Collect host CPU, memory and network metrics; return them with the new network IO baseline"""
+    # Get current network IO counters
+    current_network_io = psutil.net_io_counters()
+    current_io_time = time.monotonic()
+    elapsed = max(current_io_time - previous_io_time, 0.001)
+    
+    # Calculate network IO rate (bytes per second), the loop may have idled while nobody watched
+    network_rate = {
+        'bytes_sent': int((current_network_io.bytes_sent - previous_network_io.bytes_sent) / elapsed),
+        'bytes_recv': int((current_network_io.bytes_recv - previous_network_io.bytes_recv) / elapsed)
+    }
+    
+    # Get memory information
+    memory = psutil.virtual_memory()
+    
+    host_info = {
+        'cpu_usage': psutil.cpu_percent(interval=0.1),
+        'memory_usage': memory.percent,
+        'memory_total': memory.total,
+        'memory_used': memory.used,
+        'network_io': network_rate,
+        'cpu_frequency': _get_cpu_frequency()
+    }
+    return host_info, current_network_io, current_io_time
+
+async def _send_rcon_query(client, command):
+    """Send a status query over the persistent RCON connection, raising if it went unanswered"""
+    # Run the blocking socket round trip in an executor so several servers can be polled at once
+    result = await asyncio.get_running_loop().run_in_executor(None, client.send_command, command)
+    if result is None:
+        raise ConnectionError(f"No response to '{command}'")
+    return result
+
+async def _poll_advanced_data(server_name, host_info=None, metrics=METRICS):
+    """Query the given advanced metrics (TPS, MSPT and/or players) of a server, return whether RCON answered"""
+    client = await _ensure_persistent_rcon(server_name)
+    if not client:
+        return False
+    
+    data = advanced_data.setdefault(server_name, _default_advanced_data())
+    
+    try:
+        # Get server info for platform and version checks
+        server_info_data = server_info.get(server_name, {})
+        platform_type = server_info_data.get('platform_type', 'Unknown')
+        game_version = server_info_data.get('game_version', '1.0.0')
+        spark_installed = server_info_data.get('spark_installed', False)
+        
+        # Check if we should use tick query command
+        # Conditions: Forge platform OR no spark installed, and game version >= 1.20.1
+        use_tick_query = False
+        try:
+            # Parse game version to compare
+            version_parts = list(map(int, game_version.split('.')))
+            if (platform_type == 'Forge' or not spark_installed) and len(version_parts) >= 3:
+                if (version_parts[0] > 1) or \
+                   (version_parts[0] == 1 and version_parts[1] > 20) or \
+                   (version_parts[0] == 1 and version_parts[1] == 20 and version_parts[2] >= 1):
+                    use_tick_query = True
+        except Exception as e:
+            print(f"Error parsing game version: {e}")
+        
+        # Only the metrics the adaptive poller says are due are queried
+        # tick query answers TPS and MSPT at once
+        if 'tps' in metrics or (use_tick_query and 'mspt' in metrics):  # Get TPS and MSPT using appropriate method
+            if use_tick_query:
+                # Use tick query command for Forge 1.20.1+ without spark
+                tick_result = await _send_rcon_query(client, 'tick query')
+                if tick_result:
+                    print(f"Tick query output: {tick_result}")
+                    for line in tick_result.split('\n'):
+                        line = line.strip()
+                        if not line:
+                            continue
                         
-                        # Initialize COM library for this thread
-                        pythoncom.CoInitialize()
+                        # Remove Minecraft formatting codes
+                        clean_line = _remove_minecraft_formatting(line)
                         
-                        # Create WMI instance
-                        c = wmi.WMI()
+                        # Parse tick query output
+                        # Format: The game is running normallyTarget tick rate: {A} per second. Average time per tick: {B}ms (Target: 50.0ms)Percentiles: P50: {C}ms P95: {D}ms P99: {E}ms, sample: 100
+                        match = re.search(r'Average time per tick: ([\d.]+)ms', clean_line)
+                        if match:
+                            # Get MSPT from {B}
+                            mspt_value = match.group(1)
+                            data['mspt'] = mspt_value
+                            print(f"Extracted MSPT from tick query: {mspt_value}")
+                            
+                            # The spike detector looks at the slow ticks, P99 when the output has it
+                            p99 = re.search(r'P99: ([\d.]+)ms', clean_line)
+                            _observe_mspt(server_name, p99.group(1) if p99 else mspt_value, host_info)
+                            
+                            # Calculate TPS from MSPT
+                            try:
+                                mspt = float(mspt_value)
+                                if mspt <= 50.0:
+                                    tps_value = "20.0"
+                                else:
+                                    tps = 1000.0 / mspt
+                                    tps_value = f"{min(tps, 20.0):.1f}"
+                                data['tps'] = tps_value
+                                print(f"Calculated TPS from MSPT: {tps_value}")
+                            except ValueError:
+                                print(f"Error calculating TPS from MSPT: {mspt_value}")
+                            break
+            else:
+                # Use traditional tps command for spark installed servers
+                tps_result = await _send_rcon_query(client, 'tps')
+                if tps_result:
+                    print(f"TPS command output: {tps_result}")
+                    for line in tps_result.split('\n'):
+                        line = line.strip()
+                        if not line:
+                            continue
                         
-                        # Use the specified SELECT statement to query ActualFrequency
-                        query = "SELECT ActualFrequency, Name FROM Win32_PerfFormattedData_Counters_ProcessorInformation WHERE Name='_Total'"
-                        result = c.query(query)
+                        # Remove Minecraft formatting codes
+                        clean_line = _remove_minecraft_formatting(line)
                         
-                        total_freq = None
-                        fallback_freq = None
+                        # Parse TPS from line with [⚡] and multiple comma-separated values
+                        if "[⚡]" in clean_line and len(clean_line.split(',')) >= 5:
+                            # Extract TPS from {10分钟前TPS} position (first value)
+                            tps_values = [val.strip() for val in clean_line.split(',')]
+                            if tps_values:
+                                tps_value = tps_values[0]
+                                # Clean up any remaining special characters
+                                tps_value = tps_value.replace('[⚡]', '').strip()
+                                if tps_value:
+                                    data['tps'] = tps_value
+                                    print(f"Extracted TPS: {tps_value}")
                         
-                        # Check if any results were returned
-                        if result:
-                            # Get the first result (should be _Total instance)
-                            item = result[0]
-                            try:
-                                # Check if ActualFrequency attribute exists
-                                if hasattr(item, 'ActualFrequency'):
-                                    # ActualFrequency is already in MHz, no conversion needed
-                                    actual_freq = float(item.ActualFrequency)
-                                    # Store _Total instance frequency
-                                    total_freq = actual_freq
-                                    instance_name = str(item.Name) if hasattr(item, 'Name') else "_Total"
-                                    print(f"Found _Total instance frequency: {total_freq} MHz")
-                            except (ValueError, TypeError, AttributeError) as e:
-                                print(f"Error processing result: {e}")
+                        # Parse TPS from "TPS from last 1m, 5m, 15m:" line
+                        elif "TPS from last" in clean_line:
+                            # Extract TPS from the first value
+                            tps_part = clean_line.split(':')[-1].strip()
+                            if tps_part:
+                                tps_values = [val.strip() for val in tps_part.split(',')]
+                                if tps_values:
+                                    tps_value = tps_values[0]
+                                    data['tps'] = tps_value
+                                    print(f"Extracted TPS from 'TPS from last' line: {tps_value}")
+        if 'mspt' in metrics:  # Get MSPT from mspt command (only if spark is installed)
+            if not use_tick_query:
+                mspt_result = await _send_rcon_query(client, 'mspt')
+                if mspt_result:
+                    print(f"MSPT command output: {mspt_result}")
+                    for line in mspt_result.split('\n'):
+                        line = line.strip()
+                        if not line:
+                            continue
                         
-                        # If _Total query failed, try without WHERE clause
-                        if total_freq is None:
-                            print("_Total instance query failed, trying without WHERE clause")
-                            query_all = "SELECT ActualFrequency, Name FROM Win32_PerfFormattedData_Counters_ProcessorInformation"
-                            result_all = c.query(query_all)
-                            
-                            for i, item in enumerate(result_all):
-                                try:
-                                    if hasattr(item, 'ActualFrequency') and hasattr(item, 'Name'):
-                                        instance_name = str(item.Name)
-                                        actual_freq = float(item.ActualFrequency)
-                                        
-                                        if instance_name == '_Total':
-                                            total_freq = actual_freq
-                                            print(f"Found _Total instance frequency: {total_freq} MHz (index: {i})")
-                                            break
-                                        elif fallback_freq is None:
-                                            fallback_freq = actual_freq
-                                            print(f"Found fallback frequency: {fallback_freq} MHz (instance: {instance_name}, index: {i})")
-                                except (ValueError, TypeError, AttributeError) as e:
-                                    print(f"Error processing result {i}: {e}")
-                                    continue
+                        # Remove Minecraft formatting codes
+                        clean_line = _remove_minecraft_formatting(line)
                         
-                        # Use _Total instance frequency if available, otherwise use fallback
-                        if total_freq is not None:
-                            cpu_frequency = total_freq
-                            print(f"Windows CPU frequency via WMI ActualFrequency: {cpu_frequency} MHz (instance: _Total)")
-                            wmi_success = True
-                        elif fallback_freq is not None:
-                            cpu_frequency = fallback_freq
-                            print(f"No _Total instance found, using fallback frequency: {cpu_frequency} MHz")
-                            wmi_success = True
-                        else:
-                            # No valid frequency found in query results
-                            print(f"No valid frequency found in query results. Result count: {len(result_all) if 'result_all' in locals() else 0}")
-                    except Exception as e:
-                        print(f"Error getting CPU frequency with WMI: {e}")
-                        traceback.print_exc()
-                    finally:
-                        # Uninitialize COM library for this thread
-                        try:
-                            pythoncom.CoUninitialize()
-                        except:
-                            pass
-                    
-                    # If WMI failed, fallback to psutil
-                    if not wmi_success:
-                        try:
-                            cpu_freq = psutil.cpu_freq()
-                            if cpu_freq:
-                                cpu_frequency = cpu_freq.current
-                                print(f"Fallback to psutil CPU frequency: {cpu_frequency} MHz")
-                            else:
-                                cpu_frequency = 0.0
-                                print(f"psutil.cpu_freq() returned None, using default: {cpu_frequency} MHz")
-                        except Exception as e:
-                            print(f"Error getting CPU frequency with psutil: {e}")
-                            cpu_frequency = 0.0
-                            print(f"Fallback to default CPU frequency: {cpu_frequency} MHz")
-                
-                # Get system information
-                system_info = {
-                    'cpu_usage': psutil.cpu_percent(interval=0.1),
-                    'memory_usage': memory.percent,
-                    'memory_total': memory.total,
-                    'memory_used': memory.used,
-                    'network_io': network_rate,
-                    'cpu_frequency': cpu_frequency,
-                    'tps': previous_advanced_data['tps'],
-                    'mspt': previous_advanced_data['mspt'],
-                    'players_online': previous_advanced_data['players_online'],
-                    'players_max': previous_advanced_data['players_max'],
-                    'spark_installed': False
-                }
-                
-                # Initialize server_info_data with default value
-                server_info_data = {}
-                
-                # Check if any server is connected
-                if server_processes:
-                    # Get first connected server (assuming only one server is connected at a time)
-                    server_name = list(server_processes.keys())[0]
-                    server_info_data = server_info.get(server_name, {})
-                    spark_installed = server_info_data.get('spark_installed', False)
-                    system_info['spark_installed'] = spark_installed
-                    
-                    # Ensure persistent RCON connection is established
-                    rcon_available = await _ensure_persistent_rcon()
-                    
-                    # If RCON is available, get server data in rotation
-                    if rcon_available:
-                        try:
-                            # Get server info again to ensure we have latest spark_installed status
-                            server_info_data = server_info.get(server_name, {})
-                            spark_installed = server_info_data.get('spark_installed', False)
-                            
-                            # Get server info for platform and version checks
-                            server_info_data = server_info.get(server_name, {})
-                            platform_type = server_info_data.get('platform_type', 'Unknown')
-                            game_version = server_info_data.get('game_version', '1.0.0')
-                            spark_installed = server_info_data.get('spark_installed', False)
-                            
-                            # Check if we should use tick query command
-                            # Conditions: Forge platform OR no spark installed, and game version >= 1.20.1
-                            use_tick_query = False
-                            try:
-                                # Parse game version to compare
-                                version_parts = list(map(int, game_version.split('.')))
-                                if (platform_type == 'Forge' or not spark_installed) and len(version_parts) >= 3:
-                                    if (version_parts[0] > 1) or \
-                                       (version_parts[0] == 1 and version_parts[1] > 20) or \
-                                       (version_parts[0] == 1 and version_parts[1] == 20 and version_parts[2] >= 1):
-                                        use_tick_query = True
-                            except Exception as e:
-                                print(f"Error parsing game version: {e}")
-                            
-                            # 根据rotation_counter轮流获取数据
-                            if rotation_counter == 0:  # Get TPS and MSPT using appropriate method
-                                if use_tick_query:
-                                    # Use tick query command for Forge 1.20.1+ without spark
-                                    tick_result = persistent_rcon_client.send_command('tick query')
-                                    if tick_result:
-                                        print(f"Tick query output: {tick_result}")
-                                        tick_lines = tick_result.split('\n')
-                                        
-                                        # Helper function to remove Minecraft formatting codes
-                                        def remove_minecraft_formatting(text):
-                                            import re
-                                            # Remove all formatting codes (§ followed by any character)
-                                            return re.sub(r'§[0-9a-fklmnor]', '', text, flags=re.IGNORECASE)
-                                        
-                                        for line in tick_lines:
-                                            line = line.strip()
-                                            if not line:
-                                                continue
-                                            
-                                            # Remove Minecraft formatting codes
-                                            clean_line = remove_minecraft_formatting(line)
-                                            
-                                            # Parse tick query output
-                                            # Format: The game is running normallyTarget tick rate: {A} per second. Average time per tick: {B}ms (Target: 50.0ms)Percentiles: P50: {C}ms P95: {D}ms P99: {E}ms, sample: 100
-                                            import re
-                                            match = re.search(r'Average time per tick: ([\d.]+)ms', clean_line)
-                                            if match:
-                                                # Get MSPT from {B}
-                                                mspt_value = match.group(1)
-                                                system_info['mspt'] = mspt_value
-                                                previous_advanced_data['mspt'] = mspt_value
-                                                print(f"Extracted MSPT from tick query: {mspt_value}")
-                                                
-                                                # Calculate TPS from MSPT
-                                                try:
-                                                    mspt = float(mspt_value)
-                                                    if mspt <= 50.0:
-                                                        tps_value = "20.0"
-                                                    else:
-                                                        tps = 1000.0 / mspt
-                                                        tps_value = f"{min(tps, 20.0):.1f}"
-                                                    system_info['tps'] = tps_value
-                                                    previous_advanced_data['tps'] = tps_value
-                                                    print(f"Calculated TPS from MSPT: {tps_value}")
-                                                except ValueError:
-                                                    print(f"Error calculating TPS from MSPT: {mspt_value}")
-                                                break
-                                else:
-                                    # Use traditional tps command for spark installed servers
-                                    tps_result = persistent_rcon_client.send_command('tps')
-                                    if tps_result:
-                                        print(f"TPS command output: {tps_result}")
-                                        tps_lines = tps_result.split('\n')
-                                        
-                                        # Helper function to remove Minecraft formatting codes
-                                        def remove_minecraft_formatting(text):
-                                            import re
-                                            # Remove all formatting codes (§ followed by any character)
-                                            return re.sub(r'§[0-9a-fklmnor]', '', text, flags=re.IGNORECASE)
-                                        
-                                        for line in tps_lines:
-                                            line = line.strip()
-                                            if not line:
-                                                continue
-                                            
-                                            # Remove Minecraft formatting codes
-                                            clean_line = remove_minecraft_formatting(line)
-                                            
-                                            # Parse TPS from line with [⚡] and multiple comma-separated values
-                                            if "[⚡]" in clean_line and len(clean_line.split(',')) >= 5:
-                                                # Extract TPS from {10分钟前TPS} position (first value)
-                                                tps_values = [val.strip() for val in clean_line.split(',')]
-                                                if tps_values:
-                                                    tps_value = tps_values[0]
-                                                    # Clean up any remaining special characters
-                                                    tps_value = tps_value.replace('[⚡]', '').strip()
-                                                    if tps_value:
-                                                        system_info['tps'] = tps_value
-                                                        previous_advanced_data['tps'] = tps_value
-                                                        print(f"Extracted TPS: {tps_value}")
-                                            
-                                            # Parse TPS from "TPS from last 1m, 5m, 15m:" line
-                                            elif "TPS from last" in clean_line:
-                                                # Extract TPS from the first value
-                                                tps_part = clean_line.split(':')[-1].strip()
-                                                if tps_part:
-                                                    tps_values = [val.strip() for val in tps_part.split(',')]
-                                                    if tps_values:
-                                                        tps_value = tps_values[0]
-                                                        system_info['tps'] = tps_value
-                                                        previous_advanced_data['tps'] = tps_value
-                                                        print(f"Extracted TPS from 'TPS from last' line: {tps_value}")
-                            elif rotation_counter == 1:  # Get MSPT from mspt command (only if spark is installed)
-                                if not use_tick_query:
-                                    mspt_result = persistent_rcon_client.send_command('mspt')
-                                    if mspt_result:
-                                        print(f"MSPT command output: {mspt_result}")
-                                        mspt_lines = mspt_result.split('\n')
-                                        
-                                        # Helper function to remove Minecraft formatting codes
-                                        def remove_minecraft_formatting(text):
-                                            import re
-                                            # Remove all formatting codes (§ followed by any character)
-                                            return re.sub(r'§[0-9a-fklmnor]', '', text, flags=re.IGNORECASE)
-                                        
-                                        for line in mspt_lines:
-                                            line = line.strip()
-                                            if not line:
-                                                continue
-                                            
-                                            # Remove Minecraft formatting codes
-                                            clean_line = remove_minecraft_formatting(line)
-                                            
-                                            # Parse MSPT from line with ◴
-                                            if "◴" in clean_line:
-                                                # Extract MSPT from {G} position (first value before /)
-                                                # Format: ◴ 1.23/4.56/7.89, 1.23/4.56/7.89, 1.23/4.56/7.89
-                                                mspt_part = clean_line.split('◴')[1].strip() if '◴' in clean_line else clean_line
-                                                mspt_values = mspt_part.split(',')[0].strip() if ',' in mspt_part else mspt_part
-                                                if '/' in mspt_values:
-                                                    mspt_value = mspt_values.split('/')[0].strip()
-                                                    if mspt_value:
-                                                        system_info['mspt'] = mspt_value
-                                                        previous_advanced_data['mspt'] = mspt_value
-                                                        print(f"Extracted MSPT: {mspt_value}")
-                            elif rotation_counter == 2:  # Get Players from list command
-                                list_result = persistent_rcon_client.send_command('list')
-                                if list_result:
-                                    print(f"List command output: {list_result}")
-                                    # Parse list output - Example: "There are 2 of a max of 20 players online: player1, player2"
-                                    # or "There are 0 of a max of 20 players online"
-                                    import re
-                                    player_pattern = r"There are (\d+) of a max of (\d+) players online"
-                                    match = re.search(player_pattern, list_result)
-                                    if match:
-                                        system_info['players_online'] = match.group(1)
-                                        system_info['players_max'] = match.group(2)
-                                        previous_advanced_data['players_online'] = match.group(1)
-                                        previous_advanced_data['players_max'] = match.group(2)
-                                    else:
-                                        # Alternative format: "Online players: 2/20"
-                                        online_pattern = r"Online players: (\d+)/(\d+)"
-                                        match = re.search(online_pattern, list_result)
-                                        if match:
-                                            system_info['players_online'] = match.group(1)
-                                            system_info['players_max'] = match.group(2)
-                                            previous_advanced_data['players_online'] = match.group(1)
-                                            previous_advanced_data['players_max'] = match.group(2)
-                        except Exception as e:
-                            print(f"Error getting server data via persistent RCON: {e}")
-                            # Close invalid connection, but check if it exists first
-                            if persistent_rcon_client:
-                                persistent_rcon_client.close()
-                                persistent_rcon_client = None
-                                persistent_rcon_server = None
-                            # Try to re-establish connection for next iteration
-                            print("Attempting to re-establish RCON connection for next iteration...")
-                            await _ensure_persistent_rcon()
-                
-                # Send status update to client
-                await send_message_with_log(current_client, {
-                    'type': 'server_status',
-                    'system_info': system_info,
-                    'platform_type': server_info_data.get('platform_type', 'Unknown')
-                })
+                        # Parse MSPT from line with ◴
+                        if "◴" in clean_line:
+                            # Extract MSPT from {G} position (first value before /)
+                            # Format: ◴ 1.23/4.56/7.89, 1.23/4.56/7.89, 1.23/4.56/7.89
+                            mspt_part = clean_line.split('◴')[1].strip()
+                            mspt_values = mspt_part.split(',')[0].strip() if ',' in mspt_part else mspt_part
+                            if '/' in mspt_values:
+                                mspt_value = mspt_values.split('/')[0].strip()
+                                if mspt_value:
+                                    data['mspt'] = mspt_value
+                                    print(f"Extracted MSPT: {mspt_value}")
+                                    # The spike detector looks at the slowest tick of the last 10 seconds
+                                    _observe_mspt(server_name, mspt_values.split('/')[-1].strip(), host_info)
+        if 'players' in metrics:  # Get Players from list command
+            list_result = await _send_rcon_query(client, 'list')
+            if list_result:
+                print(f"List command output: {list_result}")
+                # Parse list output - Example: "There are 2 of a max of 20 players online: player1, player2"
+                # or "There are 0 of a max of 20 players online"
+                player_pattern = r"There are (\d+) of a max of (\d+) players online"
+                match = re.search(player_pattern, list_result)
+                if not match:
+                    # Alternative format: "Online players: 2/20"
+                    online_pattern = r"Online players: (\d+)/(\d+)"
+                    match = re.search(online_pattern, list_result)
+                if match:
+                    data['players_online'] = match.group(1)
+                    data['players_max'] = match.group(2)
+    except Exception as e:
+        print(f"Error getting server data via persistent RCON: {e}")
+        # Close invalid connection, it is re-established on the next poll
+        _close_persistent_rcon(server_name)
+        return False
+    return True
+
+async def _probe_advanced_data(server_name, metrics, host_info, watched):
+    """Query the due metrics of a server and let the adaptive poller schedule their next probe"""
+    ok = await _poll_advanced_data(server_name, host_info, metrics)
+    data = advanced_data.get(server_name, {})
+    readings = {'tps': data.get('tps'), 'mspt': data.get('mspt'), 'players': data.get('players_online')}
+    # A server nobody is playing on is idle
+    idle = data.get('players_online') == '0'
+    adaptive_poller.record(server_name, {metric: readings[metric] for metric in metrics}, watched, idle, ok)
+
+def _status_snapshot(server_name, host_info):
+    """Build the status snapshot of one server, or of the host only when server_name is None"""
+    server_info_data = server_info.get(server_name, {}) if server_name else {}
+    return {
+        **host_info,
+        **advanced_data.get(server_name, _default_advanced_data()),
+        'spark_installed': server_info_data.get('spark_installed', False),
+        'platform_type': server_info_data.get('platform_type', 'Unknown')
+    }
+
+async def _publish_status(topic, server_name, snapshot, clients):
+    """Send the full snapshot to clients without a baseline and only the changed fields to the rest"""
+    seq, full_clients, changes, delta_clients = status_deltas.encode(topic, snapshot, clients)
+    
+    if full_clients:
+        system_info = dict(snapshot)
+        platform_type = system_info.pop('platform_type')
+        # The snapshot is the baseline of every later delta, so it is never dropped
+        await broadcast_message_with_log({
+            'type': 'server_status',
+            'server_name': server_name,
+            'seq': seq,
+            'system_info': system_info,
+            'platform_type': platform_type
+        }, clients=full_clients)
+    
+    if delta_clients:
+        await broadcast_message_with_log({
+            'type': 'server_status_delta',
+            'server_name': server_name,
+            'seq': seq,
+            'changes': changes
+        }, clients=delta_clients, droppable=True)
+
+async def send_server_status():
+    """Send server status updates to the clients subscribed to them"""
+    # Store previous network IO counters to calculate rate
+    previous_network_io = psutil.net_io_counters()
+    previous_io_time = time.monotonic()
+    
+    while True:
+        try:
+            # Status frames are only built for servers somebody is watching
+            watched_servers = [
+                server_name for server_name in list(server_processes.keys())
+                if broadcast_hub.has_subscribers(status_topic(server_name))
+            ]
+            
+            # Every started server is probed over RCON, each metric at its own adaptive cadence:
+            # fast while watched or volatile, slow while idle or unwatched
+            now = time.monotonic()
+            probes = {}
+            for server_name in list(server_processes.keys()):
+                if not server_startup_completed.get(server_name):
+                    continue
+                metrics = adaptive_poller.due(server_name, server_info.get(server_name, {}).get('polling'),
+                                              server_name in watched_servers, now)
+                if metrics:
+                    probes[server_name] = metrics
+            
+            host_info = None
+            if watched_servers or broadcast_hub.has_subscribers(HOST_METRICS_TOPIC):
+                host_info, previous_network_io, previous_io_time = await asyncio.get_running_loop().run_in_executor(
+                    host_metrics_executor, _collect_host_metrics, previous_network_io, previous_io_time)
+            
+            # Probe all due servers concurrently
+            await asyncio.gather(*(
+                _probe_advanced_data(server_name, metrics, host_info, server_name in watched_servers)
+                for server_name, metrics in probes.items()
+            ))
+            
+            if host_info is not None:
+                status_clients = set()
+                for server_name in watched_servers:
+                    subscribers = broadcast_hub.subscribers(status_topic(server_name))
+                    status_clients.update(subscribers)
+                    await _publish_status(status_topic(server_name), server_name,
+                                          _status_snapshot(server_name, host_info), subscribers)
                 
-                # Increment rotation counter, reset to 0 after 2 to cycle through all three commands
-                rotation_counter = (rotation_counter + 1) % 3
+                # Clients that only watch host metrics get a frame without server data
+                host_clients = [
+                    websocket for websocket in broadcast_hub.subscribers(HOST_METRICS_TOPIC)
+                    if websocket not in status_clients
+                ]
+                if host_clients:
+                    await _publish_status(HOST_METRICS_TOPIC, None, _status_snapshot(None, host_info), host_clients)
             
             await asyncio.sleep(1)  # Update every 1 second
         except Exception as e:
             print(f"Error in send_server_status: {e}")
             # Log the full traceback for debugging
-            import traceback
             traceback.print_exc()
             # Continue the loop even if there's an error
             await asyncio.sleep(1)
 
+async def track_players():
+    """Follow the join and leave lines of every tracked server for the player tracker"""
+    loop = asyncio.get_running_loop()
+    tracked = set()
+    while True:
+        current = set(server_info.keys())
+        # A server that just stopped is read once more, so its "Stopping server" line closes the sessions
+        for server_name in current | tracked:
+            # The start time tells a midnight log rollover apart from a restart
+            run = server_processes.get(server_name, {}).get('started_at')
+            try:
+                online = await loop.run_in_executor(None, player_tracker.follow, server_name, run)
+                if server_name not in current:
+                    # A crash logs no "Stopping server" line, end whatever is still open at the last line
+                    await loop.run_in_executor(None, player_tracker.close, server_name)
+            except Exception as e:
+                print(f"Error tracking players of server {server_name}: {e}")
+                continue
+            if online is not None and server_name in advanced_data:
+                # The log knows about joins and leaves before the next list probe
+                advanced_data[server_name]['players_online'] = str(online)
+        tracked = current
+        await asyncio.sleep(PLAYER_TRACK_INTERVAL)
+
+async def track_world_sizes():
+    """Scan the world folders of every server in the background, so growth is known before anyone asks"""
+    while True:
+        try:
+            server_names = sorted(entry.name for entry in os.scandir('cached_minecraft_servers') if entry.is_dir())
+        except FileNotFoundError:
+            server_names = []
+        for server_name in server_names:
+            try:
+                await world_analyzer.refresh(server_name)
+            except Exception as e:
+                print(f"Error analyzing worlds of server {server_name}: {e}")
+        await asyncio.sleep(WORLD_SCAN_INTERVAL)
+
 async def send_server_logs():
     """Send server logs to the connected client"""
     # This function is kept for compatibility but log streaming is now handled by stream_server_logs
@@ -1266,17 +2117,20 @@ async def send_server_logs():
 async def monitor_server_logs(server_path, server_name):
     """Monitor server logs independently to detect startup completion and cache logs"""
     try:
-        # Find the latest log file
+        # Find the latest log file (typically latest.log)
         logs_dir = os.path.join(server_path, 'logs')
-        if not os.path.exists(logs_dir):
-            print(f"Log directory not found for server {server_name}: {logs_dir}")
-            return
-        
-        # Get the latest log file (typically latest.log)
         latest_log = os.path.join(logs_dir, 'latest.log')
-        if not os.path.exists(latest_log):
-            print(f"Latest log file not found for server {server_name}: {latest_log}")
-            return
+        
+        # Wait for the log file of this run, since a latest.log left over from the
+        # previous run still contains its startup completion line
+        started_at = server_processes.get(server_name, {}).get('started_at', 0)
+        waited = 0
+        while not os.path.exists(latest_log) or os.path.getmtime(latest_log) < started_at:
+            if waited >= LOG_WAIT_TIMEOUT or server_name not in server_processes:
+                print(f"Latest log file not found for server {server_name}: {latest_log}")
+                return
+            await asyncio.sleep(0.5)
+            waited += 0.5
         
         # Initialize log cache for this server
         if server_name not in log_caches:
@@ -1312,9 +2166,11 @@ async def monitor_server_logs(server_path, server_name):
         except Exception as e:
             print(f"Error initializing log cache for server {server_name}: {e}")
         
-        if not startup_completed:
+        if startup_completed:
+            await event_bus.publish(SERVER_STARTUP_COMPLETED, server_name=server_name)
+        else:
             # If startup not completed, continue monitoring for new log lines
-            while True:
+            while server_name in server_processes:
                 try:
                     with open(latest_log, 'r', encoding='utf-8', errors='ignore') as f:
                         # Move to last read position
@@ -1341,12 +2197,18 @@ async def monitor_server_logs(server_path, server_name):
                     print(f"Error reading logs for server {server_name}: {e}")
                 
                 if startup_completed:
+                    await event_bus.publish(SERVER_STARTUP_COMPLETED, server_name=server_name)
                     break
                 
                 await asyncio.sleep(0.5)  # Wait for new logs
     except Exception as e:
         print(f"Error monitoring server logs for {server_name}: {e}")
 
+def _log_filter_allows(websocket, record):
+    """Check whether a parsed log line passes the filter of a client"""
+    log_filter = log_filters.get(websocket)
+    return log_filter is None or log_filter.matches(record)
+
 async def _check_log_rate_limit(websocket):
     """Check if log rate limit has been exceeded for this client"""
     current_time = time.time()
@@ -1380,46 +2242,56 @@ async def _check_log_rate_limit(websocket):
     log_rate_counters[websocket] = (last_reset_time, line_count + 1)
     return True
 
-async def stream_server_logs(websocket, server_path):
-    """Stream server logs to the client using cached logs and periodic file reads"""
+async def _subscribe_logs(websocket, server_path):
+    """Attach a client to the shared log stream of a server"""
+    # Get server name from server_path
+    server_name = os.path.basename(server_path)
+    
+    # Find the latest log file
+    logs_dir = os.path.join(server_path, 'logs')
+    if not os.path.exists(logs_dir):
+        await send_message_with_log(websocket, {
+            'type': 'server_log',
+            'log': f'Log directory not found: {logs_dir}'
+        })
+        return
+    
+    # Get the latest log file (typically latest.log)
+    latest_log = os.path.join(logs_dir, 'latest.log')
+    if not os.path.exists(latest_log):
+        await send_message_with_log(websocket, {
+            'type': 'server_log',
+            'log': f'Latest log file not found: {latest_log}'
+        })
+        return
+    
+    # Send cached logs first (with filtering and rate limiting)
+    if server_name in log_caches and log_caches[server_name]:
+        print(f"Sending {len(log_caches[server_name])} cached log lines to client for server {server_name}")
+        parser = LogLineParser(server_info.get(server_name, {}).get('platform_type'))
+        for log_line in log_caches[server_name]:
+            # Check filter and rate limit before sending
+            if _log_filter_allows(websocket, parser.parse(log_line)) and await _check_log_rate_limit(websocket):
+                await send_message_with_log(websocket, LOG_ENVELOPE.frame(log_line))
+        # Clear the cache after sending
+        log_caches[server_name] = []
+    
+    broadcast_hub.subscribe(websocket, logs_topic(server_name))
+    
+    # Start the shared tailer for this server if it is not running yet
+    tailer = log_tailers.get(server_name)
+    if tailer is None or tailer.done():
+        log_tailers[server_name] = asyncio.create_task(stream_server_logs(server_name, latest_log))
+
+async def stream_server_logs(server_name, latest_log):
+    """Tail a server's latest.log once and fan new lines out to every subscribed client"""
     try:
-        # Get server name from server_path
-        server_name = os.path.basename(server_path)
-        
-        # Find the latest log file
-        logs_dir = os.path.join(server_path, 'logs')
-        if not os.path.exists(logs_dir):
-            await send_message_with_log(websocket, {
-                'type': 'server_log',
-                'log': f'Log directory not found: {logs_dir}'
-            })
-            return
-        
-        # Get the latest log file (typically latest.log)
-        latest_log = os.path.join(logs_dir, 'latest.log')
-        if not os.path.exists(latest_log):
-            await send_message_with_log(websocket, {
-                'type': 'server_log',
-                'log': f'Latest log file not found: {latest_log}'
-            })
-            return
-        
-        # Send cached logs first (with rate limiting)
-        if server_name in log_caches and log_caches[server_name]:
-            print(f"Sending {len(log_caches[server_name])} cached log lines to client for server {server_name}")
-            for log_line in log_caches[server_name]:
-                # Check rate limit before sending
-                if await _check_log_rate_limit(websocket):
-                    await send_message_with_log(websocket, {
-                        'type': 'server_log',
-                        'log': log_line
-                    })
-            # Clear the cache after sending
-            log_caches[server_name] = []
-        
         # Track the last position in the log file
         last_position = 0
         
+        # Lines are parsed once, so client filters drop them before they are serialized
+        parser = LogLineParser(server_info.get(server_name, {}).get('platform_type'))
+        
         # Get initial file size to know where to start reading new logs
         try:
             with open(latest_log, 'r', encoding='utf-8', errors='ignore') as f:
@@ -1428,83 +2300,144 @@ async def stream_server_logs(websocket, server_path):
         except Exception as e:
             print(f"Error getting initial log position: {e}")
         
-        # Continue streaming new log lines using periodic file reads
-        while True:
+        # Continue streaming new log lines while anyone is watching
+        while broadcast_hub.has_subscribers(logs_topic(server_name)):
             try:
+                # Start over when the server rotated latest.log on restart
+                if os.path.getsize(latest_log) < last_position:
+                    last_position = 0
+                
                 with open(latest_log, 'r', encoding='utf-8', errors='ignore') as f:
                     # Move to last read position
                     f.seek(last_position)
                     
                     # Read new log lines
                     new_lines = f.readlines()
-                    if new_lines:
-                        for line in new_lines:
-                            # Check rate limit before sending
-                            if await _check_log_rate_limit(websocket):
-                                await send_message_with_log(websocket, {
-                                    'type': 'server_log',
-                                    'log': line.rstrip()
-                                })
+                    for line in new_lines:
+                        # Check filter and rate limit per client, then serialize the line once for all of them
+                        record = parser.parse(line)
+                        recipients = [
+                            websocket for websocket in broadcast_hub.subscribers(logs_topic(server_name))
+                            if _log_filter_allows(websocket, record) and await _check_log_rate_limit(websocket)
+                        ]
+                        if recipients:
+                            await broadcast_message_with_log(
+                                LOG_ENVELOPE.frame(line.rstrip()), clients=recipients, droppable=True)
                     
                     # Update last position to end of file
                     last_position = f.tell()
+                
+                # Keep the search index following the log
+                if new_lines:
+                    log_index.notify(server_name)
             except Exception as e:
                 print(f"Error reading logs for streaming: {e}")
             
             await asyncio.sleep(0.5)  # Wait for new logs
-            
-    except Exception as e:
-        await send_message_with_log(websocket, {
-            'type': 'error',
-            'message': f'Log streaming error: {str(e)}'
+    finally:
+        if log_tailers.get(server_name) is asyncio.current_task():
+            del log_tailers[server_name]
+
+async def on_server_crashed(**kwargs):
+    """Handle server.crashed event published by the process watcher"""
+    server_name = kwargs.get('server_name')
+    exit_code = kwargs.get('exit_code')
+    if server_name not in server_processes:
+        return
+    
+    print(f"Server {server_name} has stopped unexpectedly (exit code: {exit_code})")
+    
+    # Check whether the server should be restarted before its info is removed
+    auto_restart = (server_info.get(server_name, {}).get('auto_restart', False)
+                    and not server_processes[server_name].get('stop_failed'))
+    started_at = server_processes[server_name].get('started_at')
+    
+    # Close the console the start script leaves waiting on pause, before a restart opens another one
+    stop_coordinator.close_wrapper(server_processes[server_name])
+    
+    # Remove from process list
+    del server_processes[server_name]
+    if server_name in server_info:
+        del server_info[server_name]
+    
+    # Clear server log cache
+    if server_name in log_caches:
+        del log_caches[server_name]
+    
+    # Remove from startup completed list
+    if server_name in server_startup_completed:
+        del server_startup_completed[server_name]
+    
+    # Close the persistent RCON connection of the crashed server
+    _close_persistent_rcon(server_name)
+    command_queue.close(server_name)
+    advanced_data.pop(server_name, None)
+    adaptive_poller.forget(server_name)
+    status_deltas.forget(status_topic(server_name))
+    
+    # Notify all connected clients that server has stopped unexpectedly
+    await broadcast_message_with_log({
+        'type': 'server_crashed',
+        'server_name': server_name,
+        'exit_code': exit_code
+    })
+    
+    # Also send refresh_servers to update server list
+    await broadcast_message_with_log({
+        'type': 'refresh_servers'
+    })
+    
+    # Analyze the crash report or log tail of this run and record its signature
+    try:
+        analysis = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: crash_analyzer.analyze(server_name, record=True, since=started_at))
+        print(f"Crash of server {server_name} analyzed in {analysis['elapsed_ms']}ms: "
+              f"{analysis['signature']} (seen {analysis['occurrences']} time(s))")
+        await broadcast_message_with_log({
+            'type': 'crash_analysis',
+            'exit_code': exit_code,
+            **analysis
         })
+    except Exception as e:
+        print(f"Error analyzing crash of server {server_name}: {e}")
+    
+    # Restart the server if enabled in Fallenmoon/version.json, backing off when it keeps crashing
+    if auto_restart:
+        await _schedule_auto_restart(server_name)
 
-async def check_server_processes():
-    """Check if server processes are still running every 5 seconds"""
-    while True:
-        await asyncio.sleep(5)
-        
-        # Create a copy of the keys to avoid modification during iteration
-        servers_to_remove = []
-        
-        for server_name, process_info in server_processes.items():
-            process = process_info.get('process')
-            if process:
-                # Check if process is still running
-                process_status = process.poll()
-                if process_status is not None:
-                    # Process has stopped, add to removal list
-                    servers_to_remove.append(server_name)
-        
-        # Remove stopped servers
-        for server_name in servers_to_remove:
-            print(f"Server {server_name} has stopped unexpectedly")
-            
-            # Remove from process list
-            del server_processes[server_name]
-            if server_name in server_info:
-                del server_info[server_name]
-            
-            # Clear server log cache
-            if server_name in log_caches:
-                del log_caches[server_name]
-            
-            # Remove from startup completed list
-            if server_name in server_startup_completed:
-                del server_startup_completed[server_name]
-            
-            # Notify all connected clients that server has stopped unexpectedly
-            if current_client:
-                await send_message_with_log(current_client, {
-                    'type': 'server_crashed',
-                    'server_name': server_name
-                })
-            
-            # Also send refresh_servers to update server list
-            if current_client:
-                await send_message_with_log(current_client, {
-                    'type': 'refresh_servers'
-                })
+async def _schedule_auto_restart(server_name):
+    """Restart a crashed server after a backoff that doubles with each restart in the window"""
+    now = time.time()
+    recent = [restarted for restarted in auto_restart_history.get(server_name, [])
+              if now - restarted < AUTO_RESTART_WINDOW]
+    auto_restart_history[server_name] = recent
+    if len(recent) >= AUTO_RESTART_MAX_ATTEMPTS:
+        # A server crashing while booting would otherwise restart (and be analyzed and indexed) forever
+        message = (f'Server {server_name} crashed {len(recent) + 1} times within {AUTO_RESTART_WINDOW // 60} minutes, '
+                   f'automatic restart is paused')
+        print(message)
+        await broadcast_message_with_log({'type': 'error', 'message': message})
+        return
+    
+    delay = min(AUTO_RESTART_MAX_DELAY, AUTO_RESTART_BASE_DELAY * 2 ** len(recent))
+    recent.append(now + delay)
+    print(f"Automatically restarting server {server_name} in {delay}s "
+          f"(attempt {len(recent)}/{AUTO_RESTART_MAX_ATTEMPTS})")
+    
+    async def restart():
+        try:
+            await asyncio.sleep(delay)
+            # Someone may have started it by hand in the meantime
+            if server_name not in server_processes:
+                await event_bus.publish(SERVER_STARTED, data={'server_name': server_name})
+        finally:
+            if auto_restart_tasks.get(server_name) is asyncio.current_task():
+                del auto_restart_tasks[server_name]
+    
+    previous = auto_restart_tasks.get(server_name)
+    if previous and not previous.done():
+        previous.cancel()
+    auto_restart_tasks[server_name] = asyncio.create_task(restart())
 
 # Event subscription setup
 
@@ -1518,6 +2451,16 @@ def setup_event_handlers():
     event_bus.subscribe(SERVER_STARTED, on_server_started)
     event_bus.subscribe(SERVER_STOPPED, on_server_stopped)
     event_bus.subscribe(SERVER_CONNECTED, on_server_connected)
+    event_bus.subscribe(SERVER_CRASHED, on_server_crashed)
+    event_bus.subscribe(SERVER_STOP_PROGRESS, on_server_stop_progress)
+    event_bus.subscribe(SERVER_STARTUP_COMPLETED, orchestrator.on_startup_completed)
+    event_bus.subscribe(SERVER_CRASHED, orchestrator.on_server_crashed)
+    
+    # Bulk lifecycle events
+    event_bus.subscribe(BULK_START, on_bulk_start)
+    event_bus.subscribe(BULK_STOP, on_bulk_stop)
+    event_bus.subscribe(BULK_RESTART, on_bulk_restart)
+    event_bus.subscribe(BULK_PROGRESS, on_bulk_progress)
     
     # Command events
     event_bus.subscribe(COMMAND_EXECUTED, on_command_executed)
@@ -1531,20 +2474,89 @@ def setup_event_handlers():
     event_bus.subscribe('config.save', on_config_save)
     event_bus.subscribe('components.get', on_components_get)
     event_bus.subscribe('schematic.delete', on_schematic_delete)
+    
+    # Introspection events
+    event_bus.subscribe(BUS_STATS, on_bus_stats)
+    
+    # Subscription events
+    event_bus.subscribe(CLIENT_SUBSCRIBE, on_client_subscribe)
+    event_bus.subscribe(CLIENT_UNSUBSCRIBE, on_client_unsubscribe)
+    event_bus.subscribe(STATUS_RESYNC, on_status_resync)
+    
+    # Crash analysis events
+    event_bus.subscribe(CRASH_ANALYZE, on_crash_analyze)
+    
+    # Log search events
+    event_bus.subscribe(LOG_SEARCH, on_log_search)
+    event_bus.subscribe(LOG_ARCHIVE_SCAN, on_log_archive_scan)
+    event_bus.subscribe(LOG_FILTER_SET, on_log_filter_set)
+    
+    # Lag incident events
+    event_bus.subscribe(INCIDENT_LIST, on_incident_list)
+    event_bus.subscribe(INCIDENT_GET, on_incident_get)
+    
+    # Player events
+    event_bus.subscribe(PLAYER_STATS, on_player_stats)
+    
+    # World events
+    event_bus.subscribe(WORLD_STATS, on_world_stats)
+    
+    # Scheduler events
+    event_bus.subscribe(SCHEDULE_GET, on_schedule_get)
+    event_bus.subscribe(SCHEDULE_SAVE, on_schedule_save)
+    event_bus.subscribe(SCHEDULE_RUN, on_schedule_run)
+    
+    # Heavy events run on bounded work queues so their concurrency stays capped
+    event_bus.configure_queue(SERVER_STARTED, workers=2, maxsize=16)
+    event_bus.configure_queue(SERVER_STOPPED, workers=8, maxsize=32)
+    event_bus.configure_queue(BULK_START, workers=1, maxsize=4)
+    event_bus.configure_queue(BULK_STOP, workers=1, maxsize=4)
+    event_bus.configure_queue(BULK_RESTART, workers=1, maxsize=4)
+    event_bus.configure_queue('search.servers', workers=1, maxsize=4)
+    event_bus.configure_queue('components.get', workers=2, maxsize=8)
+    event_bus.configure_queue(LOG_SEARCH, workers=2, maxsize=8)
+    # Each scan already uses every core
+    event_bus.configure_queue(LOG_ARCHIVE_SCAN, workers=1, maxsize=4)
+    event_bus.configure_queue(WORLD_STATS, workers=1, maxsize=4)
 
 async def start_websocket_server():
     """Start the WebSocket server"""
     # Set up event handlers
     setup_event_handlers()
     
-    server = await websockets.serve(handle_client, '0.0.0.0', 9001)
+    # Frames are compressed with permessage-deflate when the browser supports it, and clients
+    # choose JSON or MessagePack frames through the WebSocket subprotocol
+    server = await websockets.serve(
+        handle_client, '0.0.0.0', 9001,
+        compression=None,
+        extensions=[
+            ServerPerMessageDeflateFactory(
+                server_max_window_bits=DEFLATE_WINDOW_BITS,
+                client_max_window_bits=DEFLATE_WINDOW_BITS,
+                compress_settings={'memLevel': DEFLATE_MEM_LEVEL}
+            )
+        ],
+        subprotocols=[SUBPROTOCOL_MSGPACK, SUBPROTOCOL_JSON] if msgpack_available else [SUBPROTOCOL_JSON],
+        select_subprotocol=select_subprotocol
+    )
+    print(f"WebSocket frame encodings: JSON ({'orjson' if orjson_available else 'json'})"
+          f"{', MessagePack' if msgpack_available else ''}")
     
     # Start background tasks
     asyncio.create_task(send_server_status())
     asyncio.create_task(send_server_logs())
-    asyncio.create_task(check_server_processes())
+    asyncio.create_task(send_heartbeat())
+    asyncio.create_task(track_players())
+    asyncio.create_task(track_world_sizes())
     
-    await server.wait_closed()
+    # Scheduled save-all, broadcasts and restarts, replacing external cron scripts
+    scheduler.start()
+    
+    try:
+        await server.wait_closed()
+    finally:
+        # Log archive scans and jar hashing run on worker processes that would outlive the dashboard
+        worker_pool.shutdown()
 
 if __name__ == '__main__':
     asyncio.run(start_websocket_server())
@@ -0,0 +1,99 @@
+import gzip
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .log_parser import LogLineParser, level_rank
+
+# Worker processes import this module, and with spawn the script that started the dashboard:
+# keep the imports here light so a worker does not load websockets, psutil or wmi
+
+# Long-lived pools, gunzip, regex and hashing work would hold the GIL in threads. Archive scans have
+# their own pool, so killing it to stop a runaway pattern leaves jar hashing running
+ARCHIVE_POOL = 'archive'
+HASH_POOL = 'hash'
+# Processes per pool; hashing is bound by the disk well before it uses every core
+POOL_WORKERS = {
+    ARCHIVE_POOL: max(1, os.cpu_count() or 1),
+    HASH_POOL: min(4, os.cpu_count() or 1)
+}
+
+# Bytes read per chunk while hashing, so big jars never sit in memory whole
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Dictionary mapping pool names to their running pools, started on first use
+_pools: Dict[str, ProcessPoolExecutor] = {}
+# Pools are started from the event loop and from executor threads (jar hashing), one lock keeps
+# two callers from each starting a pool and leaking one of them
+_pools_lock = threading.Lock()
+
+def get_pool(name: str) -> ProcessPoolExecutor:
+    """Get a process pool, starting it on first use (thread-safe)"""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = ProcessPoolExecutor(max_workers=POOL_WORKERS[name])
+        return pool
+
+def shutdown(name: Optional[str] = None) -> None:
+    """Stop the workers of a pool (or of every pool), also those stuck in a task; get_pool starts it again"""
+    with _pools_lock:
+        pools = [_pools.pop(name, None)] if name is not None else list(_pools.values())
+        if name is None:
+            _pools.clear()
+    for pool in pools:
+        if pool is None:
+            continue
+        # shutdown() lets running tasks finish, a catastrophic regex would never let go of its worker
+        processes = list((getattr(pool, '_processes', None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+@lru_cache(maxsize=16)
+def compile_pattern(pattern: str, ignore_case: bool) -> Optional['re.Pattern']:
+    """Compile a pattern once per worker process"""
+    if not pattern:
+        return None
+    return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+def scan_archive(path: str, pattern: str, ignore_case: bool, min_level: int,
+                 max_matches: int) -> Tuple[List[Tuple[int, str]], int, bool]:
+    """Decompress one archive and return its matching (line number, line), lines scanned and whether matches were cut off
+
+    Runs in a worker process. Lines without a level header, like stack trace frames, take the level of
+    the line before them, so WARN+ keeps the traces of the warnings it keeps.
+    """
+    regex = compile_pattern(pattern, ignore_case)
+    parser = LogLineParser()
+    matches = []
+    scanned = 0
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8', errors='ignore') as f:
+            for scanned, line in enumerate(f, 1):
+                if min_level and level_rank(parser.parse(line).level) < min_level:
+                    continue
+                if regex is not None and not regex.search(line):
+                    continue
+                if len(matches) >= max_matches:
+                    return matches, scanned, True
+                matches.append((scanned, line.rstrip('\r\n')))
+    except (OSError, EOFError) as e:
+        # A truncated archive is scanned as far as it could be read
+        print(f"Error reading log archive {path}: {e}")
+    return matches, scanned, False
+
+def hash_file(path: str) -> Optional[str]:
+    """Stream a file through SHA-256 and return the hex digest, or None if it can't be read"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
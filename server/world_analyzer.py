@@ -0,0 +1,290 @@
+import asyncio
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# File under <server>/Fallenmoon/ caching the header of every region file and the size history
+INDEX_FILE = 'world_index.json'
+# Bumped when the cached entry format changes, which makes every region file be read again
+INDEX_VERSION = 1
+# Threads listing directories and reading region headers of one server at the same time
+SCAN_WORKERS = 8
+# Folders of a dimension holding .mca files; only region files count towards the chunks
+REGION_DIR = 'region'
+MCA_DIRS = (REGION_DIR, 'entities', 'poi')
+# A region header is a 4 KiB table of 1024 chunk locations followed by 4 KiB of chunk timestamps
+HEADER_SIZE = 8192
+CHUNK_SLOTS = 1024
+# Vanilla dimension folders inside a world folder
+VANILLA_DIMENSIONS = {'': 'minecraft:overworld', 'DIM-1': 'minecraft:the_nether', 'DIM1': 'minecraft:the_end'}
+# Pre-1.16 Forge mods keep their dimensions in DIM<id> folders
+LEGACY_DIMENSION = re.compile(r'^DIM-?\d+$')
+# 1.16+ mod dimensions live in dimensions/<namespace>/<path>, paths may have several parts
+MAX_DIMENSION_DEPTH = 4
+# At most one size sample per dimension per interval is kept, and only this many of them
+HISTORY_INTERVAL = 3600
+HISTORY_LIMIT = 24 * 60
+# Growth is measured against the oldest sample within the window, once it is old enough to mean anything
+GROWTH_WINDOW = 7 * 86400
+MIN_GROWTH_SPAN = 3600
+
+def read_region_header(path: str) -> Tuple[int, int]:
+    """Count the chunks stored in a region file and get its newest chunk timestamp
+
+    Only the header is mapped, a 4 MiB region file is never read as a whole.
+    """
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), HEADER_SIZE, access=mmap.ACCESS_READ) as header:
+                locations = struct.unpack_from(f'>{CHUNK_SLOTS}I', header, 0)
+                timestamps = struct.unpack_from(f'>{CHUNK_SLOTS}I', header, CHUNK_SLOTS * 4)
+    except (OSError, ValueError):
+        # Shorter than a header (a region nothing was saved to yet) or truncated while being written
+        return 0, 0
+    return CHUNK_SLOTS - locations.count(0), max(timestamps)
+
+def _list_mca(directory: str) -> List[Tuple[str, str, int, float]]:
+    """List the (name, path, size, mtime) of the .mca files of a directory"""
+    files = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.mca') and entry.is_file():
+                    file_stats = entry.stat()
+                    files.append((entry.name, entry.path, file_stats.st_size, file_stats.st_mtime))
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return files
+
+def _level_name(server_path: str) -> str:
+    """Get the main world folder from the level-name of server.properties"""
+    try:
+        with open(os.path.join(server_path, 'server.properties'), 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                key, _, value = line.strip().partition('=')
+                if key.strip() == 'level-name' and value.strip():
+                    return value.strip()
+    except OSError:
+        pass
+    return 'world'
+
+def _world_folders(server_path: str) -> List[str]:
+    """Get the world folders of a server, the main world first
+
+    Bukkit-based servers keep the nether and the end, and plugins their extra worlds, in folders of their own.
+    """
+    main_world = _level_name(server_path)
+    worlds = [main_world] if os.path.isdir(os.path.join(server_path, main_world)) else []
+    try:
+        with os.scandir(server_path) as entries:
+            for entry in entries:
+                if (entry.name != main_world and entry.is_dir()
+                        and os.path.isfile(os.path.join(entry.path, 'level.dat'))):
+                    worlds.append(entry.name)
+    except FileNotFoundError:
+        return []
+    return worlds[:1] + sorted(worlds[1:])
+
+def _mod_dimensions(directory: str, parts: List[str]) -> Iterator[Tuple[str, str]]:
+    """Find the (dimension id, folder) of the mod dimensions under dimensions/"""
+    if len(parts) > MAX_DIMENSION_DEPTH:
+        return
+    try:
+        with os.scandir(directory) as entries:
+            folders = sorted((entry.name, entry.path) for entry in entries if entry.is_dir())
+    except FileNotFoundError:
+        return
+    for name, path in folders:
+        if name in MCA_DIRS and len(parts) >= 2:
+            # The first part is the namespace: dimensions/twilightforest/twilight_forest -> twilightforest:twilight_forest
+            yield f"{parts[0]}:{'/'.join(parts[1:])}", directory
+            return
+    for name, path in folders:
+        if name not in MCA_DIRS:
+            yield from _mod_dimensions(path, parts + [name])
+
+def find_dimensions(server_path: str) -> List[Dict[str, str]]:
+    """Find every dimension of every world of a server"""
+    dimensions = []
+    for world in _world_folders(server_path):
+        world_path = os.path.join(server_path, world)
+        found = [(dimension_id, os.path.join(world_path, folder))
+                 for folder, dimension_id in VANILLA_DIMENSIONS.items()]
+        try:
+            with os.scandir(world_path) as entries:
+                found.extend((entry.name, entry.path) for entry in entries
+                             if entry.name not in VANILLA_DIMENSIONS and LEGACY_DIMENSION.match(entry.name)
+                             and entry.is_dir())
+        except FileNotFoundError:
+            continue
+        found.extend(_mod_dimensions(os.path.join(world_path, 'dimensions'), []))
+        for dimension_id, folder in found:
+            if any(os.path.isdir(os.path.join(folder, mca_dir)) for mca_dir in MCA_DIRS):
+                dimensions.append({
+                    'world': world,
+                    'dimension': dimension_id,
+                    'path': os.path.relpath(folder, server_path).replace(os.sep, '/')
+                })
+    return dimensions
+
+def growth_per_day(history: List[List[float]], size: int, chunks: int, now: float) -> Tuple[Optional[float], Optional[float]]:
+    """Get the bytes and chunks a dimension grew by per day, None until there is a sample old enough"""
+    for sample_time, sample_size, sample_chunks in history:
+        if sample_time < now - GROWTH_WINDOW:
+            continue
+        span = now - sample_time
+        if span < MIN_GROWTH_SPAN:
+            break
+        return (size - sample_size) * 86400 / span, (chunks - sample_chunks) * 86400 / span
+    return None, None
+
+class WorldAnalyzer:
+    """Size, chunk count and growth of the dimensions of each server, read incrementally from region headers"""
+    
+    def __init__(self, servers_dir: str = 'cached_minecraft_servers'):
+        self._servers_dir = servers_dir
+        # Dictionary mapping server names to {'files': {path: [size, mtime, chunks, newest]}, 'history': {...}}
+        self._indexes: Dict[str, Dict[str, Any]] = {}
+        # Dictionary mapping server names to their running scan
+        self._tasks: Dict[str, asyncio.Future] = {}
+    
+    def _index_path(self, server_name: str) -> str:
+        """Get the path of the index file of a server"""
+        return os.path.join(self._servers_dir, server_name, 'Fallenmoon', INDEX_FILE)
+    
+    def _load(self, server_name: str) -> Dict[str, Any]:
+        """Read the index file of a server, empty if it is missing or outdated"""
+        try:
+            with open(self._index_path(server_name), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {'files': {}, 'history': {}}
+        if data.get('version') != INDEX_VERSION:
+            return {'files': {}, 'history': {}}
+        return {'files': data.get('files', {}), 'history': data.get('history', {})}
+    
+    def _save(self, server_name: str, index: Dict[str, Any]) -> None:
+        """Write the index file of a server atomically"""
+        path = self._index_path(server_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, **index}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, path)
+    
+    def scan(self, server_name: str) -> Dict[str, Any]:
+        """Bring the index of a server up to date, reading only the headers of new or changed region files (blocking)"""
+        started = time.perf_counter()
+        now = time.time()
+        server_path = os.path.join(self._servers_dir, server_name)
+        index = self._indexes.get(server_name)
+        if index is None:
+            index = self._load(server_name)
+        cached_files = index['files']
+        history = index['history']
+        
+        dimensions = find_dimensions(server_path)
+        totals = [{'size': 0, 'region_size': 0, 'region_files': 0, 'chunks': 0, 'newest': 0} for _ in dimensions]
+        directories = [(position, dimension['path'], mca_dir)
+                       for position, dimension in enumerate(dimensions) for mca_dir in MCA_DIRS]
+        files = {}
+        changed = []
+        
+        def add(position: int, mca_dir: str, entry: List[Any]) -> None:
+            total = totals[position]
+            total['size'] += entry[0]
+            if mca_dir == REGION_DIR:
+                total['region_size'] += entry[0]
+                total['region_files'] += 1
+                total['chunks'] += entry[2]
+                total['newest'] = max(total['newest'], entry[3])
+        
+        # Listing and header reads are mostly waiting on the disk, so threads overlap them
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+            listings = executor.map(lambda item: _list_mca(os.path.join(server_path, item[1], item[2])), directories)
+            for (position, folder, mca_dir), listing in zip(directories, listings):
+                for name, path, size, mtime in listing:
+                    relative_path = f'{folder}/{mca_dir}/{name}'
+                    entry = cached_files.get(relative_path)
+                    if not entry or entry[0] != size or entry[1] != mtime:
+                        if mca_dir == REGION_DIR:
+                            changed.append((position, relative_path, path, size, mtime))
+                            continue
+                        entry = [size, mtime, 0, 0]
+                    files[relative_path] = entry
+                    add(position, mca_dir, entry)
+            
+            if changed:
+                headers = executor.map(lambda item: read_region_header(item[2]), changed)
+                for (position, relative_path, _, size, mtime), (chunks, newest) in zip(changed, headers):
+                    files[relative_path] = entry = [size, mtime, chunks, newest]
+                    add(position, REGION_DIR, entry)
+        
+        results = []
+        sampled = False
+        for dimension, total in zip(dimensions, totals):
+            size, chunks = total['size'], total['chunks']
+            samples = history.setdefault(dimension['path'], [])
+            growth, chunk_growth = growth_per_day(samples, size, chunks, now)
+            if not samples or now - samples[-1][0] >= HISTORY_INTERVAL:
+                samples.append([round(now), size, chunks])
+                del samples[:-HISTORY_LIMIT]
+                sampled = True
+            results.append({
+                **dimension,
+                'size': size,
+                'region_size': total['region_size'],
+                'region_files': total['region_files'],
+                'chunks': chunks,
+                'last_chunk_saved': total['newest'] or None,
+                'growth_per_day': growth,
+                'chunks_per_day': chunk_growth
+            })
+        
+        # Removed files also change the index
+        index = {'files': files, 'history': {path: history[path] for path in
+                                             {dimension['path'] for dimension in dimensions} if path in history}}
+        if changed or sampled or len(files) != len(cached_files):
+            try:
+                self._save(server_name, index)
+            except OSError as e:
+                print(f"Error saving world index of server {server_name}: {e}")
+        self._indexes[server_name] = index
+        if changed:
+            print(f"Read {len(changed)} changed region file(s) of server {server_name}")
+        
+        total_size = sum(dimension['size'] for dimension in results)
+        total_growth = sum(dimension['growth_per_day'] or 0 for dimension in results)
+        try:
+            disk_free = shutil.disk_usage(server_path).free
+        except OSError:
+            disk_free = None
+        results.sort(key=lambda dimension: -dimension['size'])
+        return {
+            'dimensions': results,
+            'total_size': total_size,
+            'total_chunks': sum(dimension['chunks'] for dimension in results),
+            'growth_per_day': total_growth,
+            'disk_free': disk_free,
+            'days_until_full': disk_free / total_growth if disk_free and total_growth > 0 else None,
+            'changed_files': len(changed),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+    
+    async def refresh(self, server_name: str) -> Dict[str, Any]:
+        """Scan the worlds of a server in the executor; concurrent calls share one run"""
+        task = self._tasks.get(server_name)
+        if task is None or task.done():
+            loop = asyncio.get_running_loop()
+            task = asyncio.ensure_future(loop.run_in_executor(None, self.scan, server_name))
+            self._tasks[server_name] = task
+        return await asyncio.shield(task)
+
+# Global world analyzer instance
+world_analyzer = WorldAnalyzer()
@@ -3,17 +3,26 @@ import sys
 import os
 import asyncio
 import threading
-from server.app import app
-from server.websocket_server import start_websocket_server
+
+# Worker processes started with spawn (the default on Windows) re-import this script,
+# so the dashboard modules are only imported when it really runs
 
 def run_websocket_server():
     """Run the WebSocket server in a separate thread"""
+    from server.websocket_server import start_websocket_server
     asyncio.run(start_websocket_server())
 
 if __name__ == "__main__":
+    from server.app import app
+    from server import worker_pool
+    
     # Start WebSocket server in a separate thread
     websocket_thread = threading.Thread(target=run_websocket_server, daemon=True)
     websocket_thread.start()
     
     # Start Flask server
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    try:
+        app.run(host='0.0.0.0', port=5000, debug=False)
+    finally:
+        # The WebSocket thread is a daemon and never gets to stop the worker processes itself
+        worker_pool.shutdown()